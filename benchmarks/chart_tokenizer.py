@@ -0,0 +1,68 @@
+"""
+Throughput of the geometry chart tokenizer on synthetic Trek (columns layout) and Fairlight (rows layout) charts::
+
+    python benchmarks/chart_tokenizer.py --charts 2000
+"""
+
+import argparse
+import random
+import time
+
+from bike_geometry_comparator.ingest.chart_tokenizer import ChartSpec, parse_chart
+from bike_geometry_comparator.ingest.fairlight import FAIRLIGHT_CHART_SPEC
+from bike_geometry_comparator.ingest.trek import TREK_CHART_SPEC
+
+TREK_LABELS = [
+    "A — Seat tube",
+    "B — Seat tube angle",
+    "C — Head tube length",
+    "D — Head angle",
+    "E — Effective top tube",
+]
+TREK_LABELS += ["G — Bottom bracket drop", "H — Chainstay length", "I — Offset", "J — Trail", "K — Wheelbase"]
+TREK_LABELS += ["L — Standover", "M — Frame reach", "N — Frame stack"]
+FAIRLIGHT_SIZES = ["51R", "51T", "54R", "54T", "56R", "56T", "58R", "58T", "61R", "61T"]
+
+
+def trek_chart(rnd: random.Random) -> list[str]:
+    lines = ["Frame size letter"] + [f"\t{label}" for label in TREK_LABELS]
+    for size in ["XS", "S", "M", "ML", "L", "XL"]:
+        lines.append(size)
+        for label in TREK_LABELS:
+            lines.append(f"\t{rnd.randint(68, 75)},5°" if "angle" in label else f"\t{rnd.randint(30, 1000) / 10}")
+    return lines
+
+
+def fairlight_chart(rnd: random.Random) -> list[str]:
+    lines = ["Size " + " ".join(FAIRLIGHT_SIZES)]
+    for letter in "ABCDEFGIJKLMN":
+        lines.append(f"{letter} Metric " + " ".join(str(rnd.randint(50, 1000)) for _ in FAIRLIGHT_SIZES))
+    lines.append("H")
+    for tyre in ["650 x 47 = 685mm", "700 x 38 = 697mm", "650 x 2.2” = 702mm"]:
+        lines.append(f"Trail - {tyre} " + " ".join(f"{rnd.randint(450, 750) / 10}" for _ in FAIRLIGHT_SIZES))
+    lines.append("Fork Length - Axle to Crown " + " ".join("398" for _ in FAIRLIGHT_SIZES))
+    return lines
+
+
+def benchmark(name: str, charts: list[list[str]], spec: ChartSpec) -> None:
+    started = time.perf_counter()
+    rows = sum(len(parse_chart(chart, spec).sizes) for chart in charts)
+    elapsed = time.perf_counter() - started
+    lines = sum(len(chart) for chart in charts)
+    print(
+        f"{name}: {len(charts)} charts, {lines} lines, {rows} rows in {elapsed:.3f} s "
+        f"({len(charts) / elapsed:.0f} charts/s, {lines / elapsed:.0f} lines/s)"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=2000)
+    args = parser.parse_args()
+    rnd = random.Random(42)
+    benchmark("trek", [trek_chart(rnd) for _ in range(args.charts)], TREK_CHART_SPEC)
+    benchmark("fairlight", [fairlight_chart(rnd) for _ in range(args.charts)], FAIRLIGHT_CHART_SPEC)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Load test of the ``bgc serve`` HTTP query service.
+
+Opens ``--concurrency`` keep-alive connections and sends ``--requests`` GET requests in total, cycling through the
+given paths. Reports latency percentiles and throughput::
+
+    python benchmarks/http_load.py --port 8000 --concurrency 16 --requests 2000 \\
+        "/search?q=endurace" "/fit?height=182&inseam=86" "/compare?bike=Canyon|Endurace CF SLX|2022|M"
+"""
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+from urllib.parse import quote
+
+DEFAULT_PATHS = ["/search?q=endurace", "/search?brand=Trek&limit=50", "/fit?height=182&inseam=86"]
+
+
+async def _read_response(reader: asyncio.StreamReader) -> int:
+    head = await reader.readuntil(b"\r\n\r\n")
+    status_line, *header_lines = head.decode("latin-1").split("\r\n")
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    if headers.get("transfer-encoding") == "chunked":
+        while size := int((await reader.readuntil(b"\r\n")).strip(), 16):
+            await reader.readexactly(size + 2)
+        await reader.readexactly(2)
+    elif "content-length" in headers:
+        await reader.readexactly(int(headers["content-length"]))
+    return int(status_line.split(" ")[1])
+
+
+async def _worker(host: str, port: int, paths: "itertools.cycle[str]", remaining: list[int], latencies: list[float]):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while remaining[0] > 0:
+            remaining[0] -= 1
+            path = quote(next(paths), safe="/?&=|%")
+            started = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+            await writer.drain()
+            status = await _read_response(reader)
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                raise RuntimeError(f"GET {path} returned {status}")
+    finally:
+        writer.close()
+
+
+async def run(host: str, port: int, paths: list[str], concurrency: int, requests: int) -> None:
+    latencies: list[float] = []
+    remaining = [requests]
+    path_cycle = itertools.cycle(paths)
+    started = time.perf_counter()
+    await asyncio.gather(*(_worker(host, port, path_cycle, remaining, latencies) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(f"{len(latencies)} requests, {concurrency} connections, {elapsed:.2f} s")
+    print(f"throughput {len(latencies) / elapsed:.0f} req/s")
+    print(f"latency p50 {percentiles[49] * 1000:.2f} ms, p99 {percentiles[98] * 1000:.2f} ms")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("paths", nargs="*", default=DEFAULT_PATHS)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.host, args.port, args.paths, args.concurrency, args.requests))
+
+
+if __name__ == "__main__":
+    main()
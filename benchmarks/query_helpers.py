@@ -0,0 +1,65 @@
+"""
+Time and peak Python memory of the query result helpers on the whole catalog repeated ``--copies`` times::
+
+    python benchmarks/query_helpers.py --database build/database.csv --copies 50
+
+Dict rows are the former ``fetchall_with_columns`` representation, the other helpers are from ``db_utils``.
+"""
+
+import argparse
+import time
+import tracemalloc
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+from bike_geometry_comparator.db_utils import fetch_columns, fetch_rows, iter_rows
+
+
+def dict_rows(sql: str) -> list[dict[str, Any]]:
+    cursor = duckdb.execute(sql)
+    columns = [desc[0] for desc in cursor.description] if cursor.description else []
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
+def streamed_rows(sql: str) -> int:
+    return sum(1 for _ in iter_rows(sql))
+
+
+def measure(helper: Callable[[str], Any], sql: str) -> tuple[float, float]:
+    # time is measured without tracing, which slows allocations down several times
+    started = time.perf_counter()
+    helper(sql)
+    seconds = time.perf_counter() - started
+    tracemalloc.start()
+    result = helper(sql)
+    (_, peak) = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return seconds, peak / 2**20
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--database", type=Path, default=Path("build/database.csv"))
+    parser.add_argument("--copies", type=int, default=50, help="Number of times the catalog is repeated")
+    args = parser.parse_args()
+
+    sql = f"SELECT g.* FROM '{args.database}' g, range({args.copies})"
+    (rows,) = duckdb.execute(f"SELECT count(*) FROM ({sql})").fetchone() or (0,)
+    print(f"{rows} rows")
+    helpers: dict[str, Callable[[str], Any]] = {
+        "dict rows": dict_rows,
+        "Row objects": fetch_rows,
+        "columns": fetch_columns,
+        "streamed rows": streamed_rows,
+    }
+    for name, helper in helpers.items():
+        seconds, peak = measure(helper, sql)
+        print(f"{name:>14}: {seconds:6.2f} s, peak {peak:7.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+import hashlib
+import json
+import logging
+import os
+import shutil
+from dataclasses import dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_MANIFEST_FILE = "artifacts.json"
+CONTENT_DIR = "artifacts"
+_HASH_CHUNK_SIZE = 1 << 20
+
+
+@dataclass(frozen=True)
+class PublishedArtifacts:
+    # artifact name -> SHA-256 of its content
+    hashes: dict[str, str]
+    changed: frozenset[str]
+
+    def content_path(self, name: str) -> Path:
+        """Path of the content addressed copy of the artifact relative to the output directory."""
+        return Path(CONTENT_DIR) / content_name(name, self.hashes[name])
+
+
+def content_hash(file: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def content_name(name: str, sha256: str) -> str:
+    """database.csv -> database.<first 16 hex digits of the hash>.csv"""
+    stem, dot, suffix = name.partition(".")
+    return f"{stem}.{sha256[:16]}{dot}{suffix}"
+
+
+def publish_artifacts(staging_dir: Path, output_dir: Path) -> PublishedArtifacts:
+    """
+    Move the build artifacts of ``staging_dir`` into ``output_dir`` unless the same content is already there.
+
+    An artifact whose content hash equals the one of the published file isn't written at all, so its modification
+    time only changes with its content and consumers keyed by mtime or hash skip it. Changed artifacts are swapped
+    in with ``os.replace`` and also copied to ``artifacts/<name>.<hash>.<suffix>``, a copy which never changes
+    and can be cached forever. ``artifacts.json`` maps every artifact to its hash and content addressed copy.
+    Artifacts of the previous manifest which the build didn't stage, and copies which are no longer referenced,
+    are removed.
+    """
+    content_dir = output_dir / CONTENT_DIR
+    content_dir.mkdir(parents=True, exist_ok=True)
+    manifest_file = output_dir / ARTIFACT_MANIFEST_FILE
+    previous_names = set(json.loads(manifest_file.read_text(encoding="utf-8"))) if manifest_file.exists() else set()
+    hashes: dict[str, str] = {}
+    changed = set()
+    for staged in sorted(staging_dir.iterdir()):
+        name = staged.name
+        hashes[name] = content_hash(staged)
+        published = output_dir / name
+        content_copy = content_dir / content_name(name, hashes[name])
+        if not content_copy.exists():
+            tmp_copy = content_dir / f".{content_copy.name}.tmp"
+            shutil.copyfile(staged, tmp_copy)
+            os.replace(tmp_copy, content_copy)
+        if published.exists() and content_hash(published) == hashes[name]:
+            continue
+        os.replace(staged, published)
+        changed.add(name)
+
+    for stale_name in sorted(previous_names - hashes.keys()):
+        logger.info(f"Removing {stale_name} which the build no longer writes")
+        (output_dir / stale_name).unlink(missing_ok=True)
+
+    referenced = {content_name(name, sha256) for name, sha256 in hashes.items()}
+    for stale in content_dir.iterdir():
+        if stale.name not in referenced and not stale.name.startswith("."):
+            stale.unlink()
+
+    artifacts = PublishedArtifacts(hashes, frozenset(changed))
+    manifest = {
+        name: {"sha256": sha256, "bytes": (output_dir / name).stat().st_size, "path": str(artifacts.content_path(name))}
+        for name, sha256 in hashes.items()
+    }
+    manifest_text = json.dumps(manifest, indent=2, sort_keys=True) + "\n"
+    if not manifest_file.exists() or manifest_file.read_text(encoding="utf-8") != manifest_text:
+        tmp_file = manifest_file.with_name(f".{ARTIFACT_MANIFEST_FILE}.tmp")
+        tmp_file.write_text(manifest_text, encoding="utf-8")
+        os.replace(tmp_file, manifest_file)
+    logger.info(f"{len(changed)} of {len(hashes)} build artifacts changed: {', '.join(sorted(changed)) or 'none'}")
+    return artifacts
@@ -1,5 +1,9 @@
 import configparser
+import csv
 import logging
+import shutil
+import tempfile
+from collections.abc import Callable, Iterator
 from os import listdir
 from pathlib import Path
 from typing import Any
@@ -7,71 +11,166 @@ from typing import Any
 import duckdb
 from _duckdb import DuckDBPyConnection
 
+import bike_geometry_comparator.database.carryover as geometry_carryover
 import bike_geometry_comparator.database.core as geometry_db
+import bike_geometry_comparator.database.custom_metrics as geometry_custom_metrics
+import bike_geometry_comparator.database.derivations as geometry_derivations
+import bike_geometry_comparator.database.facets as geometry_facets
+import bike_geometry_comparator.database.families as geometry_families
+import bike_geometry_comparator.database.metrics as geometry_metrics
+import bike_geometry_comparator.database.parsing as geometry_parsing
+import bike_geometry_comparator.database.search_index as geometry_search_index
+import bike_geometry_comparator.database.sizes as geometry_sizes
+from bike_geometry_comparator.artifacts import PublishedArtifacts, publish_artifacts
+from bike_geometry_comparator.similarity import SIMILAR_FRAMES_FILE, SimilarFramesOptions, build_similar_frames
 
 logger = logging.getLogger(__name__)
 
 
-def _generate_datasource_queries(
-    directory: Path, parent_defaults: dict[str, Any], parent_mappings: dict[str, str]
-) -> list[str]:
-    metric_defaults = parent_defaults | (read_ini(directory / "defaults.ini") or {})
-    metric_mappings = parent_mappings | (read_ini(directory / "metric_mappings.ini") or {})
+def read_ini(file: Path) -> dict[str, str] | None:
+    if not file.exists():
+        return None
+    config = configparser.ConfigParser(allow_unnamed_section=True)
+    config.read(file, encoding="utf-8")
+    return {key: value for key, value in config.items(configparser.UNNAMED_SECTION)}
+
+
+def find_datasources(
+    directory: Path,
+    parent_defaults: dict[str, Any],
+    parent_mappings: dict[str, str],
+    ini_reader: Callable[[Path], dict[str, str] | None] = read_ini,
+) -> Iterator[tuple[Path, dict[str, Any], dict[str, str]]]:
+    """Yield every ``geometry.csv`` under the directory with the defaults and mappings its directories inherit."""
+    metric_defaults = parent_defaults | (ini_reader(directory / "defaults.ini") or {})
+    metric_mappings = parent_mappings | (ini_reader(directory / "metric_mappings.ini") or {})
 
     geometry_data = directory / "geometry.csv"
     if geometry_data.exists():
-        metric_list = "*"
-        if metric_mappings:
-            exclude_list = [k for (k, v) in metric_mappings.items() if v == "-"]
-            renamed_metrics = [
-                f"{original} as {unified}" for (original, unified) in metric_mappings.items() if unified != "-"
-            ]
-
-            exclude_clause = f"EXCLUDE ({', '.join(exclude_list)})" if exclude_list else ""
-            rename_clause = f"RENAME ({', '.join(renamed_metrics)})" if renamed_metrics else ""
-            metric_list = f"* {exclude_clause} {rename_clause}"
-        return [
-            f"(SELECT {metric_list}, {', '.join([f"'{str(v)}' as {k}" for k, v in metric_defaults.items()])} FROM '{geometry_data}')"
-        ]
+        yield geometry_data, metric_defaults, metric_mappings
     else:
-        child_queries = []
-        for file in listdir(directory):
+        # sorted, so rows are inserted in the same order on every file system
+        for file in sorted(listdir(directory)):
             child = directory / file
             if child.is_dir():
-                child_queries += _generate_datasource_queries(child, metric_defaults, metric_mappings)
-        return child_queries
+                yield from find_datasources(child, metric_defaults, metric_mappings, ini_reader)
 
 
-def read_ini(file: Path) -> dict[str, str] | None:
-    if not file.exists():
-        return None
-    config = configparser.ConfigParser(allow_unnamed_section=True)
-    config.read(file, encoding="utf-8")
-    return {key: value for key, value in config.items(configparser.UNNAMED_SECTION)}
+def datasource_query(geometry_data: Path, metric_defaults: dict[str, Any], metric_mappings: dict[str, str]) -> str:
+    try:
+        projection = geometry_metrics.generate_metric_projection(
+            _read_csv_header(geometry_data), metric_defaults.get("brand"), frozenset(metric_mappings.items())
+        )
+    except ValueError as ex:
+        ex.add_note(f"Cannot map metrics of {geometry_data}, add them to metric_mappings.ini")
+        raise
+    if projection.unknown:
+        logger.info(f"Unknown metrics of {geometry_data} are kept as custom metrics: {', '.join(projection.unknown)}")
+    metric_list = projection.select_list
+    return f"(SELECT {metric_list}, {', '.join([f"'{str(v)}' as {k}" for k, v in metric_defaults.items()])} FROM '{geometry_data}')"
+
 
+def _generate_datasource_queries(
+    directory: Path, parent_defaults: dict[str, Any], parent_mappings: dict[str, str]
+) -> list[str]:
+    return [
+        datasource_query(*datasource) for datasource in find_datasources(directory, parent_defaults, parent_mappings)
+    ]
 
-def assemble_geometry_database(input_dir: Path, output_file: Path):
+
+def _read_csv_header(file: Path) -> tuple[str, ...]:
+    with open(file, newline="", encoding="utf-8") as f:
+        return tuple(next(csv.reader(f), []))
+
+
+def assemble_geometry_database(
+    input_dir: Path,
+    output_file: Path,
+    frame_blocks: bool = False,
+    similar_frames: SimilarFramesOptions | None = None,
+) -> PublishedArtifacts:
     with duckdb.connect() as con:
-        assembler = _DatabaseFileAssembler(con, input_dir, output_file)
-        assembler.assemble()
+        datasource_queries = _generate_datasource_queries(input_dir, {}, {})
+        return assemble_datasources(con, datasource_queries, output_file, frame_blocks, similar_frames)
+
+
+def assemble_datasources(
+    con: DuckDBPyConnection,
+    datasource_queries: list[str],
+    output_file: Path,
+    frame_blocks: bool = False,
+    similar_frames: SimilarFramesOptions | None = None,
+) -> PublishedArtifacts:
+    """
+    Assemble the database file and the build artifacts next to it from the rows of the datasource queries.
+
+    The frame blocks of :func:`~bike_geometry_comparator.database.carryover.write_frame_blocks` hold the same data
+    as the database file which clients read, so they are only written with ``frame_blocks``. The similar frames of
+    :func:`~bike_geometry_comparator.similarity.build_similar_frames` are computed with ``similar_frames``, updating
+    the published ones incrementally.
+
+    Artifacts are written into a temporary directory first and published by :func:`publish_artifacts`, which leaves
+    unchanged ones untouched. Rows and columns of every artifact are in a fixed order, so the same data builds
+    byte-identical files.
+    """
+    output_dir = Path(output_file).parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=output_dir, prefix=".assembly-") as staging_dir:
+        staged_file = Path(staging_dir) / Path(output_file).name
+        _DatabaseFileAssembler(con, datasource_queries, staged_file, frame_blocks).assemble()
+        if similar_frames:
+            staged_neighbors = Path(staging_dir) / SIMILAR_FRAMES_FILE
+            if (output_dir / SIMILAR_FRAMES_FILE).exists():
+                shutil.copyfile(output_dir / SIMILAR_FRAMES_FILE, staged_neighbors)
+            build_similar_frames(staged_file, staged_neighbors, similar_frames.k, similar_frames.jobs)
+        return publish_artifacts(Path(staging_dir), output_dir)
 
 
 class _DatabaseFileAssembler:
-    def __init__(self, con: DuckDBPyConnection, input_dir: Path, output_file: Path) -> None:
+    def __init__(
+        self, con: DuckDBPyConnection, datasource_queries: list[str], output_file: Path, frame_blocks: bool
+    ) -> None:
         self._con = con
-        self._input_dir = input_dir
-        self._output_file = output_file
+        self._datasource_queries = datasource_queries
+        self._output_file = Path(output_file)
+        self._frame_blocks = frame_blocks
 
     def assemble(self):
+        # a warm connection keeps the table of the previous assembly
+        self._con.execute("DROP TABLE IF EXISTS bike_geometry")
         geometry_db.init_geometry_database(self._con)
         self._populate_geometry_database()
+        geometry_parsing.parse_text_metrics(self._con)
+        self._derive_metrics()
+        self._index_sizes()
+        self._hash_frames()
+        geometry_families.build_geometry_families(self._con)
+        self._write_database_file()
+        if self._frame_blocks:
+            geometry_carryover.write_frame_blocks(self._con, self._output_file.parent)
+        geometry_families.write_geometry_families(self._con, self._output_file.parent)
+        geometry_custom_metrics.write_custom_metrics(self._con, self._output_file.parent)
+        geometry_search_index.write_search_index(self._con, self._output_file.parent)
+        geometry_facets.write_facet_cube(self._con, self._output_file.parent)
 
     def _populate_geometry_database(self) -> None:
-        datasource_queries: list[str] = _generate_datasource_queries(self._input_dir, {}, {})
-        logger.debug(f"Terminal queries per datasource:\n{'\n'.join(datasource_queries)}")
-        for datasource_query in datasource_queries:
-            geometry_db.insert_bike_geometry(self._con, datasource_query)
+        logger.debug(f"Terminal queries per datasource:\n{'\n'.join(self._datasource_queries)}")
+        for query in self._datasource_queries:
+            geometry_db.insert_bike_geometry(self._con, query)
+
+    def _derive_metrics(self) -> None:
+        geometry_derivations.report_derivation_conflicts(self._con)
+        geometry_derivations.derive_missing_metrics(self._con)
+
+    def _index_sizes(self) -> None:
+        geometry_sizes.build_size_index(self._con)
+        geometry_sizes.report_size_anomalies(self._con)
+
+    def _hash_frames(self) -> None:
+        geometry_carryover.build_frame_hashes(self._con)
+        geometry_carryover.report_carried_over_frames(self._con)
 
+    def _write_database_file(self) -> None:
         database_assembly_terminal_query = geometry_db.generate_fetch_all_sql_query(self._con)
         logger.debug(f"Terminal query to assemble database:\n{database_assembly_terminal_query}")
         self._con.sql(database_assembly_terminal_query).write_csv(str(self._output_file))
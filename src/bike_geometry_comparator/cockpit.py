@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.custom_metrics import custom_metric_query
+from bike_geometry_comparator.database.metrics import KEY_COLUMNS
+from bike_geometry_comparator.query_cache import QueryCache, default_query_cache
+
+# Distance between the top of the head tube and the steerer clamp center of a typical stem: headset top cap
+# plus half of the 40 mm stem clamp
+STEM_CLAMP_OFFSET = 28
+HANDLEBAR_TOLERANCE = 10
+# custom metrics of the stock cockpit, kept by the build where the source lists them
+STOCK_SPACERS_METRIC = "spacer_in_mm"
+STOCK_STEM_ANGLE_METRIC = "angle_stem"
+
+
+@dataclass(frozen=True)
+class HandlebarTarget:
+    """Target handlebar clamp position in mm: stack and reach relative to the bottom bracket."""
+
+    stack: int
+    reach: int
+    tolerance: float = HANDLEBAR_TOLERANCE
+
+
+@dataclass(frozen=True)
+class CockpitOptions:
+    """Grid of cockpit setups every frame is tried with: stem lengths in mm, stem angles in degrees, spacers in mm."""
+
+    stem_lengths: tuple[int, ...] = tuple(range(60, 141, 10))
+    stem_angles: tuple[int, ...] = (-17, -10, -6, 0, 6, 10, 17)
+    spacers: tuple[int, ...] = tuple(range(0, 41, 5))
+
+
+DEFAULT_COCKPIT_OPTIONS = CockpitOptions()
+
+
+@dataclass(frozen=True)
+class CockpitSolution:
+    brand: str
+    model: str
+    year: int | None
+    size: str
+    stack: int
+    reach: int
+    stock_stem_length: int | None
+    stock_stem_angle: float | None
+    stock_spacers: float | None
+    stem_length: int
+    stem_angle: int
+    spacers: int
+    handlebar_stack: float
+    handlebar_reach: float
+    distance: float
+    # envelope of handlebar positions reachable with the option grid
+    min_handlebar_stack: float
+    max_handlebar_stack: float
+    min_handlebar_reach: float
+    max_handlebar_reach: float
+
+
+def handlebar_position_sql(stem_length: str, stem_angle: str, spacers: str) -> tuple[str, str]:
+    """
+    SQL expressions of the handlebar clamp (stack, reach) for a frame row and a cockpit setup.
+
+    The stem clamps the steerer ``spacers`` plus :data:`STEM_CLAMP_OFFSET` above the head tube, along the head tube
+    axis. A stem angle of 0 is perpendicular to the steerer, positive angles rise, so a -17 degrees stem is level on
+    a 73 degrees head tube.
+    """
+    steerer = f"({spacers} + {STEM_CLAMP_OFFSET})"
+    stem_direction = f"radians(head_tube_angle - {stem_angle})"
+    return (
+        f"stack + {steerer} * sin(radians(head_tube_angle)) + {stem_length} * cos({stem_direction})",
+        f"reach - {steerer} * cos(radians(head_tube_angle)) + {stem_length} * sin({stem_direction})",
+    )
+
+
+def solve_cockpit(
+    database_file: Path,
+    target: HandlebarTarget,
+    options: CockpitOptions = DEFAULT_COCKPIT_OPTIONS,
+    limit: int | None = None,
+    cache: QueryCache = default_query_cache,
+    con: DuckDBPyConnection | None = None,
+) -> list[CockpitSolution]:
+    """
+    Find the frames of every (brand, model, year) which put the handlebar within the target tolerance.
+
+    Every size of the catalog is combined with every setup of ``options`` in a single query. Sizes whose stock spacer
+    stack is known are only tried with up to that many spacers, the steerer is cut to it. A size qualifies when one
+    of its setups is closer to the target than its tolerance, the closest setup is chosen, ties are broken by
+    the smallest change of the stock stem length and angle and the fewest spacers. Only the closest size of every
+    model year is returned, ordered by distance. Results are cached per database build, target and options. With
+    ``con`` the ``bike_geometry`` table already loaded from ``database_file`` into it is queried instead of the file.
+    """
+    solutions = cache.get_or_compute(
+        database_file,
+        ("solve_cockpit", target, options),
+        lambda: _solve_cockpit(database_file, target, options, con),
+    )
+    return list(solutions[:limit])
+
+
+def _solve_cockpit(
+    database_file: Path, target: HandlebarTarget, options: CockpitOptions, con: DuckDBPyConnection | None
+) -> tuple[CockpitSolution, ...]:
+    (handlebar_stack, handlebar_reach) = handlebar_position_sql("l.stem_length", "a.stem_angle", "s.spacers")
+    source = f"'{database_file}'" if con is None else "bike_geometry"
+    con = con or duckdb.default_connection()
+    stock_joins = "\n".join(
+        f"""    LEFT JOIN ({custom_metric_query(database_file.parent, metric)}) {alias}
+           ON {" AND ".join(f"{alias}.{column} IS NOT DISTINCT FROM g.{column}" for column in KEY_COLUMNS)}"""
+        for alias, metric in (("sp", STOCK_SPACERS_METRIC), ("sa", STOCK_STEM_ANGLE_METRIC))
+    )
+    # option grids are integers, they are inlined as list literals
+    rows = con.execute(
+        f"""
+WITH frames AS (
+    SELECT g.*,
+           coalesce(g.stem_length, g.cockpit_stem_length) AS stock_stem_length,
+           -- custom metrics are source text, some with a decimal comma
+           TRY_CAST(replace(sa.value, ',', '.') AS DOUBLE) AS stock_stem_angle,
+           TRY_CAST(replace(sp.value, ',', '.') AS DOUBLE) AS stock_spacers
+    FROM {source} g
+{stock_joins}
+    WHERE head_tube_angle IS NOT NULL
+),
+setups AS (
+    SELECT brand, model, year, size, size_rank, stack, reach, stock_stem_length, stock_stem_angle, stock_spacers,
+           l.stem_length, a.stem_angle, s.spacers,
+           {handlebar_stack} AS handlebar_stack,
+           {handlebar_reach} AS handlebar_reach
+    FROM frames g,
+         (SELECT unnest({list(options.stem_lengths)}) AS stem_length) l,
+         (SELECT unnest({list(options.stem_angles)}) AS stem_angle) a,
+         (SELECT unnest({list(options.spacers)}) AS spacers) s
+    WHERE s.spacers <= coalesce(stock_spacers, s.spacers)
+),
+envelopes AS (
+    SELECT brand, model, year, size,
+           min(handlebar_stack) AS min_handlebar_stack, max(handlebar_stack) AS max_handlebar_stack,
+           min(handlebar_reach) AS min_handlebar_reach, max(handlebar_reach) AS max_handlebar_reach
+    FROM setups
+    GROUP BY brand, model, year, size
+)
+SELECT h.brand, h.model, h.year, h.size, stack, reach, stock_stem_length, stock_stem_angle, stock_spacers,
+       stem_length, stem_angle, spacers,
+       round(handlebar_stack, 1), round(handlebar_reach, 1), round(distance, 1),
+       round(min_handlebar_stack, 1), round(max_handlebar_stack, 1),
+       round(min_handlebar_reach, 1), round(max_handlebar_reach, 1)
+FROM (SELECT *, sqrt(pow(handlebar_stack - $stack, 2) + pow(handlebar_reach - $reach, 2)) AS distance
+      FROM setups
+      WHERE distance <= $tolerance
+      QUALIFY row_number() OVER (
+                  PARTITION BY brand, model, year
+                  ORDER BY distance,
+                           abs(stem_length - coalesce(stock_stem_length, stem_length)),
+                           abs(stem_angle - coalesce(stock_stem_angle, stem_angle)),
+                           spacers,
+                           size_rank
+              ) = 1) h
+JOIN envelopes e ON h.brand = e.brand AND h.model = e.model AND h.year IS NOT DISTINCT FROM e.year AND h.size = e.size
+ORDER BY distance, h.brand, h.model, h.year""",
+        {"stack": target.stack, "reach": target.reach, "tolerance": target.tolerance},
+    ).fetchall()
+    return tuple(CockpitSolution(*row) for row in rows)
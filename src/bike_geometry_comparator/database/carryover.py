@@ -0,0 +1,89 @@
+import logging
+from pathlib import Path
+
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.metrics import CUSTOM_METRICS_COLUMN
+
+logger = logging.getLogger(__name__)
+
+# Columns describing the frame itself, components and rider ranges of the same frame often change between years
+FRAME_COLUMNS = (
+    "top_tube_length",
+    "seat_tube_length",
+    "seat_tube_angle",
+    "head_tube_angle",
+    "chainstay",
+    "fork_rake",
+    "wheelbase",
+    "trail",
+    "bb_drop",
+    "front_center_distance",
+    "head_tube_length",
+    "stack",
+    "reach",
+    "standover_height",
+    "fork_axle_to_crown",
+)
+
+GEOMETRY_BLOCKS_FILE = "geometry_blocks.csv"
+YEAR_REFERENCES_FILE = "year_references.csv"
+
+
+def build_frame_hashes(con: DuckDBPyConnection) -> None:
+    """
+    Populate ``bike_geometry.frame_hash`` with the content hash of the frame geometry of every (brand, model, year).
+
+    The hash covers the size labels and :data:`FRAME_COLUMNS` of all sizes, so model years sharing a hash carry over
+    the same frame and can be grouped as "same frame, different years".
+    """
+    frame = ", ".join(f"{column} := {column}" for column in ("size", *FRAME_COLUMNS))
+    con.execute(f"""
+UPDATE bike_geometry
+SET frame_hash = frames.frame_hash
+FROM (SELECT brand, model, year, md5(string_agg(size_hash, ',' ORDER BY size_hash)) AS frame_hash
+      FROM (SELECT brand, model, year, md5(to_json(struct_pack({frame}))) AS size_hash FROM bike_geometry)
+      GROUP BY brand, model, year) frames
+WHERE bike_geometry.brand = frames.brand
+  AND bike_geometry.model = frames.model
+  AND bike_geometry.year = frames.year""")
+
+
+def find_carried_over_frames(con: DuckDBPyConnection) -> list[tuple[str, str, list[int]]]:
+    """(brand, model, years) of frames which are repeated in several years of a model."""
+    return con.execute("""
+SELECT brand, model, list(DISTINCT year ORDER BY year) AS years
+FROM bike_geometry
+GROUP BY brand, model, frame_hash
+HAVING count(DISTINCT year) > 1
+ORDER BY brand, model, years""").fetchall()
+
+
+def write_frame_blocks(con: DuckDBPyConnection, output_dir: Path) -> None:
+    """
+    Write the deduplicated form of the database next to it.
+
+    ``geometry_blocks.csv`` stores the frame geometry of every distinct frame hash once, ``year_references.csv``
+    stores the remaining per-year columns of every size with the hash of its frame block, except the
+    ``custom_metrics`` column: custom metrics are kept in ``custom_metrics.csv``. Joining both on (frame_hash, size)
+    restores every other column of the database.
+    """
+    con.execute(f"""
+COPY (SELECT DISTINCT ON (frame_hash, size) frame_hash, size, {", ".join(FRAME_COLUMNS)}
+      FROM bike_geometry
+      ORDER BY frame_hash, size)
+TO '{output_dir / GEOMETRY_BLOCKS_FILE}' (HEADER)""")
+    con.execute(f"""
+COPY (SELECT * EXCLUDE ({", ".join(FRAME_COLUMNS)}, {CUSTOM_METRICS_COLUMN}) REPLACE (nullif(year, -1) AS year)
+      FROM bike_geometry
+      ORDER BY brand, model, year, size_rank)
+TO '{output_dir / YEAR_REFERENCES_FILE}' (HEADER)""")
+
+
+def report_carried_over_frames(con: DuckDBPyConnection) -> None:
+    for brand, model, years in find_carried_over_frames(con):
+        logger.info(f"{brand} {model} carries over the same frame in {', '.join(map(str, years))}")
+    (model_years, frames, rows, blocks) = con.execute("""
+SELECT count(DISTINCT (brand, model, year)), count(DISTINCT frame_hash), count(*), count(DISTINCT (frame_hash, size))
+FROM bike_geometry""").fetchone() or (0, 0, 0, 0)
+    logger.info(f"{model_years} model years share {frames} distinct frames, {blocks} frame rows of {rows} are stored")
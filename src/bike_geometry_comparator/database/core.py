@@ -1,10 +1,12 @@
 import logging
 from importlib.resources import read_text
-from typing import Any
+from pathlib import Path
 
+import duckdb
 from _duckdb import ConstraintException, DuckDBPyConnection
 
-from bike_geometry_comparator.db_utils import fetchall_strings
+from bike_geometry_comparator.database.metrics import CUSTOM_METRICS_COLUMN
+from bike_geometry_comparator.db_utils import Row, fetch_rows, fetchall_strings
 
 
 def init_geometry_database(con: DuckDBPyConnection) -> None:
@@ -12,6 +14,29 @@ def init_geometry_database(con: DuckDBPyConnection) -> None:
     con.sql(schema_sql)
 
 
+def schema_column_types() -> dict[str, str]:
+    """Column name -> DuckDB type of ``bike_geometry`` as declared in ``schema.sql``."""
+    with duckdb.connect() as con:
+        init_geometry_database(con)
+        return dict(
+            con.execute(
+                "SELECT column_name, data_type FROM information_schema.columns "
+                "WHERE table_name = 'bike_geometry' ORDER BY ordinal_position"
+            ).fetchall()
+        )
+
+
+def create_database_view(con: DuckDBPyConnection, database_file: Path, name: str = "bike_geometry") -> None:
+    """
+    View ``name`` over the database file with the column types of ``schema.sql``.
+
+    Columns added by the build, which aren't in the schema, keep the types detected by ``read_csv``.
+    """
+    header = fetchall_strings(f"SELECT column_name FROM (DESCRIBE FROM '{database_file}')", con)
+    types = {column: column_type for column, column_type in schema_column_types().items() if column in header}
+    con.execute(f"CREATE VIEW {name} AS FROM read_csv('{database_file}', header = true, types = {types})")
+
+
 def insert_bike_geometry(con: DuckDBPyConnection, datasource_query: str) -> None:
     columns = con.execute(f"SELECT column_name FROM (DESCRIBE {datasource_query})").fetchall()
     insert_sql = f"""
@@ -40,15 +65,13 @@ WHERE table_name = 'bike_geometry'
             for column in columns_with_artificial_default
         ]
     )
-    database_assembly_terminal_query = f"""SELECT * 
+    # rows in primary key order with sizes in their natural order, insertion order differs between builds
+    database_assembly_terminal_query = f"""SELECT * EXCLUDE ({CUSTOM_METRICS_COLUMN})
 REPLACE ({artificial_default_replacements})
-FROM bike_geometry"""
+FROM bike_geometry
+ORDER BY brand, model, year, size_rank, size"""
     return database_assembly_terminal_query
 
 
-def fetchall_with_columns(conn, sql) -> list[dict[str, Any]]:
-    with conn.cursor() as cur:
-        cur.execute(sql)
-        columns = [desc[0] for desc in cur.description] if cur.description else []
-        rows = cur.fetchall()
-        return [dict(zip(columns, row)) for row in rows]
+def fetchall_with_columns(conn, sql) -> list[Row]:
+    return fetch_rows(sql, conn)
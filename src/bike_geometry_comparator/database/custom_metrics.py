@@ -0,0 +1,42 @@
+from pathlib import Path
+
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.metrics import CUSTOM_METRICS_COLUMN, KEY_COLUMNS
+
+CUSTOM_METRICS_FILE = "custom_metrics.csv"
+METRIC_CATALOG_FILE = "metric_catalog.csv"
+
+
+def write_custom_metrics(con: DuckDBPyConnection, output_dir: Path) -> None:
+    """
+    Write custom metrics of ``bike_geometry`` as a sparse long table with a dictionary of metric names.
+
+    ``metric_catalog.csv`` assigns every metric name an id and counts its sizes and models,
+    ``custom_metrics.csv`` holds one (brand, model, year, size, metric_id, value) row per present value. Rows are
+    sorted by metric id, so a query of a single metric reads a contiguous range of the table.
+    """
+    con.execute(f"""
+CREATE OR REPLACE TEMP TABLE custom_metric_values AS
+SELECT brand, model, nullif(year, -1) AS year, size, entry.key AS metric, entry.value
+FROM (SELECT {", ".join(KEY_COLUMNS)}, unnest(map_entries({CUSTOM_METRICS_COLUMN})) AS entry FROM bike_geometry)""")
+    con.execute("""
+CREATE OR REPLACE TEMP TABLE metric_catalog AS
+SELECT row_number() OVER (ORDER BY metric) AS metric_id, metric,
+       count(*) AS sizes, count(DISTINCT (brand, model)) AS models
+FROM custom_metric_values
+GROUP BY metric""")
+    con.execute(f"COPY (FROM metric_catalog ORDER BY metric_id) TO '{output_dir / METRIC_CATALOG_FILE}' (HEADER)")
+    con.execute(f"""
+COPY (SELECT {", ".join(f"v.{column}" for column in KEY_COLUMNS)}, c.metric_id, v.value
+      FROM custom_metric_values v JOIN metric_catalog c USING (metric)
+      ORDER BY c.metric_id, {", ".join(f"v.{column}" for column in KEY_COLUMNS)})
+TO '{output_dir / CUSTOM_METRICS_FILE}' (HEADER)""")
+
+
+def custom_metric_query(output_dir: Path, metric: str) -> str:
+    """SQL selecting (brand, model, year, size, value) of a custom metric from files written by the build."""
+    catalog = output_dir / METRIC_CATALOG_FILE
+    return f"""SELECT {", ".join(KEY_COLUMNS)}, value
+FROM '{output_dir / CUSTOM_METRICS_FILE}'
+WHERE metric_id = (SELECT metric_id FROM '{catalog}' WHERE metric = '{metric.replace("'", "''")}')"""
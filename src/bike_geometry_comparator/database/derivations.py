@@ -0,0 +1,118 @@
+import logging
+
+from _duckdb import DuckDBPyConnection
+
+logger = logging.getLogger(__name__)
+
+# Radius of the wheel with a typical tyre in mm: rim bead seat radius plus tyre height (28 mm road, 55 mm MTB)
+WHEEL_RADII_MM = {"700c": 339, '28"': 339, '29"': 366, '27.5"': 347, "650b": 347, '26"': 335}
+
+# horizontal distance between the bottom bracket and the rear axle, greatest() would skip a NULL bb_drop
+_REAR_CENTER = "CASE WHEN bb_drop < chainstay THEN sqrt(chainstay ** 2 - bb_drop ** 2) END"
+# metric -> closed-form derivation from other metrics of the same row, NULL when any input is missing or the inputs
+# can't belong to one frame (a wheelbase of "1.006" read as 1 mm)
+DERIVATIONS = {
+    "trail": "(wheel_radius * cos(radians(head_tube_angle)) - fork_rake) / sin(radians(head_tube_angle))",
+    "fork_rake": "wheel_radius * cos(radians(head_tube_angle)) - trail * sin(radians(head_tube_angle))",
+    "front_center_distance": f"nullif(greatest(wheelbase - {_REAR_CENTER}, 0), 0)",
+    "wheelbase": f"front_center_distance + {_REAR_CENTER}",
+    "top_tube_length": "reach + stack / tan(radians(seat_tube_angle))",
+    "seat_tube_angle": "degrees(atan2(stack, top_tube_length - reach))",
+}
+# metric -> condition of measured values which can't belong to a frame, they are reported and not derived from
+IMPLAUSIBLE_METRICS = {
+    "wheelbase": f"wheelbase <= {_REAR_CENTER}",
+}
+# Largest difference between a derived and a measured value in mm which is still considered the same value.
+# Derivations come in inverse pairs, checking one metric of a pair covers both. Trail depends on the typical tyre,
+# manufacturers measure top tube at different heights and some front center along the line from bottom bracket.
+TOLERANCES = {
+    "trail": 8,
+    "front_center_distance": 10,
+    "top_tube_length": 15,
+}
+
+
+def _derivation_source() -> str:
+    radii = " ".join(f"WHEN '{size}' THEN {radius}" for size, radius in WHEEL_RADII_MM.items())
+    derived = ", ".join(f"{expression} AS {metric}" for metric, expression in DERIVATIONS.items())
+    return f"""SELECT brand, model, year, size, {derived}
+FROM (SELECT *, CASE trim(split_part(wheel_size, '/', 1)) {radii} END AS wheel_radius FROM bike_geometry)"""
+
+
+def derive_missing_metrics(con: DuckDBPyConnection) -> None:
+    """
+    Fill NULL metrics of ``bike_geometry`` which follow from the measured ones by :data:`DERIVATIONS`.
+
+    All derivations are computed from measured values only, in a single UPDATE over the whole table. Names of the
+    filled metrics are stored in ``derived_metrics``, so derived values can be told from measured ones.
+    """
+    metrics = list(DERIVATIONS)
+    assignments = [f"{metric} = coalesce(bike_geometry.{metric}, derived.{metric})" for metric in metrics]
+    filled = ", ".join(
+        f"CASE WHEN bike_geometry.{metric} IS NULL AND derived.{metric} IS NOT NULL THEN '{metric}' END"
+        for metric in metrics
+    )
+    assignments.append(f"derived_metrics = nullif(concat_ws(',', {filled}), '')")
+    con.execute(f"""
+UPDATE bike_geometry
+SET {",\n    ".join(assignments)}
+FROM ({_derivation_source()}) derived
+WHERE bike_geometry.brand = derived.brand
+  AND bike_geometry.model = derived.model
+  AND bike_geometry.year = derived.year
+  AND bike_geometry.size = derived.size""")
+    (rows, values) = con.execute(
+        "SELECT count(*), coalesce(sum(len(string_split(derived_metrics, ','))), 0) "
+        "FROM bike_geometry WHERE derived_metrics IS NOT NULL"
+    ).fetchone() or (0, 0)
+    logger.info(f"Derived {values} missing metric values of {rows} rows")
+
+
+def find_derivation_conflicts(con: DuckDBPyConnection) -> list[tuple[str, str, int | None, str, int, float]]:
+    """
+    Find measured metrics which disagree with their derivation from other measured metrics.
+
+    Must run before :func:`derive_missing_metrics`. Returns (brand, model, year, metric, sizes, max difference)
+    for every run of sizes with at least one difference above :data:`TOLERANCES`.
+    """
+    differences = " UNION ALL ".join(
+        f"SELECT brand, model, year, '{metric}' AS metric, abs(g.{metric} - d.{metric}) AS difference "
+        f"FROM bike_geometry g JOIN derived d USING (brand, model, year, size) "
+        f"WHERE abs(g.{metric} - d.{metric}) > {tolerance}"
+        for metric, tolerance in TOLERANCES.items()
+    )
+    return con.execute(f"""
+WITH derived AS ({_derivation_source()})
+SELECT brand, model, nullif(year, -1) AS year, metric, count(*) AS sizes, round(max(difference), 1) AS max_difference
+FROM ({differences})
+GROUP BY brand, model, year, metric
+ORDER BY brand, model, year, metric""").fetchall()
+
+
+def find_implausible_metrics(con: DuckDBPyConnection) -> list[tuple[str, str, int | None, str, int]]:
+    """
+    Find measured metrics matching :data:`IMPLAUSIBLE_METRICS`, e.g. a wheelbase of "1.006" read as 1 mm.
+
+    Returns (brand, model, year, metric, sizes) for every run of sizes with at least one implausible value.
+    """
+    implausible = " UNION ALL ".join(
+        f"SELECT brand, model, year, '{metric}' AS metric FROM bike_geometry WHERE {condition}"
+        for metric, condition in IMPLAUSIBLE_METRICS.items()
+    )
+    return con.execute(f"""
+SELECT brand, model, nullif(year, -1) AS year, metric, count(*) AS sizes
+FROM ({implausible})
+GROUP BY brand, model, year, metric
+ORDER BY brand, model, year, metric""").fetchall()
+
+
+def report_derivation_conflicts(con: DuckDBPyConnection) -> None:
+    for brand, model, year, metric, sizes in find_implausible_metrics(con):
+        model_year = f"{brand} {model} {year}" if year else f"{brand} {model}"
+        logger.warning(f"Measured {metric} of {model_year} is implausible in {sizes} sizes, check the source data")
+    for brand, model, year, metric, sizes, difference in find_derivation_conflicts(con):
+        model_year = f"{brand} {model} {year}" if year else f"{brand} {model}"
+        logger.warning(
+            f"Measured {metric} of {model_year} disagrees with the derived one in {sizes} sizes by up to {difference:g}"
+        )
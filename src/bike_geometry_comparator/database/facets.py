@@ -0,0 +1,82 @@
+from collections.abc import Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.families import FAMILY_PROTOTYPES
+
+FACET_CUBE_FILE = "facet_cube.csv"
+STACK_BAND = 20
+REACH_BAND = 10
+
+_DISCIPLINES = " ".join(f"WHEN {family_id} THEN '{name}'" for family_id, name in enumerate(FAMILY_PROTOTYPES, start=1))
+# facet -> SQL expression over database rows, bands are named by their lower bound in mm
+FACET_DIMENSIONS = {
+    "brand": "brand",
+    # the build table stores a missing year as -1, the database file as NULL
+    "year": "nullif(year, -1)",
+    "wheel_size": "wheel_size",
+    "size": "size",
+    "stack_band": f"stack // {STACK_BAND} * {STACK_BAND}",
+    "reach_band": f"reach // {REACH_BAND} * {REACH_BAND}",
+    "discipline": f"CASE family_id {_DISCIPLINES} END",
+}
+
+
+def facet_cube_query(source: str) -> str:
+    """
+    Query of the facet cube of the ``source`` rows: row counts for every combination of :data:`FACET_DIMENSIONS`.
+
+    The cube holds all 2^7 grouping sets, so the counts under any set of filters are in it. Dimensions a row of
+    the cube isn't grouped by are NULL and marked by the bits of ``grouping_id``, the first dimension is the highest
+    bit.
+    """
+    dimensions = ", ".join(f"{expression} AS {facet}" for facet, expression in FACET_DIMENSIONS.items())
+    return f"""
+SELECT {", ".join(FACET_DIMENSIONS)}, grouping_id({", ".join(FACET_DIMENSIONS)}) AS grouping_id, count(*) AS sizes
+FROM (SELECT {dimensions} FROM {source})
+GROUP BY CUBE ({", ".join(FACET_DIMENSIONS)})
+ORDER BY grouping_id, {", ".join(FACET_DIMENSIONS)}"""
+
+
+def write_facet_cube(con: DuckDBPyConnection, output_dir: Path) -> None:
+    con.execute(f"COPY ({facet_cube_query('bike_geometry')}) TO '{output_dir / FACET_CUBE_FILE}' (HEADER)")
+
+
+def _grouping_id(grouped: set[str]) -> int:
+    return sum(1 << position for position, facet in enumerate(reversed(FACET_DIMENSIONS)) if facet not in grouped)
+
+
+def facet_counts(
+    con: DuckDBPyConnection, cube: str, filters: Mapping[str, Sequence[Any]]
+) -> dict[str, list[tuple[Any, int]]]:
+    """
+    Counts of sizes for every value of every facet under the ``filters`` ({facet: accepted values}), read from ``cube``.
+
+    As usual in faceted navigation, counts of a facet apply the filters of the other facets only, so the values of
+    a filtered facet show what else can be selected. A row has a single value of every facet, so counts of several
+    accepted values are summed. Values are compared as text.
+    """
+    unknown = set(filters) - set(FACET_DIMENSIONS)
+    if unknown:
+        raise ValueError(f"Unknown facets {', '.join(sorted(unknown))}, facets are {', '.join(FACET_DIMENSIONS)}")
+
+    queries: list[str] = []
+    params: list[Any] = []
+    for facet in FACET_DIMENSIONS:
+        other_filters = {other: values for other, values in filters.items() if other != facet and values}
+        conditions = [f"grouping_id = {_grouping_id({facet, *other_filters})}"]
+        for other, values in other_filters.items():
+            conditions.append(f"{other}::VARCHAR IN ({', '.join('?' for _ in values)})")
+            params += [str(value) for value in values]
+        queries.append(f"""
+SELECT '{facet}' AS facet, {facet}::VARCHAR AS value, sum(sizes)::INTEGER AS sizes
+FROM {cube}
+WHERE {" AND ".join(conditions)}
+GROUP BY {facet}""")
+    counts: dict[str, list[tuple[Any, int]]] = {facet: [] for facet in FACET_DIMENSIONS}
+    rows = con.execute(f"{' UNION ALL '.join(queries)} ORDER BY facet, sizes DESC, value", params).fetchall()
+    for facet, value, sizes in rows:
+        counts[facet].append((value, sizes))
+    return counts
@@ -0,0 +1,127 @@
+import logging
+from pathlib import Path
+
+from _duckdb import DuckDBPyConnection
+
+logger = logging.getLogger(__name__)
+
+GEOMETRY_FAMILIES_FILE = "geometry_families.csv"
+
+# feature -> (SQL expression over bike_geometry, plausible range), values out of the range are broken data
+FAMILY_FEATURES = {
+    "stack_reach_ratio": ("stack / reach", 1.0, 2.0),
+    "head_tube_angle": ("head_tube_angle", 60, 78),
+    "seat_tube_angle": ("seat_tube_angle", 68, 82),
+    "wheelbase": ("wheelbase", 850, 1400),
+    "chainstay": ("chainstay", 380, 500),
+    "trail": ("trail", 30, 160),
+}
+# Typical medium size frame of every family, k-means starts from these centroids, so clustering is deterministic
+# and every cluster keeps the name of the family it started from
+FAMILY_PROTOTYPES = {
+    "time trial": (1.24, 72.5, 78.0, 1000, 405, 60),
+    "race": (1.42, 72.8, 73.5, 990, 408, 58),
+    "endurance": (1.52, 72.0, 73.5, 1010, 415, 60),
+    "gravel": (1.52, 71.0, 73.5, 1040, 425, 67),
+    "city": (1.65, 70.2, 73.5, 1095, 450, 75),
+    "cross country": (1.38, 67.5, 75.0, 1160, 430, 105),
+    "trail": (1.36, 64.5, 76.5, 1230, 437, 130),
+}
+MAX_ITERATIONS = 50
+
+
+def build_geometry_families(con: DuckDBPyConnection) -> None:
+    """
+    Cluster frames into geometry families and populate ``bike_geometry.family_id`` and ``family_distance``.
+
+    Frames are compared by :data:`FAMILY_FEATURES` scaled by their median absolute deviation. Distances are the root
+    mean square over the features a frame has, implausible values are ignored as missing ones.
+    Lloyd's k-means runs in DuckDB from :data:`FAMILY_PROTOTYPES` until no frame changes its family.
+    ``family_distance`` is the distance to the family centroid in normalized units.
+    """
+    features = list(FAMILY_FEATURES)
+    plausible = {
+        feature: f"CASE WHEN {expression} BETWEEN {low} AND {high} THEN {expression} END"
+        for feature, (expression, low, high) in FAMILY_FEATURES.items()
+    }
+    stats = ", ".join(
+        f"median({value}) AS {feature}_median, coalesce(nullif(mad({value}), 0), 1) AS {feature}_mad"
+        for feature, value in plausible.items()
+    )
+    con.execute(f"CREATE OR REPLACE TEMP TABLE family_feature_stats AS SELECT {stats} FROM bike_geometry")
+
+    def normalized(value: str, feature: str) -> str:
+        return f"({value} - {feature}_median) / {feature}_mad"
+
+    normalized_features = ", ".join(
+        f"{normalized(value, feature)} AS {feature}" for feature, value in plausible.items()
+    )
+    con.execute(f"""
+CREATE OR REPLACE TEMP TABLE family_features AS
+SELECT brand, model, year, size, {normalized_features}
+FROM bike_geometry, family_feature_stats""")
+
+    columns = ", ".join(f"{feature} DOUBLE" for feature in features)
+    con.execute(f"CREATE OR REPLACE TEMP TABLE family_centroids (family_id INTEGER, {columns})")
+    for family_id, prototype in enumerate(FAMILY_PROTOTYPES.values(), start=1):
+        values = ", ".join(normalized(str(value), feature) for feature, value in zip(features, prototype))
+        con.execute(f"INSERT INTO family_centroids SELECT {family_id}, {values} FROM family_feature_stats")
+
+    squares = " + ".join(f"coalesce((f.{feature} - c.{feature}) ** 2, 0)" for feature in features)
+    present = " + ".join(f"(f.{feature} IS NOT NULL)::INTEGER" for feature in features)
+    distance = f"sqrt(({squares}) / nullif({present}, 0))"
+    con.execute(
+        "CREATE OR REPLACE TEMP TABLE family_assignment "
+        "(brand TEXT, model TEXT, year INTEGER, size TEXT, family_id INTEGER, distance DOUBLE)"
+    )
+    for iteration in range(1, MAX_ITERATIONS + 1):
+        con.execute(f"""
+CREATE OR REPLACE TEMP TABLE next_family_assignment AS
+SELECT f.brand, f.model, f.year, f.size, c.family_id, {distance} AS distance
+FROM family_features f, family_centroids c
+QUALIFY row_number() OVER (
+    PARTITION BY f.brand, f.model, f.year, f.size ORDER BY distance NULLS LAST, c.family_id
+) = 1""")
+        (moved,) = con.execute("""
+SELECT count(*)
+FROM next_family_assignment n
+LEFT JOIN family_assignment a USING (brand, model, year, size)
+WHERE a.family_id IS DISTINCT FROM n.family_id""").fetchone() or (0,)
+        con.execute("CREATE OR REPLACE TEMP TABLE family_assignment AS FROM next_family_assignment")
+        if not moved:
+            break
+        # centroids are rounded to keep parallel floating point sums from changing results between runs,
+        # families which lost all frames keep their centroid
+        con.execute(f"""
+UPDATE family_centroids c
+SET {", ".join(f"{feature} = m.{feature}" for feature in features)}
+FROM (SELECT a.family_id, {", ".join(f"round(avg(f.{feature}), 9) AS {feature}" for feature in features)}
+      FROM family_assignment a JOIN family_features f USING (brand, model, year, size)
+      GROUP BY a.family_id) m
+WHERE c.family_id = m.family_id""")
+    logger.debug(f"Geometry families converged after {iteration} iterations")
+
+    con.execute("""
+UPDATE bike_geometry
+SET family_id = a.family_id, family_distance = round(a.distance, 4)
+FROM family_assignment a
+WHERE bike_geometry.brand = a.brand
+  AND bike_geometry.model = a.model
+  AND bike_geometry.year = a.year
+  AND bike_geometry.size = a.size""")
+
+
+def write_geometry_families(con: DuckDBPyConnection, output_dir: Path) -> None:
+    """Write the summary of every family: its name, numbers of sizes and models and the average raw features."""
+    names = ", ".join(f"({family_id}, '{name}')" for family_id, name in enumerate(FAMILY_PROTOTYPES, start=1))
+    averages = ", ".join(
+        f"round(avg(CASE WHEN {expression} BETWEEN {low} AND {high} THEN {expression} END), 2) AS {feature}"
+        for feature, (expression, low, high) in FAMILY_FEATURES.items()
+    )
+    con.execute(f"""
+COPY (SELECT family_id, family, count(*) AS sizes, count(DISTINCT (brand, model)) AS models,
+             round(avg(family_distance), 4) AS avg_distance, {averages}
+      FROM bike_geometry JOIN (VALUES {names}) families(family_id, family) USING (family_id)
+      GROUP BY family_id, family
+      ORDER BY family_id)
+TO '{output_dir / GEOMETRY_FAMILIES_FILE}' (HEADER)""")
@@ -0,0 +1,166 @@
+import configparser
+import re
+from dataclasses import dataclass
+from functools import cache
+from importlib.resources import read_text
+
+EXCLUDED = "-"
+KEY_COLUMNS = ("brand", "model", "year", "size")
+# MAP(VARCHAR, VARCHAR) column of bike_geometry with source columns which have no place in the schema
+CUSTOM_METRICS_COLUMN = "custom_metrics"
+
+_BRAND_SECTION_PREFIX = "brand:"
+_UNIT_SUFFIX_PATTERN = re.compile(r"^(.+)_in_([a-z]+)$")
+_LENGTH_UNITS_IN_MM = {"mm": 1, "cm": 10}
+
+
+@dataclass(frozen=True)
+class MetricResolution:
+    """Canonical name of a source column (None when the column is dropped) and the factor to convert its unit."""
+
+    canonical: str | None
+    scale: float = 1
+
+
+@dataclass(frozen=True)
+class MetricProjection:
+    """Select list of a source projected onto the schema and the source columns kept as custom metrics."""
+
+    select_list: str
+    custom_metrics: tuple[str, ...] = ()
+    # custom metrics which aren't known to the dictionary at all
+    unknown: tuple[str, ...] = ()
+
+
+@dataclass(frozen=True)
+class MetricIndex:
+    units: dict[str, str]
+    aliases: dict[str, str]
+    ignored: frozenset[str]
+    brand_rules: dict[str, dict[str, str]]
+
+    def resolve(self, column: str, brand: str | None = None) -> MetricResolution | None:
+        """
+        Resolve a source column name into a canonical metric.
+
+        Brand rules take precedence over canonical names and aliases. A column with a ``_in_<unit>`` suffix
+        is resolved by its base name and scaled into the canonical unit, a unit which can't be converted into
+        the canonical one (a misspelled ``_in_mmm``) raises ValueError. Returns None for unknown columns.
+        """
+        brand_rules = self.brand_rules.get(brand, {}) if brand else {}
+        if column in brand_rules:
+            target = brand_rules[column]
+            return MetricResolution(None if target == EXCLUDED else target)
+        if column in KEY_COLUMNS or column in self.units:
+            return MetricResolution(column)
+        if column in self.aliases:
+            return MetricResolution(self.aliases[column])
+        if column in self.ignored:
+            return MetricResolution(None)
+
+        if match := _UNIT_SUFFIX_PATTERN.match(column):
+            base, unit = match.groups()
+            resolution = self.resolve(base, brand)
+            if resolution is not None and resolution.canonical is not None:
+                try:
+                    scale = unit_scale(unit, self.units[resolution.canonical])
+                except ValueError as ex:
+                    raise ValueError(f"Unit of {column}: {ex}") from ex
+                return MetricResolution(resolution.canonical, scale)
+            return resolution
+        return None
+
+
+def unit_scale(source_unit: str, target_unit: str) -> float:
+    """Multiplier converting a value between length units. Raises ValueError for units which can't be converted."""
+    if source_unit == target_unit:
+        return 1
+    if source_unit in _LENGTH_UNITS_IN_MM and target_unit in _LENGTH_UNITS_IN_MM:
+        return _LENGTH_UNITS_IN_MM[source_unit] / _LENGTH_UNITS_IN_MM[target_unit]
+    raise ValueError(f"Cannot convert {source_unit} into {target_unit}")
+
+
+@cache
+def canonical_metric_index() -> MetricIndex:
+    """Compile ``metrics.ini`` into a lookup index. The dictionary is parsed once per process."""
+    config = configparser.ConfigParser()
+    config.read_string(read_text(__name__, "metrics.ini"))
+
+    units: dict[str, str] = {}
+    aliases: dict[str, str] = {}
+    ignored: frozenset[str] = frozenset()
+    brand_rules: dict[str, dict[str, str]] = {}
+    for section in config.sections():
+        if section == "ignored":
+            ignored = frozenset(_split_list(config[section]["metrics"]))
+        elif section.startswith(_BRAND_SECTION_PREFIX):
+            brand_rules[section.removeprefix(_BRAND_SECTION_PREFIX)] = dict(config[section])
+        else:
+            units[section] = config[section]["unit"]
+            for alias in _split_list(config[section]["aliases"]):
+                aliases[alias] = section
+    return MetricIndex(units, aliases, ignored, brand_rules)
+
+
+@cache
+def generate_metric_projection(
+    columns: tuple[str, ...], brand: str | None, explicit_mappings: frozenset[tuple[str, str]]
+) -> MetricProjection:
+    """
+    Generate the select list which projects source columns onto canonical metrics.
+
+    Explicit (per-directory) mappings take precedence over :func:`canonical_metric_index`. Columns are
+    dropped with ``EXCLUDE``, renamed with ``RENAME`` and re-projected with a multiplier when their unit differs.
+    Dropped and unknown columns aren't lost: they are packed into the ``custom_metrics`` map by their source name.
+
+    Raises:
+        ValueError: when several columns resolve into the same metric.
+    """
+    index = canonical_metric_index()
+    mappings = dict(explicit_mappings)
+
+    excluded: list[str] = []
+    renamed: list[str] = []
+    scaled: list[str] = []
+    unknown: list[str] = []
+    targets: dict[str, str] = {}
+    for column in columns:
+        if column in mappings:
+            resolution: MetricResolution | None = MetricResolution(
+                None if mappings[column] == EXCLUDED else mappings[column]
+            )
+        else:
+            resolution = index.resolve(column, brand)
+
+        if resolution is None:
+            unknown.append(column)
+            continue
+        if resolution.canonical is None:
+            excluded.append(column)
+            continue
+        if resolution.canonical in targets:
+            raise ValueError(
+                f"Columns {targets[resolution.canonical]} and {column} both resolve into {resolution.canonical}"
+            )
+        targets[resolution.canonical] = column
+        if resolution.scale != 1:
+            excluded.append(column)
+            scaled.append(f"{column} * {resolution.scale:g} as {resolution.canonical}")
+        elif resolution.canonical != column:
+            renamed.append(f"{column} as {resolution.canonical}")
+
+    custom = [column for column in columns if column in excluded and column not in targets.values()] + unknown
+    excluded += unknown
+    exclude_clause = f" EXCLUDE ({', '.join(excluded)})" if excluded else ""
+    rename_clause = f" RENAME ({', '.join(renamed)})" if renamed else ""
+    select_list = [f"*{exclude_clause}{rename_clause}", *scaled]
+    if custom:
+        entries = ", ".join(f"{{'key': '{column}', 'value': \"{column}\"::VARCHAR}}" for column in custom)
+        select_list.append(
+            f"map_from_entries(list_filter([{entries}], entry -> entry.value IS NOT NULL)) as {CUSTOM_METRICS_COLUMN}"
+        )
+    return MetricProjection(", ".join(select_list), tuple(custom), tuple(unknown))
+
+
+def _split_list(value: str) -> list[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
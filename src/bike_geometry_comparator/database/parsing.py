@@ -0,0 +1,65 @@
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.metrics import canonical_metric_index, unit_scale
+
+# "166 - 172", "≤ 158", "≥ 196" or a single value
+_RANGE_PATTERN = r"^\s*(≤|<=|<)?(≥|>=|>)?\s*(\d+(?:[.,]\d+)?)(?:\s*-\s*(\d+(?:[.,]\d+)?))?"
+# "80 - [370-420]" (stem length - [handlebar width at hoods - at drops]) or "80-420"
+_COCKPIT_PATTERN = r"^\s*(\d+)\s*-\s*\[?\s*(\d+)(?:\s*-\s*(\d+))?\s*\]?"
+
+# text range metric -> (min column, max column), both are normalized into mm
+RANGE_METRICS = {
+    "body_height_range": ("body_height_min", "body_height_max"),
+    "seat_height_range": ("seat_height_min", "seat_height_max"),
+}
+
+
+def parse_text_metrics(con: DuckDBPyConnection) -> None:
+    """
+    Parse free-text range and composite metrics of ``bike_geometry`` into numeric columns stored next to them.
+
+    Every text column is matched once and all numeric columns are set by a single UPDATE, values which can't
+    be parsed stay NULL:
+      - ``body_height_range``/``seat_height_range`` into min/max columns in mm, open ranges (``≤ 158``)
+        leave one bound NULL;
+      - ``cockpit_dimensions`` into stem length and handlebar width range;
+      - ``chainring_size`` (``50/34``) into the largest and the smallest chainring;
+      - ``seat_post_diameter`` (``27,2``) into a number.
+    """
+    parsed_columns = [
+        f"regexp_extract({metric}, '{_RANGE_PATTERN}', ['le', 'ge', 'low', 'high']) AS {metric}"
+        for metric in RANGE_METRICS
+    ]
+    parsed_columns += [
+        f"regexp_extract(cockpit_dimensions, '{_COCKPIT_PATTERN}', ['stem', 'width', 'drops']) AS cockpit",
+        "list_transform(string_split(chainring_size, '/'), ring -> TRY_CAST(trim(ring) AS INTEGER)) AS chainrings",
+    ]
+
+    assignments: list[str] = []
+    for metric, (min_column, max_column) in RANGE_METRICS.items():
+        scale = unit_scale(canonical_metric_index().units[metric], "mm")
+        low = f"TRY_CAST(replace(parsed.{metric}.low, ',', '.') AS DOUBLE)"
+        high = f"TRY_CAST(replace(nullif(parsed.{metric}.high, ''), ',', '.') AS DOUBLE)"
+        assignments += [
+            f"{min_column} = CASE WHEN parsed.{metric}.le = '' THEN {low} * {scale:g} END",
+            f"{max_column} = CASE WHEN parsed.{metric}.ge = '' THEN coalesce({high}, {low}) * {scale:g} END",
+        ]
+    assignments += [
+        "cockpit_stem_length = TRY_CAST(parsed.cockpit.stem AS INTEGER)",
+        "cockpit_handlebar_width_min = TRY_CAST(parsed.cockpit.width AS INTEGER)",
+        (
+            "cockpit_handlebar_width_max = "
+            "TRY_CAST(coalesce(nullif(parsed.cockpit.drops, ''), parsed.cockpit.width) AS INTEGER)"
+        ),
+        "chainring_large = list_max(parsed.chainrings)",
+        "chainring_small = CASE WHEN len(parsed.chainrings) > 1 THEN list_min(parsed.chainrings) END",
+        "seat_post_diameter_value = TRY_CAST(replace(trim(bike_geometry.seat_post_diameter), ',', '.') AS DOUBLE)",
+    ]
+    con.execute(f"""
+UPDATE bike_geometry
+SET {",\n    ".join(assignments)}
+FROM (SELECT brand, model, year, size, {", ".join(parsed_columns)} FROM bike_geometry) parsed
+WHERE bike_geometry.brand = parsed.brand
+  AND bike_geometry.model = parsed.model
+  AND bike_geometry.year = parsed.year
+  AND bike_geometry.size = parsed.size""")
@@ -23,7 +23,9 @@ CREATE TABLE bike_geometry
     standover_height      INTEGER DEFAULT NULL,
     fork_axle_to_crown    INTEGER DEFAULT NULL,
 
-    -- here goes list of some custom bike manufacturers metrics
+    -- source columns of custom bike manufacturers metrics which have no column here, by their source name.
+    -- Written into a separate sparse table, the database file doesn't include it
+    custom_metrics MAP(TEXT, TEXT) DEFAULT NULL,
 
     -- components
 
@@ -47,5 +49,31 @@ CREATE TABLE bike_geometry
     -- seat height adjustable range
     seat_height_range   TEXT DEFAULT NULL,
 
+    -- build-time derived columns
+
+    -- numeric bounds of body_height_range and seat_height_range, in mm
+    body_height_min     INTEGER DEFAULT NULL,
+    body_height_max     INTEGER DEFAULT NULL,
+    seat_height_min     INTEGER DEFAULT NULL,
+    seat_height_max     INTEGER DEFAULT NULL,
+    -- components of cockpit_dimensions, in mm
+    cockpit_stem_length         INTEGER DEFAULT NULL,
+    cockpit_handlebar_width_min INTEGER DEFAULT NULL,
+    cockpit_handlebar_width_max INTEGER DEFAULT NULL,
+    -- teeth count of the largest and the smallest chainring
+    chainring_large     INTEGER DEFAULT NULL,
+    chainring_small     INTEGER DEFAULT NULL,
+    -- in mm
+    seat_post_diameter_value FLOAT DEFAULT NULL,
+    -- comma separated metrics which were missing in the source and are derived from other metrics of the row
+    derived_metrics     TEXT DEFAULT NULL,
+    -- 1-based order of the size within (brand, model, year)
+    size_rank           INTEGER DEFAULT NULL,
+    -- content hash of the frame geometry of all sizes of (brand, model, year), equal across carried over years
+    frame_hash          TEXT DEFAULT NULL,
+    -- geometry family (race, endurance, gravel...) found by clustering and the distance to its centroid
+    family_id           INTEGER DEFAULT NULL,
+    family_distance     FLOAT DEFAULT NULL,
+
     PRIMARY KEY (brand, model, year, size)
 );
\ No newline at end of file
@@ -0,0 +1,163 @@
+import json
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass
+from itertools import pairwise
+from pathlib import Path
+
+from _duckdb import DuckDBPyConnection
+
+SEARCH_INDEX_FILE = "search_index.json"
+_FORMAT_VERSION = 1
+
+# least trigram similarity (Jaccard index of trigram sets) of a misspelled token, prefixes and exact tokens score
+# PREFIX_SCORE and 1
+MIN_SIMILARITY = 0.3
+PREFIX_SCORE = 0.9
+DEFAULT_MATCHES = 10
+
+
+def normalize(text: str) -> list[str]:
+    """Lowercase alphanumeric tokens of the text with accents stripped: "Grand Canyon AL" -> grand, canyon, al."""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return re.findall(r"[a-z0-9]+", "".join(c for c in decomposed if not unicodedata.combining(c)).lower())
+
+
+def trigrams(token: str) -> set[str]:
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def _entry_tokens(brand: str, model: str, year: int | None, sizes: list[str]) -> set[str]:
+    model_tokens = normalize(model)
+    # "SuperSix EVO Hi-MOD" is also found as "himod" or "supersixevo"
+    joined = {first + second for first, second in pairwise(model_tokens)}
+    sizes_tokens = {token for size in sizes for token in normalize(size)}
+    return {*normalize(brand), *model_tokens, *joined, *normalize(str(year or "")), *sizes_tokens}
+
+
+@dataclass(frozen=True)
+class SearchMatch:
+    brand: str
+    model: str
+    year: int | None
+    sizes: tuple[str, ...]
+    score: float
+
+
+class SearchIndex:
+    """
+    Fuzzy search over (brand, model, year) of the catalog, with their size labels.
+
+    A query token matches a token of an entry exactly, as a prefix when it's the last token still being typed
+    (autocomplete), or with trigram similarity of at least :data:`MIN_SIMILARITY` to tolerate typos.
+    Entries are ranked by the average score of the query tokens, tokens which match nothing in an entry score 0.
+    The sorted token vocabulary, token postings and the trigram -> token index are all precomputed, a query only
+    looks them up.
+    """
+
+    def __init__(
+        self,
+        entries: list[tuple[str, str, int | None, tuple[str, ...]]],
+        tokens: list[str],
+        postings: list[list[int]],
+        trigram_tokens: dict[str, list[int]],
+    ) -> None:
+        self._entries = entries
+        self._tokens = tokens
+        self._postings = postings
+        self._trigram_tokens = trigram_tokens
+        self._trigram_counts = [len(trigrams(token)) for token in tokens]
+
+    @classmethod
+    def build(cls, entries: list[tuple[str, str, int | None, tuple[str, ...]]]) -> "SearchIndex":
+        entry_tokens = [_entry_tokens(brand, model, year, list(sizes)) for brand, model, year, sizes in entries]
+        tokens = sorted(set().union(*entry_tokens))
+        token_ids = {token: token_id for token_id, token in enumerate(tokens)}
+        postings: list[list[int]] = [[] for _ in tokens]
+        for entry_id, entry in enumerate(entry_tokens):
+            for token in entry:
+                postings[token_ids[token]].append(entry_id)
+        trigram_tokens: dict[str, list[int]] = {}
+        for token_id, token in enumerate(tokens):
+            for trigram in sorted(trigrams(token)):
+                trigram_tokens.setdefault(trigram, []).append(token_id)
+        return cls(entries, tokens, [sorted(posting) for posting in postings], dict(sorted(trigram_tokens.items())))
+
+    @classmethod
+    def load(cls, index_file: Path) -> "SearchIndex":
+        with open(index_file, encoding="utf-8") as f:
+            data = json.load(f)
+        if data["version"] != _FORMAT_VERSION:
+            raise ValueError(f"{index_file} has unsupported version {data['version']}, rebuild the database")
+        entries = [(brand, model, year, tuple(sizes)) for brand, model, year, sizes in data["entries"]]
+        return cls(entries, data["tokens"], data["postings"], data["trigrams"])
+
+    def save(self, index_file: Path) -> None:
+        data = {
+            "version": _FORMAT_VERSION,
+            "entries": self._entries,
+            "tokens": self._tokens,
+            "postings": self._postings,
+            "trigrams": self._trigram_tokens,
+        }
+        with open(index_file, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, separators=(",", ":"))
+
+    def search(self, query: str, limit: int | None = DEFAULT_MATCHES) -> list[SearchMatch]:
+        query_tokens = normalize(query)
+        if not query_tokens:
+            return []
+        # the last token is being typed unless the query ends with a space
+        typing_last = not query[-1].isspace()
+        scores: Counter[int] = Counter()
+        for position, query_token in enumerate(query_tokens):
+            prefix = typing_last and position == len(query_tokens) - 1
+            entry_scores: dict[int, float] = {}
+            for token_id, score in self._token_scores(query_token, prefix).items():
+                for entry_id in self._postings[token_id]:
+                    if score > entry_scores.get(entry_id, 0):
+                        entry_scores[entry_id] = score
+            scores.update(entry_scores)
+        # entries are in brand, model, year order, which breaks ties
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+        return [
+            SearchMatch(*self._entries[entry_id], round(score / len(query_tokens), 3)) for entry_id, score in ranked
+        ]
+
+    def _token_scores(self, query_token: str, prefix: bool) -> dict[int, float]:
+        scores: dict[int, float] = {}
+        token_id = bisect_left(self._tokens, query_token)
+        while token_id < len(self._tokens) and self._tokens[token_id].startswith(query_token):
+            if self._tokens[token_id] == query_token:
+                scores[token_id] = 1.0
+            elif prefix:
+                scores[token_id] = PREFIX_SCORE
+            else:
+                break
+            token_id += 1
+        # a similar year or frame size is a different one
+        if query_token.isdigit():
+            return scores
+
+        query_trigrams = trigrams(query_token)
+        shared = Counter(token_id for trigram in query_trigrams for token_id in self._trigram_tokens.get(trigram, ()))
+        for token_id, count in shared.items():
+            similarity = count / (len(query_trigrams) + self._trigram_counts[token_id] - count)
+            if similarity >= MIN_SIMILARITY and similarity > scores.get(token_id, 0):
+                scores[token_id] = similarity
+        return scores
+
+
+def write_search_index(con: DuckDBPyConnection, output_dir: Path) -> None:
+    """Build the :class:`SearchIndex` of every (brand, model, year) with its size labels into ``search_index.json``."""
+    entries = con.execute("""
+SELECT brand, model, nullif(year, -1) AS year, list(size ORDER BY size_rank) AS sizes
+FROM bike_geometry
+GROUP BY brand, model, year
+ORDER BY brand, model, year""").fetchall()
+    SearchIndex.build([(brand, model, year, tuple(sizes)) for brand, model, year, sizes in entries]).save(
+        output_dir / SEARCH_INDEX_FILE
+    )
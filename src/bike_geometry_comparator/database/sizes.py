@@ -0,0 +1,103 @@
+import logging
+import math
+import re
+
+from _duckdb import DuckDBPyConnection
+
+logger = logging.getLogger(__name__)
+
+# letter sizes are ranked around M = 0, every extra X moves one step further from it
+_LETTER_SIZE_BASE = {"S": -1.0, "SM": -1.0, "M": 0.0, "MD": 0.0, "ML": 0.5, "L": 1.0, "LG": 1.0}
+_LETTER_SIZE_PATTERN = re.compile(r"^(\d*)(X*)(SM|MD|ML|LG|S|M|L)\b", re.IGNORECASE)
+_NUMERIC_SIZE_PATTERN = re.compile(r"^(\d+(?:\.\d+)?)\s*(?:cm|[RT])?\b", re.IGNORECASE)
+_COMBINED_SIZE_PATTERN = re.compile(r"^([^/]+)/([^/]+)$")
+
+# decrease of stack/reach towards a bigger size which is still considered monotonic
+MONOTONIC_TOLERANCE_MM = 5
+# deviation from the median step of a size run which is still considered a regular size progression
+OUTLIER_STEP_TOLERANCE_MM = 25
+
+
+def size_label_rank(label: str) -> float | None:
+    """
+    Convert a free-text size label into a sortable number.
+
+    Letter sizes (``3XS`` ... ``XL``, ``SM``/``MD``/``LG``, ``S/M``) map onto a scale centered at ``M`` = 0,
+    numeric sizes (``54``, ``51R``, ``58T``, ``54 cm``) map onto their number. Labels like ``XXS/47`` are
+    ranked by their letter part. Returns None when the label carries no ordering information (``One Size``).
+    """
+    label = label.strip()
+    if match := _LETTER_SIZE_PATTERN.match(label):
+        multiplier, xs, base = match.groups()
+        base_rank = _LETTER_SIZE_BASE[base.upper()]
+        steps = len(xs) * (int(multiplier) if multiplier else 1)
+        rank = base_rank + math.copysign(steps, base_rank) if base_rank else base_rank
+        if (combined := _COMBINED_SIZE_PATTERN.match(label)) and not combined.group(2).strip().isdigit():
+            # S/M, M/L, L/XL sit between both letter sizes
+            second = size_label_rank(combined.group(2))
+            if second is not None:
+                return (rank + second) / 2
+        return rank
+    if match := _NUMERIC_SIZE_PATTERN.match(label):
+        return float(match.group(1))
+    return None
+
+
+def build_size_index(con: DuckDBPyConnection) -> None:
+    """
+    Populate ``bike_geometry.size_rank`` with the 1-based order of every size within its (brand, model, year) run.
+
+    Labels are ranked by :func:`size_label_rank`, ties (``51R``/``51T``) and unknown labels are resolved by stack
+    and reach, so ``size_rank ± 1`` always points to the adjacent size.
+    """
+    labels = [label for (label,) in con.execute("SELECT DISTINCT size FROM bike_geometry").fetchall()]
+    con.execute("CREATE OR REPLACE TEMP TABLE size_label_rank (size TEXT PRIMARY KEY, label_rank DOUBLE)")
+    con.executemany("INSERT INTO size_label_rank VALUES (?, ?)", [(label, size_label_rank(label)) for label in labels])
+    con.execute("""
+UPDATE bike_geometry
+SET size_rank = ranked.size_rank
+FROM (SELECT brand, model, year, g.size,
+             row_number() OVER (PARTITION BY brand, model, year
+                                ORDER BY r.label_rank NULLS LAST, stack, reach, g.size) AS size_rank
+      FROM bike_geometry g JOIN size_label_rank r ON g.size = r.size) ranked
+WHERE bike_geometry.brand = ranked.brand
+  AND bike_geometry.model = ranked.model
+  AND bike_geometry.year = ranked.year
+  AND bike_geometry.size = ranked.size""")
+
+
+def find_size_anomalies(con: DuckDBPyConnection) -> list[tuple[str, str, int, str, str, str, int]]:
+    """
+    Detect suspicious stack/reach values within every size run ordered by ``size_rank``.
+
+    Regular (``54R``) and tall (``54T``) variants are checked as separate runs. Two kinds of anomalies are
+    reported as (brand, model, year, size, metric, kind, value) tuples:
+      - ``non-monotonic``: the value decreases by more than :data:`MONOTONIC_TOLERANCE_MM` compared to
+        the previous size with a smaller label rank;
+      - ``outlier``: the step from the previous size deviates from the median step of the run by more
+        than :data:`OUTLIER_STEP_TOLERANCE_MM`.
+    """
+    return con.execute(f"""
+WITH labeled AS (SELECT brand, model, year, size, size_rank, label_rank, stack, reach,
+                        regexp_extract(size, '\\d\\s*([RT])$', 1) AS variant
+                 FROM bike_geometry JOIN size_label_rank USING (size)),
+     ranked AS (UNPIVOT labeled ON stack, reach INTO NAME metric VALUE value),
+     stepped AS (SELECT *,
+                        value - lag(value) OVER run AS step,
+                        label_rank > lag(label_rank) OVER run AS label_increases
+                 FROM ranked
+                 WINDOW run AS (PARTITION BY brand, model, year, variant, metric ORDER BY size_rank)),
+     with_median AS (SELECT *, median(step) OVER (PARTITION BY brand, model, year, variant, metric) AS median_step
+                     FROM stepped)
+SELECT brand, model, year, size, metric,
+       CASE WHEN step < -{MONOTONIC_TOLERANCE_MM} AND label_increases THEN 'non-monotonic' ELSE 'outlier' END AS kind,
+       value
+FROM with_median
+WHERE (step < -{MONOTONIC_TOLERANCE_MM} AND label_increases)
+   OR abs(step - median_step) > {OUTLIER_STEP_TOLERANCE_MM}
+ORDER BY brand, model, year, metric, size_rank""").fetchall()
+
+
+def report_size_anomalies(con: DuckDBPyConnection) -> None:
+    for brand, model, year, size, metric, kind, value in find_size_anomalies(con):
+        logger.warning(f"Suspicious {metric} = {value} for {brand} {model} {year} size {size}: {kind}")
@@ -1,9 +1,107 @@
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from typing import Any
+
 import duckdb
+from _duckdb import DuckDBPyConnection
 
+FETCH_BATCH_SIZE = 10_000
 
-def fetchall_strings(sql, conn=None) -> list[str]:
+
+class Row(Mapping[str, Any]):
+    """
+    Query result row: the fetched value tuple with access by column name, ``row["stack"]`` or ``row.stack``.
+
+    Rows of a result share a single column index, so a row costs one small object on top of its tuple
+    rather than a dict repeating the column names.
+    """
+
+    __slots__ = ("_index", "_values")
+
+    def __init__(self, index: dict[str, int], values: tuple[Any, ...]) -> None:
+        self._index = index
+        self._values = values
+
+    def __getitem__(self, column: str) -> Any:
+        return self._values[self._index[column]]
+
+    def __getattr__(self, column: str) -> Any:
+        if column.startswith("_"):
+            raise AttributeError(column)
+        try:
+            return self._values[self._index[column]]
+        except KeyError:
+            raise AttributeError(column) from None
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._index)
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __repr__(self) -> str:
+        return f"Row({', '.join(f'{column}={value!r}' for column, value in zip(self._index, self._values))})"
+
+    def astuple(self) -> tuple[Any, ...]:
+        return self._values
+
+
+@contextmanager
+def _execute(sql: str, conn: DuckDBPyConnection | None) -> Iterator[DuckDBPyConnection]:
+    """Run the query on a new cursor of ``conn``, or on the default connection when it's not given."""
     if conn:
         with conn.cursor() as cur:
-            return [res for (res,) in cur.execute(sql).fetchall()]
+            yield cur.execute(sql)
     else:
-        return [res for (res,) in duckdb.execute(sql).fetchall()]
+        yield duckdb.execute(sql)
+
+
+def _column_names(cursor: DuckDBPyConnection) -> list[str]:
+    return [desc[0] for desc in cursor.description] if cursor.description else []
+
+
+def _batches(cursor: DuckDBPyConnection, batch_size: int) -> Iterator[list[tuple[Any, ...]]]:
+    while batch := cursor.fetchmany(batch_size):
+        yield batch
+
+
+def fetchall_strings(sql, conn=None) -> list[str]:
+    with _execute(sql, conn) as cur:
+        return [res for batch in _batches(cur, FETCH_BATCH_SIZE) for (res,) in batch]
+
+
+def iter_rows(sql: str, conn: DuckDBPyConnection | None = None, batch_size: int = FETCH_BATCH_SIZE) -> Iterator[Row]:
+    """
+    Stream the result as :class:`Row` objects, fetching ``batch_size`` rows at a time.
+
+    At most one batch is held in memory, so catalog-wide results can be processed without materializing them.
+    With ``conn``, the query runs on its own cursor, which is closed when the generator is exhausted or closed.
+    """
+    with _execute(sql, conn) as cur:
+        index = {column: position for position, column in enumerate(_column_names(cur))}
+        for batch in _batches(cur, batch_size):
+            for values in batch:
+                yield Row(index, values)
+
+
+def fetch_rows(sql: str, conn: DuckDBPyConnection | None = None) -> list[Row]:
+    with _execute(sql, conn) as cur:
+        index = {column: position for position, column in enumerate(_column_names(cur))}
+        return [Row(index, values) for values in cur.fetchall()]
+
+
+def fetch_columns(
+    sql: str, conn: DuckDBPyConnection | None = None, batch_size: int = FETCH_BATCH_SIZE
+) -> dict[str, list[Any]]:
+    """
+    Fetch the result column-wise as ``{column: values}`` in the result order.
+
+    Rows are transposed batch by batch, so the whole result is never held as row tuples. This is the cheapest form
+    of a large result for per-column processing: the column lists hold the values only.
+    """
+    with _execute(sql, conn) as cur:
+        columns: dict[str, list[Any]] = {column: [] for column in _column_names(cur)}
+        for batch in _batches(cur, batch_size):
+            for values, column_values in zip(columns.values(), zip(*batch)):
+                values.extend(column_values)
+        return columns
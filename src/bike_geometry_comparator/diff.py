@@ -0,0 +1,115 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.metrics import KEY_COLUMNS
+
+_NUMERIC_TYPES = ("TINYINT", "SMALLINT", "INTEGER", "BIGINT", "HUGEINT", "FLOAT", "DOUBLE", "DECIMAL")
+
+
+@dataclass
+class BuildDiff:
+    added: int = 0
+    removed: int = 0
+    changed: int = 0
+    unchanged: int = 0
+    added_columns: list[str] = field(default_factory=list)
+    removed_columns: list[str] = field(default_factory=list)
+    # column -> number of changed rows in which the column value differs
+    changed_columns: dict[str, int] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        return f"{self.added} added, {self.removed} removed, {self.changed} changed, {self.unchanged} unchanged rows"
+
+
+def diff_builds(old_file: Path, new_file: Path, feed_file: Path) -> BuildDiff:
+    """
+    Compare two database builds row by row and write the differences as a JSONL change feed.
+
+    Every row is identified by its (brand, model, year, size) key and hashed by the values of the columns both builds
+    have, so builds are matched by a single FULL OUTER JOIN on the key and only rows with different hashes are
+    inspected. Each feed line is one of::
+
+        {"op": "added", "brand": ..., "model": ..., "year": ..., "size": ..., "row": {<all columns>}}
+        {"op": "removed", "brand": ..., "model": ..., "year": ..., "size": ...}
+        {"op": "changed", "brand": ..., "model": ..., "year": ..., "size": ...,
+         "changes": {<column>: {"old", "new", "delta"}}}
+
+    ``delta`` is present for columns which are numeric in both builds only, NULL members are omitted. Feed lines are
+    ordered by the key.
+    """
+    con = duckdb.connect()
+    con.execute(f"CREATE VIEW old_build AS SELECT * FROM '{old_file}'")
+    con.execute(f"CREATE VIEW new_build AS SELECT * FROM '{new_file}'")
+    old_columns = _describe(con, "old_build")
+    new_columns = _describe(con, "new_build")
+    common_columns = [column for column in new_columns if column in old_columns and column not in KEY_COLUMNS]
+    numeric_columns = {
+        column
+        for column in common_columns
+        if old_columns[column].startswith(_NUMERIC_TYPES) and new_columns[column].startswith(_NUMERIC_TYPES)
+    }
+
+    def compared(column: str) -> str:
+        # a column whose type changed between builds is compared as DOUBLE if it's numeric in both, as text otherwise
+        if old_columns[column] == new_columns[column]:
+            return column
+        return f"{column}::{'DOUBLE' if column in numeric_columns else 'VARCHAR'}"
+
+    def hashed(view: str) -> str:
+        content = ", ".join(f"{column} := {compared(column)}" for column in common_columns)
+        return f"SELECT *, md5(to_json(struct_pack({content}))) AS row_hash FROM {view}"
+
+    changes = []
+    for column in common_columns:
+        delta = f", 'delta', n.{column} - o.{column}" if column in numeric_columns else ""
+        changes.append(
+            f"{{'key': '{column}', 'value': CASE WHEN o.{compared(column)} IS DISTINCT FROM n.{compared(column)} "
+            f"THEN json_object('old', o.{column}, 'new', n.{column}{delta}) END}}"
+        )
+    added_row = ", ".join(f"{column} := n.{column}" for column in new_columns)
+    keys = ", ".join(f"coalesce(n.{column}, o.{column}) AS {column}" for column in KEY_COLUMNS)
+    join_condition = " AND ".join(f"o.{column} IS NOT DISTINCT FROM n.{column}" for column in KEY_COLUMNS)
+    con.execute(f"""
+CREATE TABLE build_changes AS
+SELECT CASE WHEN o.row_hash IS NULL THEN 'added' WHEN n.row_hash IS NULL THEN 'removed' ELSE 'changed' END AS op,
+       {keys},
+       CASE WHEN o.row_hash IS NULL THEN to_json(struct_pack({added_row})) END AS row,
+       CASE WHEN o.row_hash IS NOT NULL AND n.row_hash IS NOT NULL
+            THEN map_from_entries(list_filter([{", ".join(changes)}], change -> change.value IS NOT NULL))
+       END AS changes
+FROM ({hashed("old_build")}) o
+FULL OUTER JOIN ({hashed("new_build")}) n ON {join_condition}
+WHERE o.row_hash IS DISTINCT FROM n.row_hash""")
+
+    # merging a patch drops its NULL members, which keeps "row" only in added and "changes" only in changed lines
+    feed = con.execute(f"""
+SELECT json_merge_patch(json_object('op', op, {", ".join(f"'{column}', {column}" for column in KEY_COLUMNS)}),
+                        json_object('row', row, 'changes', changes))
+FROM build_changes
+ORDER BY {", ".join(KEY_COLUMNS)}, op""").fetchall()
+    with open(feed_file, "w") as f:
+        f.writelines(f"{line}\n" for (line,) in feed)
+
+    diff = BuildDiff(
+        added_columns=[column for column in new_columns if column not in old_columns],
+        removed_columns=[column for column in old_columns if column not in new_columns],
+    )
+    for op, count in con.execute("SELECT op, count(*) FROM build_changes GROUP BY op").fetchall():
+        setattr(diff, op, count)
+    (new_rows,) = con.execute("SELECT count(*) FROM new_build").fetchone() or (0,)
+    diff.unchanged = new_rows - diff.added - diff.changed
+    diff.changed_columns = dict(
+        con.execute("""
+SELECT column_name, count(*) AS rows
+FROM (SELECT unnest(map_keys(changes)) AS column_name FROM build_changes WHERE op = 'changed')
+GROUP BY column_name
+ORDER BY rows DESC, column_name""").fetchall()
+    )
+    return diff
+
+
+def _describe(con: DuckDBPyConnection, view: str) -> dict[str, str]:
+    return {column: column_type for column, column_type, *_ in con.execute(f"DESCRIBE {view}").fetchall()}
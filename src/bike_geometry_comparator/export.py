@@ -0,0 +1,48 @@
+import sys
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.database.core import create_database_view
+from bike_geometry_comparator.database.facets import facet_cube_query
+
+# format -> COPY options
+EXPORT_FORMATS = {
+    "csv": "FORMAT csv, HEADER",
+    "jsonl": "FORMAT json",
+    "parquet": "FORMAT parquet",
+}
+STDOUT = Path("/dev/stdout")
+
+
+def export_database(
+    database_file: Path,
+    output: Path | None,
+    export_format: str,
+    where: str | None = None,
+    columns: list[str] | None = None,
+    facets_output: Path | None = None,
+) -> None:
+    """
+    Stream the rows of the database matching the ``where`` SQL expression into ``output``, or stdout if it's None.
+
+    Only ``columns`` are exported when given. The database is read with the column types of ``schema.sql``,
+    so typed formats like parquet keep them. COPY streams the rows from the source to the output in vectors and
+    the query has no sort or aggregate to hold the whole result, so memory doesn't grow with the export size.
+    Rows keep the order of the database file.
+
+    With ``facets_output``, the facet cube of the exported rows is written there as csv, the same way as
+    the build writes the cube of the whole database.
+    """
+    with duckdb.connect() as con:
+        create_database_view(con, database_file)
+        projection = ", ".join(columns) if columns else "*"
+        if output is None:
+            # DuckDB writes to the file descriptor directly, anything buffered by Python must go first
+            sys.stdout.flush()
+        con.execute(f"""
+COPY (SELECT {projection} FROM bike_geometry WHERE {where or "true"})
+TO '{output or STDOUT}' ({EXPORT_FORMATS[export_format]})""")
+        if facets_output:
+            cube = facet_cube_query(f"(SELECT * FROM bike_geometry WHERE {where or 'true'})")
+            con.execute(f"COPY ({cube}) TO '{facets_output}' (HEADER)")
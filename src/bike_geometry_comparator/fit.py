@@ -0,0 +1,107 @@
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.query_cache import QueryCache, default_query_cache
+
+# Linear fit of frame stack/reach against the middle of manufacturers' recommended body height ranges (both in mm)
+_STACK_PER_BODY_HEIGHT = 0.32
+_REACH_PER_BODY_HEIGHT = 0.175
+_REACH_OFFSET = 76
+# Inseam of an average rider relative to the body height. Longer legs raise the saddle and need more stack,
+# the shorter torso which comes with them needs less reach.
+_AVERAGE_INSEAM_RATIO = 0.46
+_STACK_PER_EXTRA_INSEAM = 0.5
+_REACH_PER_EXTRA_INSEAM = -0.3
+
+STACK_TOLERANCE = 30
+REACH_TOLERANCE = 20
+
+
+@dataclass(frozen=True)
+class RiderProfile:
+    """Rider body measurements in cm."""
+
+    height: int
+    inseam: int
+
+
+@dataclass(frozen=True)
+class FitWindow:
+    stack: float
+    reach: float
+    stack_tolerance: float = STACK_TOLERANCE
+    reach_tolerance: float = REACH_TOLERANCE
+
+
+@dataclass(frozen=True)
+class FitRecommendation:
+    brand: str
+    model: str
+    year: int | None
+    size: str
+    stack: int
+    reach: int
+    fit_distance: float
+
+
+def target_window(profile: RiderProfile) -> FitWindow:
+    """Compute the target stack/reach window in mm for the given rider."""
+    height = profile.height * 10
+    extra_inseam = profile.inseam * 10 - height * _AVERAGE_INSEAM_RATIO
+    return FitWindow(
+        stack=height * _STACK_PER_BODY_HEIGHT + extra_inseam * _STACK_PER_EXTRA_INSEAM,
+        reach=height * _REACH_PER_BODY_HEIGHT + _REACH_OFFSET + extra_inseam * _REACH_PER_EXTRA_INSEAM,
+    )
+
+
+def recommend_sizes(
+    database_file: Path,
+    profile: RiderProfile,
+    limit: int | None = None,
+    cache: QueryCache = default_query_cache,
+    con: DuckDBPyConnection | None = None,
+) -> list[FitRecommendation]:
+    """
+    Find the best fitting size of every (brand, model, year) for the rider.
+
+    The catalog is filtered by the stack/reach window of :func:`target_window` and by the manufacturers'
+    recommended body height range where it's known, then ranked by the normalized stack/reach distance.
+    Results are cached per database build and rider profile. With ``con`` the ``bike_geometry`` table already
+    loaded from ``database_file`` into it is queried instead of the file.
+    """
+    recommendations = cache.get_or_compute(
+        database_file, ("recommend_sizes", profile), lambda: _recommend_sizes(database_file, profile, con)
+    )
+    return list(recommendations[:limit])
+
+
+def _recommend_sizes(
+    database_file: Path, profile: RiderProfile, con: DuckDBPyConnection | None
+) -> tuple[FitRecommendation, ...]:
+    window = target_window(profile)
+    body_height = profile.height * 10
+    source = f"'{database_file}'" if con is None else "bike_geometry"
+    con = con or duckdb.default_connection()
+    rows = con.execute(
+        f"""
+SELECT brand, model, year, size, stack, reach,
+       sqrt(pow((stack - $stack) / $stack_tolerance, 2) + pow((reach - $reach) / $reach_tolerance, 2)) AS fit_distance
+FROM {source}
+WHERE stack BETWEEN $stack - $stack_tolerance AND $stack + $stack_tolerance
+  AND reach BETWEEN $reach - $reach_tolerance AND $reach + $reach_tolerance
+  AND coalesce(body_height_min <= $body_height, true)
+  AND coalesce(body_height_max >= $body_height, true)
+QUALIFY row_number() OVER (PARTITION BY brand, model, year ORDER BY fit_distance, size_rank) = 1
+ORDER BY fit_distance, brand, model, year""",
+        {
+            "stack": window.stack,
+            "reach": window.reach,
+            "stack_tolerance": window.stack_tolerance,
+            "reach_tolerance": window.reach_tolerance,
+            "body_height": body_height,
+        },
+    ).fetchall()
+    return tuple(FitRecommendation(*row) for row in rows)
@@ -0,0 +1,170 @@
+import glob
+import logging
+import os
+import re
+import shutil
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Raw chart text kept next to the geometry.csv it was parsed into
+ORIGINAL_CHART_FILE = "original_geochart.txt"
+
+# "Domane SLR 2025.txt", "Faran 3.0.txt"
+_CHART_NAME_PATTERN = re.compile(r"^(?P<model>.+?)(?:[\s_-]+(?P<year>(?:19|20)\d\d))?$")
+
+type ChartParser = Callable[[Path, Path], None]
+
+
+@dataclass(frozen=True)
+class ChartSource:
+    path: Path
+    model: str | None
+    year: int | None = None
+
+
+@dataclass(frozen=True)
+class IngestResult:
+    source: Path
+    output: Path | None
+    rows: int = 0
+    error: str | None = None
+
+
+@dataclass
+class BatchSummary:
+    results: list[IngestResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return sum(result.rows for result in self.results)
+
+    @property
+    def failures(self) -> list[IngestResult]:
+        return [result for result in self.results if result.error]
+
+    def __str__(self) -> str:
+        rate = self.rows / self.elapsed if self.elapsed else 0.0
+        return (
+            f"{len(self.results) - len(self.failures)} of {len(self.results)} charts ingested, "
+            f"{self.rows} rows in {self.elapsed:.2f} s ({rate:.0f} rows/s), {len(self.failures)} failures"
+        )
+
+
+def find_chart_files(inputs: Iterable[str], pattern: str = "*.txt") -> list[Path]:
+    """Expand files, directories (searched recursively for ``pattern``) and glob patterns into chart files."""
+    files: list[Path] = []
+    for item in inputs:
+        path = Path(item)
+        if path.is_dir():
+            files += sorted(path.rglob(pattern))
+        elif path.exists():
+            files.append(path)
+        else:
+            files += sorted(Path(match) for match in glob.glob(item, recursive=True))
+    return list(dict.fromkeys(files))
+
+
+def chart_source(path: Path, model: str | None = None) -> ChartSource:
+    """
+    Describe a chart file.
+
+    An ``original_geochart.txt`` is re-ingested in place. Any other file is named after the model with an optional
+    trailing year, e.g. ``Domane SLR 2025.txt``, unless the model is given explicitly.
+    """
+    if path.name == ORIGINAL_CHART_FILE:
+        return ChartSource(path, model=None)
+    match = _CHART_NAME_PATTERN.match(path.stem)
+    if not match:
+        raise ValueError(f"Chart file name {path.name} doesn't match {_CHART_NAME_PATTERN.pattern}")
+    year = match.group("year")
+    return ChartSource(path, model or match.group("model").strip(), int(year) if year else None)
+
+
+def slugify(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_")
+
+
+def ingest_batch(
+    parse: ChartParser,
+    brand: str,
+    sources: list[ChartSource],
+    data_dir: Path,
+    jobs: int | None = None,
+) -> BatchSummary:
+    """
+    Parse chart files in a pool of worker processes straight into the data directory tree.
+
+    Every chart is written into ``<data_dir>/<brand>/<model>/[<year>/]geometry.csv`` together with a copy of the raw
+    chart and ``defaults.ini`` files of the brand, model and year which don't exist yet. A failed chart is reported
+    in the summary and doesn't stop the batch.
+    """
+    started = time.perf_counter()
+    ingest = partial(_ingest_chart, parse, brand, data_dir)
+    if len(sources) == 1 or jobs == 1:
+        results = [ingest(source) for source in sources]
+    else:
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            chunksize = max(1, len(sources) // ((jobs or os.cpu_count() or 1) * 4))
+            results = list(executor.map(ingest, sources, chunksize=chunksize))
+    return BatchSummary(results, time.perf_counter() - started)
+
+
+def _ingest_chart(parse: ChartParser, brand: str, data_dir: Path, source: ChartSource) -> IngestResult:
+    try:
+        if source.model is None:
+            target_dir = source.path.parent
+        else:
+            target_dir = prepare_model_dir(data_dir, brand, source.model, source.year)
+            shutil.copyfile(source.path, target_dir / ORIGINAL_CHART_FILE)
+
+        output = target_dir / "geometry.csv"
+        parse(source.path, output)
+        rows = count_rows(output)
+        if rows <= 0:
+            return IngestResult(source.path, output, error="No geometry rows were parsed")
+        return IngestResult(source.path, output, rows)
+    except (OSError, ValueError, LookupError, AssertionError) as ex:
+        return IngestResult(source.path, None, error=f"{type(ex).__name__}: {ex}")
+
+
+def prepare_model_dir(data_dir: Path, brand: str, model: str, year: int | None) -> Path:
+    """Create ``<data_dir>/<brand>/<model>/[<year>/]`` with the ``defaults.ini`` files which don't exist yet."""
+    brand_dir = data_dir / slugify(brand)
+    model_dir = brand_dir / slugify(model)
+    target_dir = model_dir / str(year) if year else model_dir
+    target_dir.mkdir(parents=True, exist_ok=True)
+    _write_defaults(brand_dir, "brand", brand)
+    _write_defaults(model_dir, "model", model)
+    if year:
+        _write_defaults(target_dir, "year", str(year))
+    return target_dir
+
+
+def count_rows(csv_file: Path) -> int:
+    """Number of data rows of a parsed geometry.csv, 0 when the parser didn't write it."""
+    if not csv_file.exists():
+        return 0
+    with open(csv_file, encoding="utf-8") as f:
+        return max(0, sum(1 for line in f if line.strip()) - 1)
+
+
+def _write_defaults(directory: Path, key: str, value: str) -> None:
+    defaults_file = directory / "defaults.ini"
+    if not defaults_file.exists():
+        defaults_file.write_text(f"{key} : {value}", encoding="utf-8")
+
+
+def log_summary(summary: BatchSummary) -> None:
+    for result in summary.results:
+        if result.error:
+            logger.error(f"Failed to ingest {result.source}: {result.error}")
+        else:
+            logger.info(f"{result.source} -> {result.output} ({result.rows} rows)")
+    logger.info(summary)
@@ -0,0 +1,182 @@
+"""
+Single-pass tokenizer of geometry charts copied as plain text from PDFs and web pages.
+
+A chart is described by a :class:`ChartSpec` and comes in one of two layouts:
+
+- ``rows``: a header line with sizes followed by one line per metric, e.g. Fairlight::
+
+    Size 51R 51T 54R
+    A Top Tube Horizontal 535 549 548
+
+- ``columns``: a header block with one metric label per indented line followed by a block per size with one
+  indented value per metric, e.g. Trek::
+
+    Frame size letter
+    \tA — Seat tube
+    \tFrame stack
+    S
+    \t50.0
+    \t55.0
+"""
+
+import csv
+import re
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from functools import cache
+from pathlib import Path
+from typing import Any, Literal
+
+_NUMBER = r"\d+(?:\.\d+)?"
+
+
+@dataclass(frozen=True)
+class ChartSpec:
+    layout: Literal["rows", "columns"]
+    # (label regex, metric) pairs of the rows layout, the first matching label sets the metric of the following values
+    labels: tuple[tuple[str, str], ...] = ()
+    # metric -> regex of the line to take values from when the chart has several alternatives, e.g. trail per tyre
+    preferred_rows: tuple[tuple[str, str], ...] = ()
+    # number of leading header tokens which aren't sizes
+    header_skip: int = 1
+    value_pattern: str = _NUMBER
+    # columns layout labels are normalized into metric names by removing the prefix and replacing separators with "_"
+    label_prefix: str = ""
+    label_separators: str = " "
+    renames: tuple[tuple[str, str], ...] = ()
+    # (regex, replacement) substitutions which clean up every value, e.g. unit suffixes
+    value_substitutions: tuple[tuple[str, str], ...] = ()
+    # metric -> factor converting values into mm, scaled values are truncated to integers
+    scales: tuple[tuple[str, float], ...] = ()
+
+
+@dataclass
+class ChartTable:
+    metrics: list[str]
+    sizes: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    def write_csv(self, out_csv: Path) -> None:
+        out_csv.parent.mkdir(exist_ok=True, parents=True)
+        with open(out_csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=["size", *self.metrics], lineterminator="\n", restval="")
+            writer.writeheader()
+            for size, values in self.sizes.items():
+                writer.writerow({"size": size, **values})
+
+
+@dataclass(frozen=True)
+class _CompiledSpec:
+    labels: tuple[tuple[re.Pattern[str], str], ...]
+    preferred_rows: dict[str, re.Pattern[str]]
+    value: re.Pattern[str]
+    label_prefix: re.Pattern[str]
+    label_separators: re.Pattern[str]
+    renames: dict[str, str]
+    value_substitutions: tuple[tuple[re.Pattern[str], str], ...]
+    scales: dict[str, float]
+
+
+@cache
+def _compile(spec: ChartSpec) -> _CompiledSpec:
+    return _CompiledSpec(
+        labels=tuple((re.compile(pattern), metric) for pattern, metric in spec.labels),
+        preferred_rows={metric: re.compile(pattern) for metric, pattern in spec.preferred_rows},
+        value=re.compile(f"^{spec.value_pattern}$"),
+        label_prefix=re.compile(spec.label_prefix),
+        label_separators=re.compile(f"[{re.escape(spec.label_separators)}_]+"),
+        renames=dict(spec.renames),
+        value_substitutions=tuple(
+            (re.compile(pattern, re.IGNORECASE), replacement) for pattern, replacement in spec.value_substitutions
+        ),
+        scales=dict(spec.scales),
+    )
+
+
+def parse_chart(lines: Iterable[str], spec: ChartSpec) -> ChartTable:
+    compiled = _compile(spec)
+    if spec.layout == "rows":
+        return _parse_rows(lines, spec, compiled)
+    return _parse_columns(lines, compiled)
+
+
+def parse_chart_file(input_path: Path, out_csv: Path, spec: ChartSpec) -> None:
+    with open(input_path, "r", encoding="utf-8") as f:
+        table = parse_chart(f, spec)
+    table.write_csv(out_csv)
+
+
+def _parse_rows(lines: Iterable[str], spec: ChartSpec, compiled: _CompiledSpec) -> ChartTable:
+    table = ChartTable(metrics=list(dict.fromkeys(metric for _, metric in spec.labels)))
+    sizes: list[str] = []
+    metric = None
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        if not sizes:
+            sizes = line.split()[spec.header_skip :]
+            table.sizes = {size: {} for size in sizes}
+            continue
+
+        for label, label_metric in compiled.labels:
+            if label.match(line):
+                metric = label_metric
+                break
+        if metric is None:
+            continue
+
+        values = line.split()[-len(sizes) :]
+        if len(values) < len(sizes) or not all(compiled.value.match(value) for value in values):
+            continue
+        preferred_row = compiled.preferred_rows.get(metric)
+        if preferred_row is not None:
+            if not preferred_row.search(line):
+                continue
+        elif metric in table.sizes[sizes[0]]:
+            # the first row of values wins
+            continue
+        for size, value in zip(sizes, values):
+            table.sizes[size][metric] = _clean_value(compiled, metric, value)
+    return table
+
+
+def _parse_columns(lines: Iterable[str], compiled: _CompiledSpec) -> ChartTable:
+    table = ChartTable(metrics=[])
+    values: list[Any] = []
+    size = None
+    title = True
+    for line in lines:
+        line = line.rstrip("\n\r")
+        if not line:
+            continue
+        if title:
+            title = False
+            continue
+
+        content = line.lstrip("\t")
+        if line.startswith("\t"):
+            if size is None:
+                table.metrics.append(_metric_name(compiled, content))
+            else:
+                values.append(_clean_value(compiled, table.metrics[len(values)], content))
+        else:
+            if size is not None and values:
+                table.sizes[size] = dict(zip(table.metrics, values))
+            size, values = content, []
+    if size is not None and values:
+        table.sizes[size] = dict(zip(table.metrics, values))
+    return table
+
+
+def _metric_name(compiled: _CompiledSpec, label: str) -> str:
+    name = compiled.label_prefix.sub("", label, count=1).lower()
+    name = compiled.label_separators.sub("_", name)
+    return compiled.renames.get(name, name)
+
+
+def _clean_value(compiled: _CompiledSpec, metric: str, value: str) -> Any:
+    for pattern, replacement in compiled.value_substitutions:
+        value = pattern.sub(replacement, value)
+    value = value.strip()
+    scale = compiled.scales.get(metric)
+    return int(float(value) * scale) if scale else value
@@ -1,99 +1,71 @@
 import argparse
-import csv
-import re
+import logging
 from pathlib import Path
 
+from bike_geometry_comparator.ingest import batch
+from bike_geometry_comparator.ingest.chart_tokenizer import ChartSpec, parse_chart_file
+from bike_geometry_comparator.logging.config import setup_project_root_logging
+
+FAIRLIGHT_CHART_SPEC = ChartSpec(
+    layout="rows",
+    labels=(
+        (r"^A(\s|$)", "top_tube_horizontal"),
+        (r"^B(\s|$)", "seat_tube_length"),
+        (r"^C(\s|$)", "seat_tube_angle"),
+        (r"^D(\s|$)", "head_tube_angle"),
+        (r"^E(\s|$)", "chainstay"),
+        (r"^F(\s|$)", "fork_rake"),
+        (r"^G(\s|$)", "wheelbase"),
+        (r"^H(\s|$)", "trail"),
+        (r"^I(\s|$)", "bb_drop"),
+        (r"^J(\s|$)", "front_center_distance"),
+        (r"^K(\s|$)", "head_tube_length"),
+        (r"^L(\s|$)", "stack"),
+        (r"^M(\s|$)", "reach"),
+        (r"^N(\s|$)", "standover_height"),
+        (r"^Fork Length - Axle to Crown", "fork_axle_to_crown"),
+    ),
+    # trail is listed per tyre size, the 700 x 38 tyre is the primary one
+    preferred_rows=(("trail", r"700 x 38"),),
+)
 
-def _parse_file(input_path: Path, out_csv: Path) -> None:
-    with open(input_path, "r", encoding="utf-8") as f:
-        lines = [line.strip() for line in f if line.strip()]
-
-    if not lines:
-        return
 
+def _parse_file(input_path: Path, out_csv: Path) -> None:
     # First line contains sizes
     # Size 51R 51T 54R 54T 56R 56T 58R 58T 61R 61T
-    sizes = lines[0].split()[1:]
-    num_sizes = len(sizes)
-
-    data: dict[str, dict] = {size: {} for size in sizes}
-
-    mappings = {
-        "A": "top_tube_horizontal",
-        "B": "seat_tube_length",
-        "C": "seat_tube_angle",
-        "D": "head_tube_angle",
-        "E": "chainstay",
-        "F": "fork_rake",
-        "G": "wheelbase",
-        "H": "trail",
-        "I": "bb_drop",
-        "J": "front_center_distance",
-        "K": "head_tube_length",
-        "L": "stack",
-        "M": "reach",
-        "N": "standover_height",
-        "Fork Length - Axle to Crown": "fork_axle_to_crown",
-    }
-
-    current_metric = None
-
-    for line in lines[1:]:
-        # Identify metric
-        metric_match = re.match(r"^([A-N])(\s|$)|^Fork Length - Axle to Crown", line)
-        if metric_match:
-            if metric_match.group(1):
-                letter = metric_match.group(1)
-                current_metric = mappings.get(letter)
-            else:
-                current_metric = "fork_axle_to_crown"
-
-        # Try to extract values from current line
-        parts = line.split()
-        if len(parts) >= num_sizes:
-            # Check the last num_sizes parts
-            possible_vals = parts[-num_sizes:]
-            if all(re.match(r"^\d+(\.\d+)?$", v) for v in possible_vals):
-                # If we are in Trail (H), only take 700x38 as the primary value
-                if current_metric == "trail":
-                    if "700 x 38" in line:
-                        for idx, val in enumerate(possible_vals):
-                            data[sizes[idx]]["trail"] = val
-                # For other metrics, if we haven't found values yet, take these
-                elif current_metric and current_metric not in data[sizes[0]]:
-                    for idx, val in enumerate(possible_vals):
-                        data[sizes[idx]][current_metric] = val
-
-    headers = ["size"] + list(mappings.values())
-
-    with open(out_csv, "w", newline="", encoding="utf-8") as f:
-        writer = csv.DictWriter(f, fieldnames=headers, lineterminator="\n")
-        writer.writeheader()
-        for size in sizes:
-            row = {"size": size}
-            row.update({m: data[size].get(m, "") for m in mappings.values()})
-            writer.writerow(row)
+    parse_chart_file(input_path, out_csv, FAIRLIGHT_CHART_SPEC)
 
 
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="FairlightIngester",
-        description="Parses geometry data copied from Fairlight PDF geometry chart",
+        description="Parses geometry data copied from Fairlight PDF geometry chart. "
+        "Charts named '<model>.txt' are written into data/fairlight/<model>/geometry.csv, "
+        f"{batch.ORIGINAL_CHART_FILE} files are re-ingested in place",
     )
-    parser.add_argument("file")
-    parser.add_argument("-m", "--model", required=True, help="Bike model name")
-    parser.add_argument("-c", "--csv", help="Output csv file")
+    parser.add_argument("inputs", nargs="+", help="Chart files, directories or glob patterns")
+    parser.add_argument("-m", "--model", help="Bike model name of a single chart")
+    parser.add_argument("-c", "--csv", help="Output csv file of a single chart")
+    parser.add_argument("-d", "--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("-j", "--jobs", type=int, help="Number of worker processes")
     args = parser.parse_args()
-    file = Path(args.file)
-    model = args.model
-    csv_arg = args.csv
+    setup_project_root_logging(logging.INFO)
+
+    if args.csv:
+        out_csv = Path(args.csv)
+        out_csv.parent.mkdir(exist_ok=True, parents=True)
+        _parse_file(Path(args.inputs[0]), out_csv)
+        print(f"CSV written to: {out_csv}")
+        return
 
-    build_path = Path("build")
-    build_path.mkdir(exist_ok=True)
-    out_csv = Path(csv_arg or build_path / f"{model}_geometry.csv")
-    out_csv.parent.mkdir(exist_ok=True, parents=True)
-    _parse_file(file, out_csv)
-    print(f"CSV written to: {out_csv}")
+    files = batch.find_chart_files(args.inputs)
+    if args.model and len(files) != 1:
+        parser.error("--model can only be given for a single chart")
+    sources = [batch.chart_source(file, args.model) for file in files]
+    summary = batch.ingest_batch(_parse_file, "Fairlight", sources, args.data_dir, args.jobs)
+    batch.log_summary(summary)
+    if summary.failures:
+        raise SystemExit(1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,391 @@
+import argparse
+import asyncio
+import json
+import logging
+import re
+import time
+import xml.etree.ElementTree as ET
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, replace
+from html.parser import HTMLParser
+from pathlib import Path
+from urllib.parse import urljoin, urlsplit
+from urllib.robotparser import RobotFileParser
+
+from bike_geometry_comparator.ingest.webscraper.fetching import USER_AGENT, default_http_client, fetch_url
+from bike_geometry_comparator.logging.config import setup_project_root_logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_DELAY = 1.0
+_YEAR_PATTERN = re.compile(r"(?:^|-)((?:19|20)\d\d)(?=-|$)")
+
+type Fetch = Callable[[str], bytes]
+
+
+@dataclass(frozen=True)
+class BrandSite:
+    brand: str
+    root: str
+    # regex matched against the URL path of product pages, the "slug" group names the product
+    product_path: str
+    sitemaps: tuple[str, ...] = ("/sitemap.xml",)
+    # category pages listing products, complementing sitemaps which are often incomplete
+    listings: tuple[str, ...] = ()
+    # trailing slug parts naming the build kit rather than the frame, stripped to dedupe URLs by model
+    trim_pattern: str = r"(-(\d+|[ivx]+|disc|di2|axs|etap|frameset|bike))+$"
+
+    @property
+    def host(self) -> str:
+        return urlsplit(self.root).netloc
+
+    def model_key(self, url: str) -> tuple[str, int | None] | None:
+        """Model slug and year of a product page URL, None for any other URL of the site."""
+        match = re.search(self.product_path, urlsplit(url).path)
+        if not match:
+            return None
+        slug = match.group("slug").lower()
+        year = None
+        if year_match := _YEAR_PATTERN.search(slug):
+            year = int(year_match.group(1))
+            slug = _YEAR_PATTERN.sub("", slug, count=1).strip("-")
+        slug = re.sub(self.trim_pattern, "", slug)
+        brand_prefix = re.sub(r"\W+", "-", self.brand.lower()) + "-"
+        return slug.removeprefix(brand_prefix), year
+
+
+# Sites of the brands supported by find_page_parser
+BRAND_SITES = {
+    site.brand: site
+    for site in (
+        BrandSite(
+            "Canyon",
+            "https://www.canyon.com",
+            # /en-de/road-bikes/endurance-bikes/endurace/cf-sl/endurace-cf-sl-8/3711.html
+            r"/[a-z]{2}-[a-z]{2}/(?:[\w-]+/)+(?P<slug>[\w-]+)/\d+\.html$",
+            listings=("/en-de/road-bikes/", "/en-de/gravel-bikes/", "/en-de/mountain-bikes/"),
+        ),
+        BrandSite(
+            "Specialized",
+            "https://www.specialized.com",
+            # /us/en/tarmac-sl8-expert/p/216953
+            r"/[a-z]{2}/[a-z]{2}/(?P<slug>[\w-]+)/p/\d+",
+            trim_pattern=r"(-(\d+|comp|expert|pro|s-works|sport|elite|base|frameset))+$",
+        ),
+        BrandSite(
+            "Giant",
+            "https://www.giant-bicycles.com",
+            # /us/tcr-advanced-pro-0-disc-2025
+            r"^/[a-z]{2}(?:-[a-z]{2})?/(?P<slug>[a-z]+(?:-[\w]+)*-\d[\w-]*)$",
+        ),
+        BrandSite(
+            "Cube",
+            "https://www.cube.eu",
+            # /de-en/cube-attain-c-62-race-ca/858200
+            r"/[a-z]{2}-[a-z]{2}/(?P<slug>cube-[\w-]+)/\d+$",
+            trim_pattern=r"(-(\d+|race|pro|slx|sl|one|ex|c-62|ca|[a-z]{2}'n'[a-z]+))+$",
+        ),
+        BrandSite(
+            "Scott",
+            "https://www.scott-sports.com",
+            # /us/en/product/scott-addict-rc-10-bike
+            r"/[a-z]{2}/[a-z]{2}/product/(?P<slug>scott-[\w-]+-bike)$",
+        ),
+    )
+}
+
+
+@dataclass(frozen=True)
+class ManifestEntry:
+    brand: str
+    model: str
+    year: int | None
+    url: str
+
+
+@dataclass
+class CrawlState:
+    """
+    Progress of a crawl, saved after every fetched page so an interrupted crawl continues where it stopped.
+
+    The checkpoint is removed once the crawl completes without failed pages, otherwise the next crawl resumes it
+    and fetches the failed pages again.
+    """
+
+    # (brand, kind, url) of pages to fetch, kind is "sitemap" or "listing"
+    pending: list[tuple[str, str, str]] = field(default_factory=list)
+    visited: set[str] = field(default_factory=set)
+    # url -> (brand, kind, error) of pages whose fetch failed, they aren't visited
+    failed: dict[str, tuple[str, str, str]] = field(default_factory=dict)
+    # "<brand>|<model slug>|<year>" -> entry
+    entries: dict[str, ManifestEntry] = field(default_factory=dict)
+
+    def add_entry(self, key: str, entry: ManifestEntry) -> None:
+        # several kits of a model share the frame geometry, the smallest URL is kept to make the manifest stable
+        if key not in self.entries or entry.url < self.entries[key].url:
+            self.entries[key] = entry
+
+    def save(self, checkpoint_file: Path) -> None:
+        state = {
+            "pending": self.pending,
+            "visited": sorted(self.visited),
+            "failed": self.failed,
+            "entries": {key: asdict(entry) for key, entry in self.entries.items()},
+        }
+        temp_file = checkpoint_file.with_suffix(".tmp")
+        temp_file.write_text(json.dumps(state, indent=1), encoding="utf-8")
+        temp_file.replace(checkpoint_file)
+
+    @classmethod
+    def load(cls, checkpoint_file: Path) -> "CrawlState":
+        state = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+        return cls(
+            pending=[(brand, kind, url) for brand, kind, url in state["pending"]],
+            visited=set(state["visited"]),
+            failed={url: (brand, kind, error) for url, (brand, kind, error) in state["failed"].items()},
+            entries={key: ManifestEntry(**entry) for key, entry in state["entries"].items()},
+        )
+
+
+def published_model_name(slug: str, name: str | None) -> str:
+    """
+    Model of a product slug spelled as in the product name the site publishes, e.g. "TCR Advanced Pro" of
+    ``tcr-advanced-pro`` and "TCR Advanced Pro 0 Disc". Slug parts missing in the name are kept as they are.
+    """
+    spellings = {re.sub(r"\W+", "", word).lower(): word for word in (name or "").split()}
+    return " ".join(spellings.get(part, part) for part in slug.split("-"))
+
+
+class _LinkParser(HTMLParser):
+    def __init__(self) -> None:
+        super().__init__()
+        # (href, text) of every link
+        self.links: list[tuple[str, str]] = []
+        self._text: list[str] | None = None
+
+    def handle_starttag(self, tag: str, attrs: list[tuple[str, str | None]]) -> None:
+        if tag == "a" and (href := dict(attrs).get("href")):
+            self.links.append((href, ""))
+            self._text = []
+
+    def handle_data(self, data: str) -> None:
+        if self._text is not None:
+            self._text.append(data)
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag == "a" and self._text is not None:
+            self.links[-1] = (self.links[-1][0], " ".join("".join(self._text).split()))
+            self._text = None
+
+
+class _HostPolicy:
+    """Politeness of a single host: one request at a time, a delay between requests and robots.txt rules."""
+
+    def __init__(self, delay: float) -> None:
+        self.lock = asyncio.Lock()
+        self.delay = delay
+        self.robots: RobotFileParser | None = None
+        self.next_request_time = 0.0
+
+    async def wait_turn(self) -> None:
+        if (wait := self.next_request_time - time.monotonic()) > 0:
+            await asyncio.sleep(wait)
+        self.next_request_time = time.monotonic() + self.delay
+
+
+class DiscoveryCrawler:
+    """
+    Enumerate product pages of brand sites from their sitemaps and category listings.
+
+    Pages of different hosts are fetched concurrently, requests to a single host are sequential, respect
+    robots.txt (including its crawl delay) and are spaced by at least ``delay`` seconds. Product URLs are reduced
+    to one manifest entry per (brand, model, year).
+    """
+
+    def __init__(
+        self,
+        sites: list[BrandSite],
+        checkpoint_file: Path,
+        delay: float = DEFAULT_DELAY,
+        concurrency: int = 4,
+        fetch: Fetch | None = None,
+    ) -> None:
+        self._sites = {site.brand: site for site in sites}
+        self._checkpoint_file = checkpoint_file
+        self._delay = delay
+        self._concurrency = concurrency
+        self._fetch = fetch or fetch_url
+        self._hosts: dict[str, _HostPolicy] = {}
+        if checkpoint_file.exists():
+            self.state = CrawlState.load(checkpoint_file)
+            # the checkpoint may come from a crawl of other brands, their progress is dropped
+            if dropped := [page for page in self.state.pending if page[0] not in self._sites]:
+                logger.info(f"Dropping {len(dropped)} pending pages of brands which aren't crawled")
+            self.state.pending = [page for page in self.state.pending if page[0] in self._sites]
+            self.state.entries = {key: entry for key, entry in self.state.entries.items() if entry.brand in self._sites}
+            self.state.failed = {url: page for url, page in self.state.failed.items() if page[0] in self._sites}
+            retried = [(brand, kind, url) for url, (brand, kind, _) in self.state.failed.items()]
+            self.state.pending += [page for page in retried if page not in self.state.pending]
+            logger.info(f"Resuming crawl from {checkpoint_file}: {len(self.state.pending)} pending pages")
+        else:
+            self.state = CrawlState()
+        # sites which the checkpoint doesn't know yet start from their sitemaps and listings
+        for site in sites:
+            seeds = [(site.brand, "sitemap", urljoin(site.root, path)) for path in site.sitemaps]
+            seeds += [(site.brand, "listing", urljoin(site.root, path)) for path in site.listings]
+            self.state.pending += [
+                page for page in seeds if page[2] not in self.state.visited and page not in self.state.pending
+            ]
+
+    async def run(self) -> list[ManifestEntry]:
+        queue: asyncio.Queue[tuple[str, str, str]] = asyncio.Queue()
+        for page in self.state.pending:
+            queue.put_nowait(page)
+
+        async def worker() -> None:
+            while True:
+                page = await queue.get()
+                try:
+                    for new_page in await self._crawl_page(*page):
+                        queue.put_nowait(new_page)
+                finally:
+                    queue.task_done()
+
+        workers = [asyncio.create_task(worker()) for _ in range(self._concurrency)]
+        all_crawled = asyncio.create_task(queue.join())
+        await asyncio.wait([all_crawled, *workers], return_when=asyncio.FIRST_COMPLETED)
+        # workers run until cancelled, one which has finished was stopped by an error
+        crashed = [task for task in workers if task.done()]
+        for task in [all_crawled, *workers]:
+            task.cancel()
+        if crashed and (error := crashed[0].exception()):
+            raise error
+        if self.state.failed:
+            logger.info(
+                f"Keeping {self._checkpoint_file}, the next crawl fetches {len(self.state.failed)} failed pages"
+            )
+        else:
+            self._checkpoint_file.unlink(missing_ok=True)
+        return self.manifest()
+
+    def manifest(self) -> list[ManifestEntry]:
+        return sorted(self.state.entries.values(), key=lambda entry: (entry.brand, entry.model, entry.year or 0))
+
+    async def _crawl_page(self, brand: str, kind: str, url: str) -> list[tuple[str, str, str]]:
+        site = self._sites[brand]
+        new_pages: list[tuple[str, str, str]] = []
+        if url not in self.state.visited:
+            try:
+                content = await self._fetch_politely(site, url)
+            except OSError as ex:
+                # not visited, a resumed crawl fetches it again
+                logger.warning(f"Cannot fetch {url}: {ex}")
+                self.state.failed[url] = (brand, kind, str(ex))
+            else:
+                if content is not None:
+                    new_pages = (
+                        self._parse_sitemap(site, content)
+                        if kind == "sitemap"
+                        else self._parse_listing(site, url, content)
+                    )
+                    new_pages = [page for page in new_pages if page[2] not in self.state.visited]
+                self.state.visited.add(url)
+                self.state.failed.pop(url, None)
+
+        self.state.pending.remove((brand, kind, url))
+        self.state.pending += new_pages
+        self.state.save(self._checkpoint_file)
+        return new_pages
+
+    async def _fetch_politely(self, site: BrandSite, url: str) -> bytes | None:
+        host = self._hosts.setdefault(site.host, _HostPolicy(self._delay))
+        async with host.lock:
+            if host.robots is None:
+                host.robots = await self._read_robots(site, host)
+            if not host.robots.can_fetch(USER_AGENT, url):
+                logger.info(f"Skipping {url} disallowed by robots.txt")
+                return None
+            await host.wait_turn()
+            return await asyncio.to_thread(self._fetch, url)
+
+    async def _read_robots(self, site: BrandSite, host: _HostPolicy) -> RobotFileParser:
+        robots_url = urljoin(site.root, "/robots.txt")
+        robots = RobotFileParser(robots_url)
+        try:
+            robots.parse((await asyncio.to_thread(self._fetch, robots_url)).decode("utf-8", "replace").splitlines())
+        except OSError as ex:
+            logger.debug(f"No robots.txt of {site.host}: {ex}")
+            robots.parse([])
+        crawl_delay = robots.crawl_delay(USER_AGENT)
+        host.delay = max(host.delay, float(crawl_delay or 0))
+        return robots
+
+    def _parse_sitemap(self, site: BrandSite, content: bytes) -> list[tuple[str, str, str]]:
+        try:
+            root = ET.fromstring(content)
+        except ET.ParseError as ex:
+            logger.warning(f"Malformed sitemap of {site.brand}: {ex}")
+            return []
+        if root.tag.endswith("sitemapindex"):
+            locations = [(element.text or "").strip() for element in root.iter() if element.tag.endswith("loc")]
+            return [(site.brand, "sitemap", location) for location in locations]
+        for url in root:
+            location = next((child.text or "" for child in url if child.tag.endswith("loc")), "").strip()
+            # product names are published by image and video sitemap extensions, e.g. <image:title>
+            title = next((element.text for element in url.iter() if element.tag.endswith("title")), None)
+            self._add_product(site, location, title)
+        return []
+
+    def _parse_listing(self, site: BrandSite, url: str, content: bytes) -> list[tuple[str, str, str]]:
+        parser = _LinkParser()
+        parser.feed(content.decode("utf-8", "replace"))
+        for link, text in parser.links:
+            self._add_product(site, urljoin(url, link), text)
+        return []
+
+    def _add_product(self, site: BrandSite, url: str, name: str | None) -> None:
+        if urlsplit(url).netloc != site.host or not (model_key := site.model_key(url)):
+            return
+        slug, year = model_key
+        # the data directory is named by the slug of the model at ingest, see batch.prepare_model_dir
+        model = published_model_name(slug, name)
+        self.state.add_entry(f"{site.brand}|{slug}|{year}", ManifestEntry(site.brand, model, year, url))
+
+
+def write_manifest(entries: list[ManifestEntry], manifest_file: Path) -> None:
+    manifest_file.parent.mkdir(parents=True, exist_ok=True)
+    with open(manifest_file, "w", encoding="utf-8") as f:
+        f.writelines(json.dumps(asdict(entry)) + "\n" for entry in entries)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        prog="GeometryDiscovery",
+        description="Discovers product pages of supported brands and writes them into a manifest for batch ingest",
+    )
+    parser.add_argument("brands", nargs="*", help=f"Brands to crawl, one of {', '.join(BRAND_SITES)}, all by default")
+    parser.add_argument("-o", "--manifest", type=Path, default=Path("build/manifest.jsonl"))
+    parser.add_argument("--checkpoint", type=Path, default=Path("build/discovery_checkpoint.json"))
+    parser.add_argument("--fresh", action="store_true", help="Ignore the checkpoint of a previous crawl")
+    parser.add_argument("--delay", type=float, default=DEFAULT_DELAY, help="Seconds between requests to a host")
+    parser.add_argument("--root", help="Override the site root of a single brand, e.g. a local mirror")
+    parser.add_argument("--insecure", action="store_true", help="Don't verify SSL certificates")
+    args = parser.parse_args()
+    setup_project_root_logging(logging.INFO)
+    default_http_client.verify_ssl = not args.insecure
+    if unknown_brands := set(args.brands) - BRAND_SITES.keys():
+        parser.error(f"Unknown brands {', '.join(sorted(unknown_brands))}")
+
+    sites = [BRAND_SITES[brand] for brand in args.brands or BRAND_SITES]
+    if args.root:
+        if len(sites) != 1:
+            parser.error("--root can only be given for a single brand")
+        sites = [replace(sites[0], root=args.root)]
+    if args.fresh:
+        args.checkpoint.unlink(missing_ok=True)
+    args.checkpoint.parent.mkdir(parents=True, exist_ok=True)
+
+    crawler = DiscoveryCrawler(sites, args.checkpoint, args.delay)
+    entries = asyncio.run(crawler.run())
+    write_manifest(entries, args.manifest)
+    logger.info(f"{len(entries)} models written to {args.manifest}, {len(crawler.state.failed)} pages failed")
@@ -0,0 +1,139 @@
+import logging
+import random
+import ssl
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from urllib.error import HTTPError, URLError
+from urllib.parse import urlsplit
+from urllib.request import Request, urlopen
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = "Mozilla/5.0 (X11; Linux i686) AppleWebKit/537.17 (KHTML, like Gecko) Chrome/24.0.1312.27 Safari/537.17"
+# Statuses which say the server is temporarily unable to answer, any other HTTP error is final
+RETRYABLE_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+
+class FetchError(OSError):
+    pass
+
+
+class CircuitOpenError(FetchError):
+    pass
+
+
+@dataclass
+class _HostCircuit:
+    failures: int = 0
+    opened_at: float | None = None
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Per-host circuit breaker.
+
+    After ``failure_threshold`` consecutive failed fetches a host is skipped for ``reset_timeout`` seconds, then a
+    single trial request decides whether it's closed again or stays open for another period.
+    """
+
+    failure_threshold: int = 5
+    reset_timeout: float = 60.0
+    clock: Callable[[], float] = time.monotonic
+    _hosts: dict[str, _HostCircuit] = field(default_factory=dict)
+
+    def allow(self, host: str) -> bool:
+        circuit = self._hosts.get(host)
+        if circuit is None or circuit.opened_at is None:
+            return True
+        if self.clock() - circuit.opened_at >= self.reset_timeout:
+            # half-open: let one trial request through, a failure opens the circuit again
+            circuit.opened_at = self.clock()
+            return True
+        return False
+
+    def record_success(self, host: str) -> None:
+        self._hosts.pop(host, None)
+
+    def record_failure(self, host: str) -> None:
+        circuit = self._hosts.setdefault(host, _HostCircuit())
+        circuit.failures += 1
+        if circuit.failures >= self.failure_threshold:
+            if circuit.opened_at is None:
+                logger.warning(f"{host} failed {circuit.failures} times in a row, pausing requests to it")
+            circuit.opened_at = self.clock()
+
+
+class HttpClient:
+    """
+    Fetches pages with retries of transient failures.
+
+    Connection errors, timeouts and retryable HTTP statuses are retried with exponential backoff and full jitter,
+    honouring ``Retry-After``. Hosts which keep failing are short-circuited by a :class:`CircuitBreaker`.
+    SSL certificates are verified unless ``verify_ssl`` is disabled.
+    """
+
+    def __init__(
+        self,
+        verify_ssl: bool = True,
+        max_attempts: int = 4,
+        backoff_base: float = 1.0,
+        max_backoff: float = 30.0,
+        timeout: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ) -> None:
+        self.verify_ssl = verify_ssl
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.breaker = breaker or CircuitBreaker()
+        self._sleep = sleep
+
+    def fetch(self, url: str) -> bytes:
+        host = urlsplit(url).netloc
+        for attempt in range(1, self.max_attempts + 1):
+            if not self.breaker.allow(host):
+                raise CircuitOpenError(f"Requests to {host} are paused after repeated failures")
+            try:
+                content = self._get(url)
+            except HTTPError as ex:
+                if ex.code not in RETRYABLE_STATUSES:
+                    raise FetchError(f"HTTP {ex.code} {ex.reason}") from ex
+                error: Exception = ex
+                retry_after = ex.headers.get("Retry-After") if ex.headers else None
+            except (URLError, TimeoutError, ConnectionError) as ex:
+                error, retry_after = ex, None
+            else:
+                self.breaker.record_success(host)
+                return content
+
+            self.breaker.record_failure(host)
+            if attempt == self.max_attempts:
+                raise FetchError(f"{url} failed after {attempt} attempts: {error}") from error
+            delay = self.backoff_delay(attempt, retry_after)
+            logger.info(f"Fetching {url} failed ({error}), retrying in {delay:.1f} s")
+            self._sleep(delay)
+        raise AssertionError("unreachable")
+
+    def backoff_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff_base * 2 ** (attempt - 1)))
+
+    def _get(self, url: str) -> bytes:
+        context = None if self.verify_ssl else ssl._create_unverified_context()
+        with urlopen(
+            Request(url, headers={"User-Agent": USER_AGENT}), timeout=self.timeout, context=context
+        ) as response:
+            return response.read()
+
+
+# Client shared by the scrapers, command line tools configure it from their arguments
+default_http_client = HttpClient()
+
+
+def fetch_url(url: str) -> bytes:
+    return default_http_client.fetch(url)
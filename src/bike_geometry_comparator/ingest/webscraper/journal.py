@@ -0,0 +1,96 @@
+import sqlite3
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class ScrapeJob:
+    url: str
+    brand: str
+    model: str
+    year: int | None = None
+    state: str = PENDING
+    attempts: int = 0
+    last_error: str | None = None
+    output: str | None = None
+
+
+class CrawlJournal:
+    """
+    Durable state of scrape jobs in a SQLite file, one row per URL.
+
+    Every state change is committed immediately, so a run which stops for any reason resumes with exactly the jobs
+    which weren't finished. Failed jobs stay pending until they run out of attempts.
+    """
+
+    def __init__(self, journal_file: Path) -> None:
+        journal_file.parent.mkdir(parents=True, exist_ok=True)
+        self._con = sqlite3.connect(journal_file)
+        self._con.execute("""
+CREATE TABLE IF NOT EXISTS scrape_jobs (
+    url TEXT PRIMARY KEY,
+    brand TEXT NOT NULL,
+    model TEXT NOT NULL,
+    year INTEGER,
+    state TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    output TEXT,
+    updated_at REAL
+)""")
+        self._con.commit()
+
+    def close(self) -> None:
+        self._con.close()
+
+    def add_jobs(self, jobs: Iterable[ScrapeJob]) -> int:
+        """Add jobs of URLs which aren't in the journal yet, return the number of added jobs."""
+        with self._con:
+            cursor = self._con.executemany(
+                "INSERT OR IGNORE INTO scrape_jobs (url, brand, model, year, updated_at) VALUES (?, ?, ?, ?, ?)",
+                [(job.url, job.brand, job.model, job.year, time.time()) for job in jobs],
+            )
+        return cursor.rowcount
+
+    def pending_jobs(self, max_attempts: int) -> list[ScrapeJob]:
+        rows = self._con.execute(
+            "SELECT url, brand, model, year, state, attempts, last_error, output FROM scrape_jobs "
+            "WHERE state = ? AND attempts < ? ORDER BY brand, model, year, url",
+            (PENDING, max_attempts),
+        ).fetchall()
+        return [ScrapeJob(*row) for row in rows]
+
+    def mark_done(self, url: str, output: Path) -> None:
+        self._update(url, "state = ?, output = ?, last_error = NULL", DONE, str(output))
+
+    def mark_failed(self, url: str, error: str, max_attempts: int) -> None:
+        """Record a failed attempt, the job stays pending while it has attempts left."""
+        with self._con:
+            self._con.execute(
+                "UPDATE scrape_jobs SET attempts = attempts + 1, last_error = ?, updated_at = ?, "
+                "state = CASE WHEN attempts + 1 >= ? THEN ? ELSE ? END WHERE url = ?",
+                (error, time.time(), max_attempts, FAILED, PENDING, url),
+            )
+
+    def retry_failed(self) -> int:
+        """Give failed jobs a new set of attempts."""
+        with self._con:
+            cursor = self._con.execute(
+                "UPDATE scrape_jobs SET state = ?, attempts = 0 WHERE state = ?", (PENDING, FAILED)
+            )
+        return cursor.rowcount
+
+    def counts(self) -> dict[str, int]:
+        return dict(self._con.execute("SELECT state, count(*) FROM scrape_jobs GROUP BY state").fetchall())
+
+    def _update(self, url: str, assignments: str, *params: str) -> None:
+        with self._con:
+            self._con.execute(
+                f"UPDATE scrape_jobs SET {assignments}, updated_at = ? WHERE url = ?", (*params, time.time(), url)
+            )
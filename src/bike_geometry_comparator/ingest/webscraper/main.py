@@ -1,8 +1,16 @@
 import argparse
-import ssl
+import json
+import logging
+import time
 from pathlib import Path
 from urllib.parse import urlparse
-from urllib.request import Request, urlopen
+
+from bike_geometry_comparator.ingest import batch
+from bike_geometry_comparator.ingest.webscraper.fetching import CircuitOpenError, HttpClient, default_http_client
+from bike_geometry_comparator.ingest.webscraper.journal import CrawlJournal, ScrapeJob
+from bike_geometry_comparator.logging.config import setup_project_root_logging
+
+logger = logging.getLogger(__name__)
 
 
 def find_page_parser(url):
@@ -34,40 +42,95 @@ def find_page_parser(url):
 def main() -> None:
     parser = argparse.ArgumentParser(
         prog="GeometryWebscraper",
-        description="Web scraper which parses geometry data from the web page",
+        description="Web scraper which parses geometry data from the web page. "
+        "Either a single page is parsed into a csv file or all pages of a discovery manifest "
+        "are scraped into the data directory, resuming from the job journal of previous runs.",
     )
-    parser.add_argument("url")
-    parser.add_argument("-m", "--model", required=True, help="Bike model name")
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("-m", "--model", help="Bike model name")
     parser.add_argument("-c", "--csv", help="Output csv file")
+    parser.add_argument("--manifest", type=Path, help="JSONL manifest of pages written by ingest_discover")
+    parser.add_argument("--journal", type=Path, default=Path("build/ingest_journal.sqlite"))
+    parser.add_argument("-d", "--data-dir", type=Path, default=Path("data"))
+    parser.add_argument("--max-attempts", type=int, default=3, help="Runs in which a failing page is retried")
+    parser.add_argument("--retry-failed", action="store_true", help="Retry pages which ran out of attempts")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between requests to a host")
+    parser.add_argument("--insecure", action="store_true", help="Don't verify SSL certificates")
     args = parser.parse_args()
-    url = urlparse(args.url)
-    model = args.model
+    default_http_client.verify_ssl = not args.insecure
 
     build_path = Path("build")
     build_path.mkdir(exist_ok=True)
-    html = Path(build_path / f"{model}.html")
-
-    disable_ssl_certificate_validation()
-
-    headers = {}
-    headers["User-Agent"] = (
-        "Mozilla/5.0 (X11; Linux i686) AppleWebKit/537.17 (KHTML, like Gecko) Chrome/24.0.1312.27 Safari/537.17"
-    )
-    request = Request(args.url, headers=headers)
-    with urlopen(request) as source, open(html, "wb") as target:
-        target.write(source.read())
-
-    csv_arg = args.csv
-    parse_page = find_page_parser(url)
-
-    out_csv = Path(csv_arg or build_path / f"{model}_geometry.csv")
+    if args.url:
+        if not args.model:
+            parser.error("--model is required to scrape a single page")
+        out_csv = Path(args.csv or build_path / f"{args.model}_geometry.csv")
+        scrape_page(args.url, build_path / f"{args.model}.html", out_csv)
+        print(f"CSV written to: {out_csv}")
+        return
+
+    setup_project_root_logging(logging.INFO)
+    journal = CrawlJournal(args.journal)
+    if args.manifest:
+        with open(args.manifest, encoding="utf-8") as f:
+            added = journal.add_jobs(ScrapeJob(**json.loads(line)) for line in f if line.strip())
+        logger.info(f"{added} new pages added to {args.journal}")
+    if args.retry_failed:
+        logger.info(f"{journal.retry_failed()} failed pages will be retried")
+    scrape_journal(journal, args.data_dir, build_path / "html", args.max_attempts, args.delay)
+    logger.info(f"Journal {args.journal}: {journal.counts()}")
+    journal.close()
+
+
+def scrape_page(url: str, html: Path, out_csv: Path, client: HttpClient = default_http_client) -> None:
+    parse_page = find_page_parser(urlparse(url))
+    html.parent.mkdir(parents=True, exist_ok=True)
+    html.write_bytes(client.fetch(url))
     out_csv.parent.mkdir(exist_ok=True, parents=True)
     parse_page(html, out_csv)
-    print(f"CSV written to: {out_csv}")
 
 
-def disable_ssl_certificate_validation():
-    ssl._create_default_https_context = ssl._create_unverified_context
+def scrape_journal(
+    journal: CrawlJournal,
+    data_dir: Path,
+    html_dir: Path,
+    max_attempts: int,
+    delay: float,
+    client: HttpClient = default_http_client,
+) -> None:
+    """
+    Scrape pending jobs of the journal into ``<data_dir>/<brand>/<model>/[<year>/]geometry.csv``.
+
+    Every finished or failed page is committed to the journal right away. Pages of hosts whose circuit is open
+    are left pending for the next run without spending an attempt.
+    """
+    last_request: dict[str, float] = {}
+    for job in journal.pending_jobs(max_attempts):
+        host = urlparse(job.url).netloc
+        if not client.breaker.allow(host):
+            logger.info(f"Skipping {job.url}, requests to {host} are paused")
+            continue
+        if (wait := last_request.get(host, 0) + delay - time.monotonic()) > 0:
+            time.sleep(wait)
+        last_request[host] = time.monotonic()
+
+        html = html_dir / f"{batch.slugify(job.brand)}_{batch.slugify(job.model)}_{job.year or ''}.html"
+        # the data directory is only touched once the page is parsed
+        parsed_csv = html.with_suffix(".csv")
+        try:
+            scrape_page(job.url, html, parsed_csv, client)
+            if not batch.count_rows(parsed_csv):
+                raise ValueError("No geometry rows were parsed")
+            out_csv = batch.prepare_model_dir(data_dir, job.brand, job.model, job.year) / "geometry.csv"
+            parsed_csv.replace(out_csv)
+        except CircuitOpenError as ex:
+            logger.info(f"Skipping {job.url}: {ex}")
+        except (OSError, ValueError, LookupError, AssertionError) as ex:
+            logger.warning(f"Scraping {job.url} failed: {ex}")
+            journal.mark_failed(job.url, f"{type(ex).__name__}: {ex}", max_attempts)
+        else:
+            logger.info(f"{job.url} -> {out_csv}")
+            journal.mark_done(job.url, out_csv)
 
 
 if __name__ == "__main__":
@@ -1,9 +1,9 @@
 import csv
 import re
-import ssl
 from html.parser import HTMLParser
 from pathlib import Path
-from urllib.request import Request, urlopen
+
+from bike_geometry_comparator.ingest.webscraper.fetching import fetch_url
 
 
 class ScottGeometryURLParser(HTMLParser):
@@ -128,13 +128,7 @@ def parse_scott_geometry(html_path: str | Path, csv_path: str | Path):
         return
 
     # Fetch external geometry table
-    ssl_context = ssl._create_unverified_context()
-    headers = {
-        "User-Agent": "Mozilla/5.0 (X11; Linux i686) AppleWebKit/537.17 (KHTML, like Gecko) Chrome/24.0.1312.27 Safari/537.17"
-    }
-    request = Request(url_parser.geometry_url, headers=headers)
-    with urlopen(request, context=ssl_context) as response:
-        table_html = response.read().decode("utf-8")
+    table_html = fetch_url(url_parser.geometry_url).decode("utf-8")
 
     table_parser = ScottGeometryTableParser()
     table_parser.feed(table_html)
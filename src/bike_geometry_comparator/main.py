@@ -1,35 +1,294 @@
+import argparse
+import asyncio
 import logging
-import os
+import shutil
 from pathlib import Path
+from typing import Any
 
 import duckdb
 from rich.console import Console
 from rich.table import Table
 
 from bike_geometry_comparator.assembly import assemble_geometry_database
+from bike_geometry_comparator.cockpit import HANDLEBAR_TOLERANCE, HandlebarTarget, solve_cockpit
+from bike_geometry_comparator.database.carryover import GEOMETRY_BLOCKS_FILE, YEAR_REFERENCES_FILE
+from bike_geometry_comparator.database.search_index import DEFAULT_MATCHES, SEARCH_INDEX_FILE, SearchIndex
+from bike_geometry_comparator.diff import diff_builds
+from bike_geometry_comparator.export import EXPORT_FORMATS, export_database
+from bike_geometry_comparator.fit import RiderProfile, recommend_sizes
 from bike_geometry_comparator.logging.colors import ColorCodes
 from bike_geometry_comparator.logging.config import setup_project_root_logging
+from bike_geometry_comparator.query_cache import QueryCache
+from bike_geometry_comparator.server import serve
+from bike_geometry_comparator.similarity import DEFAULT_NEIGHBORS, SIMILAR_FRAMES_FILE, SimilarFramesOptions
+from bike_geometry_comparator.viewer import PAGE_SIZE, ResultPager, browse
+from bike_geometry_comparator.watch import DEBOUNCE, POLL_INTERVAL, GeometryWatcher
 
 logger = logging.getLogger(__name__)
 
+BUILD_PATH = Path("build")
+DATABASE_FILE = BUILD_PATH / "database.csv"
+PREVIOUS_DATABASE_FILE = BUILD_PATH / "database.previous.csv"
+CHANGE_FEED_FILE = BUILD_PATH / "changes.jsonl"
+DATA_DIR = Path("data")
+QUERY_CACHE_DIR = BUILD_PATH / "query_cache"
+BUILD_PREVIEW_ROWS = 25
+
 
 def main() -> None:
+    parser = argparse.ArgumentParser(prog="bgc", description="Bike geometries database and comparison tool")
+    subparsers = parser.add_subparsers(dest="command")
+    build_parser = subparsers.add_parser("build", help=f"Assemble {DATABASE_FILE} from {DATA_DIR} (default command)")
+    build_parser.add_argument(
+        "--similar-frames",
+        action="store_true",
+        help=f"Precompute nearest frames of other models into {BUILD_PATH / SIMILAR_FRAMES_FILE}",
+    )
+    build_parser.add_argument(
+        "--frame-blocks",
+        action="store_true",
+        help=f"Also write the database deduplicated into {BUILD_PATH / GEOMETRY_BLOCKS_FILE} and "
+        f"{BUILD_PATH / YEAR_REFERENCES_FILE}",
+    )
+    build_parser.add_argument("-k", type=int, default=DEFAULT_NEIGHBORS, help="Number of similar frames of every size")
+    build_parser.add_argument("-j", "--jobs", type=int, default=1, help="Number of processes computing similar frames")
+
+    watch_parser = subparsers.add_parser("watch", help=f"Rebuild {DATABASE_FILE} whenever files of {DATA_DIR} change")
+    watch_parser.add_argument("--client-dir", type=Path, help="Directory the database is also copied to")
+    watch_parser.add_argument("--interval", type=float, default=POLL_INTERVAL, help="Polling interval in seconds")
+    watch_parser.add_argument(
+        "--debounce", type=float, default=DEBOUNCE, help="Quiet period in seconds before a batch of edits is rebuilt"
+    )
+
+    fit_parser = subparsers.add_parser("fit", help="Recommend the best fitting size of every model for a rider")
+    fit_parser.add_argument("--height", type=int, required=True, help="Rider height in cm")
+    fit_parser.add_argument("--inseam", type=int, required=True, help="Rider inseam in cm")
+    fit_parser.add_argument("-n", "--limit", type=int, default=25, help="Number of models to show")
+
+    search_parser = subparsers.add_parser("search", help="Fuzzy search of brands, models, years and sizes")
+    search_parser.add_argument("query", nargs="+", help='Search text, e.g. "endurace cf"')
+    search_parser.add_argument("-n", "--limit", type=int, default=DEFAULT_MATCHES, help="Number of matches to show")
+
+    cockpit_parser = subparsers.add_parser(
+        "cockpit", help="Find frames which reach a handlebar position with some stem and spacers"
+    )
+    cockpit_parser.add_argument("--stack", type=int, required=True, help="Handlebar stack in mm")
+    cockpit_parser.add_argument("--reach", type=int, required=True, help="Handlebar reach in mm")
+    cockpit_parser.add_argument(
+        "--tolerance", type=float, default=HANDLEBAR_TOLERANCE, help="Largest distance from the target in mm"
+    )
+    cockpit_parser.add_argument("-n", "--limit", type=int, default=25, help="Number of models to show")
+
+    diff_parser = subparsers.add_parser("diff", help="Show rows changed between two database builds")
+    diff_parser.add_argument("old", nargs="?", type=Path, default=PREVIOUS_DATABASE_FILE)
+    diff_parser.add_argument("new", nargs="?", type=Path, default=DATABASE_FILE)
+    diff_parser.add_argument("-o", "--output", type=Path, default=CHANGE_FEED_FILE, help="JSONL change feed file")
+
+    view_parser = subparsers.add_parser("view", help=f"Browse rows of {DATABASE_FILE} page by page")
+    view_parser.add_argument("-w", "--where", help="SQL filter expression, e.g. \"brand = 'Canyon'\"")
+    view_parser.add_argument("-s", "--sort", help="Column to sort by")
+    view_parser.add_argument("--desc", action="store_true", help="Sort in descending order")
+    view_parser.add_argument("--page-size", type=int, default=PAGE_SIZE, help="Number of rows of a page")
+
+    export_parser = subparsers.add_parser("export", help=f"Export filtered rows of {DATABASE_FILE}")
+    export_parser.add_argument("-o", "--output", type=Path, help="Output file, stdout if not given")
+    export_parser.add_argument(
+        "-f", "--format", choices=EXPORT_FORMATS, help="Output format, by the output file suffix if not given (csv)"
+    )
+    export_parser.add_argument("-w", "--where", help="SQL filter expression, e.g. \"brand = 'Canyon'\"")
+    export_parser.add_argument("-c", "--columns", help="Comma separated columns to export, all if not given")
+    export_parser.add_argument("--facets", type=Path, help="Also write the facet cube of the exported rows as csv")
+
+    serve_parser = subparsers.add_parser("serve", help=f"Serve read-only HTTP queries over {DATABASE_FILE}")
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8000)
+    serve_parser.add_argument("--pool-size", type=int, default=8, help="Number of concurrently running queries")
+
+    args = parser.parse_args()
+    match args.command:
+        case None:
+            build()
+        case "build":
+            build(args.similar_frames, args.k, args.jobs, args.frame_blocks)
+        case "watch":
+            watch(args.client_dir, args.interval, args.debounce)
+        case "fit":
+            fit(args.height, args.inseam, args.limit)
+        case "search":
+            search(" ".join(args.query), args.limit)
+        case "cockpit":
+            cockpit(HandlebarTarget(args.stack, args.reach, args.tolerance), args.limit)
+        case "diff":
+            diff(args.old, args.new, args.output)
+        case "view":
+            view(args.where, args.sort, args.desc, args.page_size)
+        case "export":
+            columns = [column.strip() for column in args.columns.split(",")] if args.columns else None
+            export(args.output, args.format, args.where, columns, args.facets)
+        case "serve":
+            serve_database(args.host, args.port, args.pool_size)
+
+
+def build(similar_frames: bool = False, k: int = DEFAULT_NEIGHBORS, jobs: int = 1, frame_blocks: bool = False) -> None:
     setup_project_root_logging(logging.DEBUG)
-    build_path = Path("build")
-    database_file = build_path / "database.csv"
-    if database_file.exists():
-        os.remove(database_file)
-    build_path.mkdir(exist_ok=True)
+    if DATABASE_FILE.exists():
+        # the build leaves an unchanged database file untouched, so the previous one is kept as a copy
+        shutil.copyfile(DATABASE_FILE, PREVIOUS_DATABASE_FILE)
+    BUILD_PATH.mkdir(exist_ok=True)
+
+    assemble_geometry_database(
+        DATA_DIR, DATABASE_FILE, frame_blocks, SimilarFramesOptions(k, jobs) if similar_frames else None
+    )
+    logger.info(
+        f"{ColorCodes.OKGREEN}Build succesfully finished{ColorCodes.ENDC}. First {BUILD_PREVIEW_ROWS} rows "
+        "(browse all of them with `bgc view`):"
+    )
+
+    # a one-off query, caching it would only leave an entry behind
+    preview = duckdb.execute(f"SELECT * FROM '{DATABASE_FILE}' LIMIT {BUILD_PREVIEW_ROWS}")
+    print_table([column for column, *_ in preview.description or []], preview.fetchall())
+
+
+def watch(client_dir: Path | None, interval: float, debounce: float) -> None:
+    setup_project_root_logging(logging.INFO)
+    watcher = GeometryWatcher(DATA_DIR, DATABASE_FILE, client_dir)
+    try:
+        watcher.watch(interval, debounce)
+    except KeyboardInterrupt:
+        logger.info("Watch stopped")
+    finally:
+        watcher.close()
+
+
+def fit(height: int, inseam: int, limit: int) -> None:
+    setup_project_root_logging(logging.INFO)
+    if not DATABASE_FILE.exists():
+        raise SystemExit(f"{DATABASE_FILE} is not found, run `bgc build` first")
+
+    cache = QueryCache(disk_dir=QUERY_CACHE_DIR)
+    recommendations = recommend_sizes(DATABASE_FILE, RiderProfile(height, inseam), limit, cache)
+    logger.info(f"Best fitting sizes for a rider {height} cm tall with {inseam} cm inseam:")
+    print_table(
+        ["brand", "model", "year", "size", "stack", "reach", "fit_distance"],
+        [(r.brand, r.model, r.year, r.size, r.stack, r.reach, f"{r.fit_distance:.2f}") for r in recommendations],
+    )
+    logger.info(f"Query cache: {cache.stats}")
+
+
+def search(query: str, limit: int) -> None:
+    setup_project_root_logging(logging.INFO)
+    index_file = BUILD_PATH / SEARCH_INDEX_FILE
+    if not index_file.exists():
+        raise SystemExit(f"{index_file} is not found, run `bgc build` first")
+
+    matches = SearchIndex.load(index_file).search(query, limit)
+    print_table(
+        ["brand", "model", "year", "sizes", "score"],
+        [(m.brand, m.model, m.year, " ".join(m.sizes), f"{m.score:.3f}") for m in matches],
+    )
+
+
+def cockpit(target: HandlebarTarget, limit: int) -> None:
+    setup_project_root_logging(logging.INFO)
+    if not DATABASE_FILE.exists():
+        raise SystemExit(f"{DATABASE_FILE} is not found, run `bgc build` first")
+
+    cache = QueryCache(disk_dir=QUERY_CACHE_DIR)
+    solutions = solve_cockpit(DATABASE_FILE, target, limit=limit, cache=cache)
+    logger.info(f"Frames putting the handlebar at {target.stack} mm stack and {target.reach} mm reach:")
+    print_table(
+        [
+            "brand",
+            "model",
+            "year",
+            "size",
+            "stem",
+            "angle",
+            "spacers",
+            "handlebar stack",
+            "handlebar reach",
+            "distance",
+        ],
+        [
+            (s.brand, s.model, s.year, s.size, s.stem_length, s.stem_angle, s.spacers)
+            + (s.handlebar_stack, s.handlebar_reach, s.distance)
+            for s in solutions
+        ],
+    )
+    logger.info(f"Query cache: {cache.stats}")
+
+
+def diff(old_file: Path, new_file: Path, feed_file: Path) -> None:
+    setup_project_root_logging(logging.INFO)
+    for database_file in (old_file, new_file):
+        if not database_file.exists():
+            raise SystemExit(
+                f"{database_file} is not found, `bgc build` keeps the previous build in {PREVIOUS_DATABASE_FILE}"
+            )
+
+    build_diff = diff_builds(old_file, new_file, feed_file)
+    logger.info(f"{new_file} compared with {old_file}: {build_diff}")
+    for label, columns in (("Added", build_diff.added_columns), ("Removed", build_diff.removed_columns)):
+        if columns:
+            logger.info(f"{label} columns: {', '.join(columns)}")
+    if build_diff.changed_columns:
+        print_table(["column", "changed rows"], list(build_diff.changed_columns.items()))
+    logger.info(f"Change feed is written to {feed_file}")
+
+
+def view(where: str | None, sort: str | None, descending: bool, page_size: int) -> None:
+    if not DATABASE_FILE.exists():
+        raise SystemExit(f"{DATABASE_FILE} is not found, run `bgc build` first")
+
+    pager = ResultPager(DATABASE_FILE, page_size)
+    try:
+        pager.sort(sort, descending)
+        pager.filter(where)
+        browse(pager, Console())
+    except ValueError as ex:
+        raise SystemExit(str(ex)) from ex
+    except KeyboardInterrupt:
+        pass
+    finally:
+        pager.close()
+
+
+def export(
+    output: Path | None,
+    export_format: str | None,
+    where: str | None,
+    columns: list[str] | None,
+    facets_output: Path | None = None,
+) -> None:
+    # logs go to stdout, they would mix with the exported rows
+    if output:
+        setup_project_root_logging(logging.INFO)
+    if not DATABASE_FILE.exists():
+        raise SystemExit(f"{DATABASE_FILE} is not found, run `bgc build` first")
+    if export_format is None:
+        suffix = output.suffix.lstrip(".") if output else ""
+        export_format = suffix if suffix in EXPORT_FORMATS else "csv"
+
+    try:
+        export_database(DATABASE_FILE, output, export_format, where, columns, facets_output)
+    except duckdb.Error as ex:
+        raise SystemExit(f"Export failed: {ex}") from ex
+    if output:
+        logger.info(f"Exported {export_format} to {output}")
+
+
+def serve_database(host: str, port: int, pool_size: int) -> None:
+    setup_project_root_logging(logging.INFO)
+    if not DATABASE_FILE.exists():
+        raise SystemExit(f"{DATABASE_FILE} is not found, run `bgc build` first")
 
-    data_dir = Path("data")
-    assemble_geometry_database(data_dir, database_file)
-    logger.info(f"{ColorCodes.OKGREEN}Build succesfully finished{ColorCodes.ENDC}. Top 100 rows:")
+    try:
+        asyncio.run(serve(DATABASE_FILE, host, port, pool_size))
+    except KeyboardInterrupt:
+        logger.info("Server stopped")
 
-    con = duckdb.connect()
-    res = con.query(f"SELECT * FROM '{database_file}' LIMIT 25")
-    rows = res.fetchall()
-    columns = res.columns
 
+def print_table(columns: list[str], rows: list[tuple[Any, ...]]) -> None:
     table = Table(show_header=True)
     for col in columns:
         table.add_column(col)
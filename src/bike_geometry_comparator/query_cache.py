@@ -0,0 +1,165 @@
+import hashlib
+import logging
+import os
+import pickle
+import re
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, TypeVar
+
+import duckdb
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_HASH_CHUNK_SIZE = 1 << 20
+# a file modified this recently may be rewritten again within the same timestamp tick of coarse file systems
+_RACY_MODIFICATION_NS = 2_000_000_000
+
+
+@dataclass
+class CacheStats:
+    memory_hits: int = 0
+    disk_hits: int = 0
+    misses: int = 0
+
+    @property
+    def requests(self) -> int:
+        return self.memory_hits + self.disk_hits + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.memory_hits + self.disk_hits) / self.requests if self.requests else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.requests} requests, hit rate {self.hit_rate:.1%} "
+            f"(memory {self.memory_hits}, disk {self.disk_hits}, misses {self.misses})"
+        )
+
+
+def database_build_hash(database_file: Path) -> str:
+    """
+    SHA-256 of the database file content, recomputed only when the file is modified.
+
+    The file is identified by its inode, size and modification and change times, so a build swapped in with
+    ``os.replace`` is always rehashed. A file modified in the last two seconds is rehashed on every call, since
+    a rewrite of the same size could still keep all of them.
+    """
+    stat = database_file.stat()
+    file = database_file.resolve()
+    if time.time_ns() - stat.st_mtime_ns < _RACY_MODIFICATION_NS:
+        return _file_hash(file)
+    return _memoized_file_hash(file, stat.st_ino, stat.st_mtime_ns, stat.st_ctime_ns, stat.st_size)
+
+
+@lru_cache(maxsize=64)
+def _memoized_file_hash(file: Path, inode: int, modified: int, changed: int, size: int) -> str:
+    return _file_hash(file)
+
+
+def _file_hash(file: Path) -> str:
+    digest = hashlib.sha256()
+    with open(file, "rb") as f:
+        while chunk := f.read(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def normalize_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+class QueryCache:
+    """
+    Memoized query results keyed by the query parameters and the content hash of the database build.
+
+    Results are kept in an in-memory LRU tier and, when ``disk_dir`` is set, pickled into
+    ``disk_dir/<build hash>/``, so they survive process restarts. A new database build changes the hash,
+    which makes every previous entry unreachable; disk entries of previous builds are removed on the first write.
+    The cache is shared by the worker threads of the server: the memory tier is guarded by a lock, results are
+    computed outside of it.
+    """
+
+    def __init__(self, max_entries: int = 512, disk_dir: Path | None = None) -> None:
+        self._max_entries = max_entries
+        self._disk_dir = disk_dir
+        self._memory: OrderedDict[tuple[str, str], Any] = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = CacheStats()
+
+    def get_or_compute(self, database_file: Path, key: Hashable, compute: Callable[[], T]) -> T:
+        build_hash = database_build_hash(database_file)
+        key_hash = hashlib.sha256(repr(key).encode("utf-8")).hexdigest()
+        cache_key = (build_hash, key_hash)
+
+        with self._lock:
+            if cache_key in self._memory:
+                self._memory.move_to_end(cache_key)
+                self.stats.memory_hits += 1
+                return self._memory[cache_key]
+
+        disk_file = self._disk_dir / build_hash / f"{key_hash}.pickle" if self._disk_dir else None
+        if disk_file and disk_file.exists():
+            with open(disk_file, "rb") as f:
+                result = pickle.load(f)
+            disk_hit = True
+        else:
+            result = compute()
+            disk_hit = False
+            if disk_file:
+                self._write_disk_entry(disk_file, result)
+
+        with self._lock:
+            if disk_hit:
+                self.stats.disk_hits += 1
+            else:
+                self.stats.misses += 1
+            self._memory[cache_key] = result
+            self._memory.move_to_end(cache_key)
+            if len(self._memory) > self._max_entries:
+                self._memory.popitem(last=False)
+        return result
+
+    def query(self, database_file: Path, sql: str, params: dict[str, Any] | None = None) -> tuple[list[str], list]:
+        """
+        Run a query against the database file and return its columns and rows.
+
+        The SQL refers to the database file as ``{database}`` and is normalized before it's used as a cache key.
+        """
+        sql = normalize_sql(sql)
+
+        def run_query() -> tuple[list[str], list]:
+            relation = duckdb.execute(sql.replace("{database}", f"'{database_file}'"), params or {})
+            columns = [desc[0] for desc in relation.description] if relation.description else []
+            return columns, relation.fetchall()
+
+        return self.get_or_compute(database_file, ("query", sql, sorted((params or {}).items())), run_query)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._memory.clear()
+        if self._disk_dir and self._disk_dir.exists():
+            shutil.rmtree(self._disk_dir)
+
+    def _write_disk_entry(self, disk_file: Path, result: Any) -> None:
+        build_dir = disk_file.parent
+        if not build_dir.exists() and self._disk_dir and self._disk_dir.exists():
+            for stale_build_dir in self._disk_dir.iterdir():
+                logger.debug(f"Removing query cache of previous build {stale_build_dir.name}")
+                shutil.rmtree(stale_build_dir, ignore_errors=True)
+        build_dir.mkdir(parents=True, exist_ok=True)
+        temp_file = disk_file.with_suffix(f".{os.getpid()}.tmp")
+        with open(temp_file, "wb") as f:
+            pickle.dump(result, f)
+        temp_file.replace(disk_file)
+
+
+default_query_cache = QueryCache()
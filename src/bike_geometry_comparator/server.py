@@ -0,0 +1,351 @@
+import asyncio
+import json
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from http import HTTPStatus
+from pathlib import Path
+from typing import Any
+from urllib.parse import parse_qs, urlsplit
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.cockpit import HANDLEBAR_TOLERANCE, HandlebarTarget, solve_cockpit
+from bike_geometry_comparator.database.facets import FACET_CUBE_FILE, FACET_DIMENSIONS, facet_counts
+from bike_geometry_comparator.database.search_index import DEFAULT_MATCHES, SEARCH_INDEX_FILE, SearchIndex
+from bike_geometry_comparator.fit import RiderProfile, recommend_sizes
+from bike_geometry_comparator.query_cache import database_build_hash
+
+logger = logging.getLogger(__name__)
+
+FETCH_BATCH_SIZE = 256
+DEFAULT_LIMIT = 100
+_MAX_REQUEST_HEAD_SIZE = 16 * 1024
+_NDJSON_CONTENT_TYPE = "application/x-ndjson"
+
+
+class BadRequest(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class _Request:
+    method: str
+    path: str
+    query: dict[str, list[str]]
+    headers: dict[str, str]
+
+    def param(self, name: str, default: str | None = None) -> str | None:
+        values = self.query.get(name)
+        return values[0] if values else default
+
+    def int_param(self, name: str, default: int | None = None) -> int | None:
+        value = self.param(name)
+        if value is None:
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise BadRequest(f"Parameter {name} must be an integer") from None
+
+    def wants_ndjson(self) -> bool:
+        return self.param("format") == "ndjson" or _NDJSON_CONTENT_TYPE in self.headers.get("accept", "")
+
+
+class GeometryQueryService:
+    """
+    Read-only access to the assembled geometry database.
+
+    The database file is loaded once into a warm in-memory DuckDB table and reloaded when a new build appears.
+    Every request borrows its own cursor from a fixed pool, so queries of concurrent requests run in parallel
+    worker threads without blocking the event loop.
+    """
+
+    def __init__(self, database_file: Path, pool_size: int = 8) -> None:
+        self._database_file = database_file
+        self._con = duckdb.connect()
+        self._build_hash = ""
+        self._search_index: SearchIndex | None = None
+        self._reload_lock = asyncio.Lock()
+        self._cursors: asyncio.Queue[DuckDBPyConnection] = asyncio.Queue()
+        for _ in range(pool_size):
+            self._cursors.put_nowait(self._con.cursor())
+        self._load()
+
+    @property
+    def build_hash(self) -> str:
+        return self._build_hash
+
+    async def refresh(self) -> None:
+        if database_build_hash(self._database_file) != self._build_hash:
+            async with self._reload_lock:
+                await asyncio.to_thread(self._load)
+
+    def _load(self) -> None:
+        build_hash = database_build_hash(self._database_file)
+        if build_hash == self._build_hash:
+            return
+        self._con.execute(f"CREATE OR REPLACE TABLE bike_geometry AS SELECT * FROM '{self._database_file}'")
+        cube_file = self._database_file.parent / FACET_CUBE_FILE
+        if cube_file.exists():
+            self._con.execute(f"CREATE OR REPLACE TABLE facet_cube AS SELECT * FROM '{cube_file}'")
+        index_file = self._database_file.parent / SEARCH_INDEX_FILE
+        self._search_index = SearchIndex.load(index_file) if index_file.exists() else None
+        self._build_hash = build_hash
+        logger.info(f"Loaded {self._database_file} build {build_hash[:12]}")
+
+    @asynccontextmanager
+    async def _cursor(self) -> AsyncIterator[DuckDBPyConnection]:
+        cursor = await self._cursors.get()
+        try:
+            yield cursor
+        finally:
+            self._cursors.put_nowait(cursor)
+
+    async def stream(self, sql: str, params: list[Any]) -> AsyncGenerator[dict[str, Any]]:
+        async with self._cursor() as cursor:
+            await asyncio.to_thread(cursor.execute, sql, params)
+            columns = [desc[0] for desc in cursor.description] if cursor.description else []
+            while batch := await asyncio.to_thread(cursor.fetchmany, FETCH_BATCH_SIZE):
+                for row in batch:
+                    yield dict(zip(columns, row))
+
+    async def search(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        conditions: list[str] = []
+        params: list[Any] = []
+        if text := request.param("q"):
+            conditions.append("concat_ws(' ', brand, model, year) ILIKE ?")
+            params.append(f"%{text}%")
+        for column in ("brand", "model", "size"):
+            if value := request.param(column):
+                conditions.append(f"{column} ILIKE ?")
+                params.append(value)
+        if (year := request.int_param("year")) is not None:
+            conditions.append("year = ?")
+            params.append(year)
+        params.append(request.int_param("limit", DEFAULT_LIMIT))
+        sql = f"""SELECT * FROM bike_geometry
+WHERE {" AND ".join(conditions) or "true"}
+ORDER BY brand, model, year, size_rank
+LIMIT ?"""
+        async for row in self.stream(sql, params):
+            yield row
+
+    async def compare(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        """Rows of the bikes passed as ``bike=<brand>|<model>|<year>|<size>`` parameters, in the requested order."""
+        bikes = request.query.get("bike", [])
+        if not bikes:
+            raise BadRequest("At least one bike=<brand>|<model>|<year>|<size> parameter is required")
+        values: list[str] = []
+        params: list[Any] = []
+        for position, bike in enumerate(bikes):
+            parts = bike.split("|")
+            if len(parts) != 4:
+                raise BadRequest(f"Bike {bike} must be formatted as <brand>|<model>|<year>|<size>")
+            brand, model, year, size = parts
+            values.append("(?, ?, ?, TRY_CAST(? AS INTEGER), ?)")
+            params += [position, brand, model, year or None, size]
+        sql = f"""SELECT bike_geometry.*
+FROM (VALUES {", ".join(values)}) requested(position, brand, model, year, size)
+JOIN bike_geometry ON bike_geometry.brand = requested.brand
+                  AND bike_geometry.model = requested.model
+                  AND bike_geometry.year IS NOT DISTINCT FROM requested.year
+                  AND bike_geometry.size = requested.size
+ORDER BY requested.position"""
+        async for row in self.stream(sql, params):
+            yield row
+
+    async def fit(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        height, inseam = request.int_param("height"), request.int_param("inseam")
+        if height is None or inseam is None:
+            raise BadRequest("Parameters height and inseam (in cm) are required")
+        limit = request.int_param("limit", DEFAULT_LIMIT)
+        async with self._cursor() as cursor:
+            recommendations = await asyncio.to_thread(
+                recommend_sizes, self._database_file, RiderProfile(height, inseam), limit, con=cursor
+            )
+        for recommendation in recommendations:
+            yield asdict(recommendation)
+
+    async def suggest(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        """Fuzzy matches of the ``q`` parameter among brands, models, years and sizes, for autocomplete."""
+        if self._search_index is None:
+            raise BadRequest(f"{SEARCH_INDEX_FILE} is not built next to the database")
+        for match in self._search_index.search(request.param("q") or "", request.int_param("limit", DEFAULT_MATCHES)):
+            yield asdict(match)
+
+    async def facets(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        """Counts of every facet value under the filters passed as ``<facet>=<value>`` parameters."""
+        filters = {facet: values for facet, values in request.query.items() if facet in FACET_DIMENSIONS}
+        async with self._cursor() as cursor:
+            try:
+                counts = await asyncio.to_thread(facet_counts, cursor, "facet_cube", filters)
+            except duckdb.CatalogException:
+                raise BadRequest(f"{FACET_CUBE_FILE} is not built next to the database") from None
+        for facet, values in counts.items():
+            yield {"facet": facet, "values": [{"value": value, "sizes": sizes} for value, sizes in values]}
+
+    async def cockpit(self, request: _Request) -> AsyncGenerator[dict[str, Any]]:
+        stack, reach = request.int_param("stack"), request.int_param("reach")
+        if stack is None or reach is None:
+            raise BadRequest("Parameters stack and reach (handlebar position in mm) are required")
+        tolerance = request.int_param("tolerance")
+        target = HandlebarTarget(stack, reach, HANDLEBAR_TOLERANCE if tolerance is None else tolerance)
+        limit = request.int_param("limit", DEFAULT_LIMIT)
+        async with self._cursor() as cursor:
+            solutions = await asyncio.to_thread(solve_cockpit, self._database_file, target, limit=limit, con=cursor)
+        for solution in solutions:
+            yield asdict(solution)
+
+
+class GeometryHttpServer:
+    """Minimal HTTP/1.1 server with keep-alive and chunked streaming of JSON/NDJSON query results."""
+
+    def __init__(self, service: GeometryQueryService) -> None:
+        self._service = service
+        self._routes: dict[str, Callable[[_Request], AsyncGenerator[dict[str, Any]]]] = {
+            "/search": service.search,
+            "/compare": service.compare,
+            "/fit": service.fit,
+            "/cockpit": service.cockpit,
+            "/suggest": service.suggest,
+            "/facets": service.facets,
+        }
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while request := await _read_request(reader):
+                keep_alive = await self._respond(request, writer.write, writer.drain)
+                if not keep_alive:
+                    break
+        except BadRequest as ex:
+            _write_error(writer.write, HTTPStatus.BAD_REQUEST, str(ex), keep_alive=False)
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(
+        self, request: _Request, write: Callable[[bytes], None], drain: Callable[[], Awaitable[None]]
+    ) -> bool:
+        keep_alive = request.headers.get("connection", "").lower() != "close"
+        if request.method not in ("GET", "HEAD"):
+            _write_error(write, HTTPStatus.METHOD_NOT_ALLOWED, "Only GET and HEAD are supported", keep_alive)
+            return keep_alive
+        if request.path == "/health":
+            _write_json(write, HTTPStatus.OK, {"status": "ok"}, keep_alive)
+            return keep_alive
+        route = self._routes.get(request.path)
+        if route is None:
+            _write_error(write, HTTPStatus.NOT_FOUND, f"Unknown endpoint {request.path}", keep_alive)
+            return keep_alive
+
+        await self._service.refresh()
+        etag = f'"{self._service.build_hash}"'
+        if request.headers.get("if-none-match") == etag:
+            _write_head(write, HTTPStatus.NOT_MODIFIED, {"ETag": etag}, keep_alive)
+            return keep_alive
+
+        rows = route(request)
+        try:
+            first_row = await anext(rows, None)
+        except BadRequest as ex:
+            _write_error(write, HTTPStatus.BAD_REQUEST, str(ex), keep_alive)
+            return keep_alive
+        except duckdb.Error as ex:
+            logger.exception(f"Query of {request.path} failed")
+            _write_error(write, HTTPStatus.INTERNAL_SERVER_ERROR, str(ex), keep_alive)
+            return keep_alive
+
+        ndjson = request.wants_ndjson()
+        headers = {
+            "Content-Type": _NDJSON_CONTENT_TYPE if ndjson else "application/json",
+            "Transfer-Encoding": "chunked",
+            "ETag": etag,
+            "Cache-Control": "no-cache",
+        }
+        _write_head(write, HTTPStatus.OK, headers, keep_alive)
+        if request.method == "HEAD":
+            await rows.aclose()
+            return keep_alive
+
+        def write_chunk(pieces: list[str]) -> None:
+            encoded = "".join(pieces).encode("utf-8")
+            write(f"{len(encoded):x}\r\n".encode("ascii") + encoded + b"\r\n")
+
+        # NDJSON terminates every row with a newline, a JSON array separates rows with commas
+        pieces = [] if ndjson else ["["]
+        row_count = 0
+        if first_row is not None:
+            pieces.append(json.dumps(first_row) + ("\n" if ndjson else ""))
+            row_count += 1
+            try:
+                async for row in rows:
+                    pieces.append(json.dumps(row) + "\n" if ndjson else "," + json.dumps(row))
+                    row_count += 1
+                    if row_count % FETCH_BATCH_SIZE == 0:
+                        write_chunk(pieces)
+                        pieces.clear()
+                        await drain()
+            except (duckdb.Error, TypeError, ValueError) as ex:
+                # the status is already sent, a last {"error": ...} row tells the client the rows are incomplete
+                logger.exception(f"Query of {request.path} failed after {row_count} rows")
+                marker = json.dumps({"error": str(ex)})
+                pieces.append(marker + "\n" if ndjson else "," + marker)
+                keep_alive = False
+        if not ndjson:
+            pieces.append("]")
+        if pieces:
+            write_chunk(pieces)
+        write(b"0\r\n\r\n")
+        await drain()
+        return keep_alive
+
+
+async def _read_request(reader: asyncio.StreamReader) -> _Request | None:
+    try:
+        head = await reader.readuntil(b"\r\n\r\n")
+    except asyncio.IncompleteReadError:
+        return None
+    request_line, *header_lines = head.decode("latin-1").rstrip("\r\n").split("\r\n")
+    parts = request_line.split(" ")
+    if len(parts) != 3 or not parts[2].startswith("HTTP/"):
+        raise BadRequest(f"Malformed request line {request_line!r}")
+    method, target, _ = parts
+    headers = {}
+    for line in header_lines:
+        name, _, value = line.partition(":")
+        headers[name.strip().lower()] = value.strip()
+    url = urlsplit(target)
+    return _Request(method.upper(), url.path.rstrip("/") or "/", parse_qs(url.query), headers)
+
+
+def _write_head(write: Callable[[bytes], None], status: HTTPStatus, headers: dict[str, str], keep_alive: bool) -> None:
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+
+def _write_json(write: Callable[[bytes], None], status: HTTPStatus, payload: Any, keep_alive: bool) -> None:
+    body = json.dumps(payload).encode("utf-8")
+    _write_head(write, status, {"Content-Type": "application/json", "Content-Length": str(len(body))}, keep_alive)
+    write(body)
+
+
+def _write_error(write: Callable[[bytes], None], status: HTTPStatus, message: str, keep_alive: bool) -> None:
+    _write_json(write, status, {"error": message}, keep_alive)
+
+
+async def serve(database_file: Path, host: str, port: int, pool_size: int = 8) -> None:
+    service = GeometryQueryService(database_file, pool_size)
+    http_server = GeometryHttpServer(service)
+    server = await asyncio.start_server(http_server.handle_connection, host, port, limit=_MAX_REQUEST_HEAD_SIZE)
+    logger.info(
+        f"Serving {database_file} on http://{host}:{port} (/search, /compare, /fit, /cockpit, /suggest, /facets)"
+    )
+    async with server:
+        await server.serve_forever()
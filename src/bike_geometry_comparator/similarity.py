@@ -0,0 +1,211 @@
+import logging
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.database.carryover import FRAME_COLUMNS
+from bike_geometry_comparator.database.metrics import KEY_COLUMNS
+
+logger = logging.getLogger(__name__)
+
+SIMILAR_FRAMES_FILE = "similar_frames.csv"
+DEFAULT_NEIGHBORS = 10
+BLOCK_SIZE = 128
+# Differences which are equally significant for a rider: 10 mm of any length and half a degree of an angle.
+# Scales are fixed rather than derived from the catalog statistics, so the distance of two frames doesn't change
+# when other frames are added, which is what lets a rebuild recompute the neighbors of changed rows only.
+COLUMN_SCALES = {column: 10.0 for column in FRAME_COLUMNS} | {"seat_tube_angle": 0.5, "head_tube_angle": 0.5}
+# frames are compared only by the columns both of them have, and only when they have enough of them
+MIN_COMMON_COLUMNS = 3
+# distances are stored rounded, fresh distances are rounded the same way to compare equal with the stored ones
+_DISTANCE_DIGITS = 4
+
+
+@dataclass(frozen=True)
+class SimilarFramesOptions:
+    """Options of the similar frames computed by a build: number of neighbors and of worker processes."""
+
+    k: int = DEFAULT_NEIGHBORS
+    jobs: int = 1
+
+
+@dataclass(frozen=True)
+class SimilarityStats:
+    sizes: int
+    recomputed: int
+    neighbors: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return (
+            f"{self.neighbors} neighbors of {self.sizes} sizes, "
+            f"{self.recomputed} sizes recomputed in {self.seconds:.2f} s"
+        )
+
+
+def build_similar_frames(
+    database_file: Path, output_file: Path, k: int = DEFAULT_NEIGHBORS, jobs: int = 1, block_size: int = BLOCK_SIZE
+) -> SimilarityStats:
+    """
+    Precompute the ``k`` nearest frames of other models for every (brand, model, year, size) of the database.
+
+    Frames are compared by the root mean square of their :data:`FRAME_COLUMNS` differences divided by
+    :data:`COLUMN_SCALES`. Distances are computed by DuckDB over blocks of ``block_size`` sizes, in a process pool
+    when ``jobs > 1``. The neighbor table is written into ``output_file`` as::
+
+        brand, model, year, size, vector_hash, rank,
+        neighbor_brand, neighbor_model, neighbor_year, neighbor_size, distance
+
+    If ``output_file`` exists, it's updated incrementally: only sizes whose frame changed, appeared or lost
+    a neighbor are recomputed against the whole catalog, other sizes keep their neighbors and are only compared with
+    the changed ones.
+    """
+    started = time.perf_counter()
+    with duckdb.connect() as con, tempfile.TemporaryDirectory() as tmp_dir:
+        _load_frame_vectors(con, database_file)
+        con.execute("CREATE TEMP TABLE unchanged (row_id BIGINT)")
+        con.execute("CREATE TEMP TABLE previous_neighbors (row_id BIGINT, neighbor_id BIGINT, distance DOUBLE)")
+        if output_file.exists():
+            _load_previous_neighbors(con, output_file, k)
+        (sizes, recomputed, changed) = _assign_blocks(con, block_size)
+
+        # sizes without reusable neighbors are compared with the whole catalog, others only with changed sizes
+        blocks = [(block, True) for block in range(_block_count(recomputed, block_size))]
+        if changed:
+            blocks += [(block, False) for block in range(_block_count(sizes - recomputed, block_size))]
+        con.execute("CREATE TEMP TABLE fresh_neighbors (row_id BIGINT, neighbor_id BIGINT, distance DOUBLE)")
+        if jobs <= 1 or len(blocks) <= 1:
+            for block, dirty in blocks:
+                con.execute(f"INSERT INTO fresh_neighbors {_nearest_frames_query(block, dirty, k)}")
+        else:
+            vectors_file = Path(tmp_dir) / "frame_vectors.parquet"
+            con.execute(f"COPY frame_vectors TO '{vectors_file}' (FORMAT parquet)")
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                block_files = list(executor.map(partial(_compute_block, vectors_file, k), blocks))
+            con.execute(f"INSERT INTO fresh_neighbors FROM read_parquet({[str(file) for file in block_files]})")
+
+        neighbors = _write_neighbor_table(con, output_file, k)
+    stats = SimilarityStats(sizes, recomputed, neighbors, time.perf_counter() - started)
+    logger.info(f"Similar frames: {stats}")
+    return stats
+
+
+def _load_frame_vectors(con: DuckDBPyConnection, database_file: Path) -> None:
+    raw = ", ".join(f"{column} := {column}" for column in FRAME_COLUMNS)
+    scaled = ", ".join(f"{column}::DOUBLE / {COLUMN_SCALES[column]} AS {column}" for column in FRAME_COLUMNS)
+    con.execute(f"""
+CREATE TEMP TABLE frame_vectors AS
+SELECT row_number() OVER (ORDER BY {", ".join(KEY_COLUMNS)}) AS row_id,
+       {", ".join(KEY_COLUMNS)},
+       md5(to_json(struct_pack({raw}))) AS vector_hash,
+       {scaled}
+FROM '{database_file}'""")
+
+
+def _load_previous_neighbors(con: DuckDBPyConnection, output_file: Path, k: int) -> None:
+    """Load neighbors of the previous build which are still valid into ``previous_neighbors``."""
+    con.execute(f"""
+CREATE TEMP TABLE previous AS
+SELECT * REPLACE (year::INTEGER AS year, neighbor_year::INTEGER AS neighbor_year)
+FROM read_csv('{output_file}', all_varchar = true)""")
+    (previous_k,) = con.execute("SELECT coalesce(max(rank::INTEGER), 0) FROM previous").fetchone() or (0,)
+    if previous_k < k:
+        logger.info(f"{output_file} has fewer than {k} neighbors per size, recomputing all of them")
+        return
+
+    same_key = " AND ".join(f"v.{column} IS NOT DISTINCT FROM p.{column}" for column in KEY_COLUMNS)
+    same_neighbor_key = " AND ".join(f"n.{column} IS NOT DISTINCT FROM p.neighbor_{column}" for column in KEY_COLUMNS)
+    # sizes are unchanged when the hash of their frame is the same, the neighbor relation is symmetric,
+    # so every neighbor is listed with its own hash as well
+    con.execute(f"""
+INSERT INTO unchanged
+SELECT DISTINCT v.row_id
+FROM frame_vectors v JOIN previous p ON {same_key} AND v.vector_hash = p.vector_hash""")
+    con.execute(f"""
+INSERT INTO previous_neighbors
+SELECT v.row_id, n.row_id AS neighbor_id, p.distance::DOUBLE AS distance
+FROM previous p
+JOIN frame_vectors v ON {same_key} AND v.row_id IN (SELECT row_id FROM unchanged)
+JOIN frame_vectors n ON {same_neighbor_key} AND n.row_id IN (SELECT row_id FROM unchanged)""")
+    # sizes which lost a neighbor don't know their next nearest frame
+    con.execute(f"""
+DELETE FROM previous_neighbors
+WHERE row_id IN (SELECT v.row_id
+                 FROM frame_vectors v JOIN previous p ON {same_key}
+                 WHERE v.row_id IN (SELECT row_id FROM unchanged)
+                 GROUP BY v.row_id
+                 HAVING count(*) > (SELECT count(*) FROM previous_neighbors r WHERE r.row_id = v.row_id))""")
+
+
+def _assign_blocks(con: DuckDBPyConnection, block_size: int) -> tuple[int, int, int]:
+    """
+    Split sizes which need recomputing and sizes which reuse their neighbors into blocks.
+
+    Return the number of all, recomputed (``dirty``) and ``changed`` sizes. Changed sizes are new or have a different
+    frame, all of them are dirty, as well as unchanged sizes which lost a neighbor.
+    """
+    con.execute(f"""
+CREATE OR REPLACE TEMP TABLE frame_vectors AS
+SELECT *, (row_number() OVER (PARTITION BY dirty ORDER BY row_id) - 1) // {block_size} AS block
+FROM (SELECT *,
+             row_id NOT IN (SELECT row_id FROM previous_neighbors) AS dirty,
+             row_id NOT IN (SELECT row_id FROM unchanged) AS changed
+      FROM frame_vectors)""")
+    return con.execute(
+        "SELECT count(*), count(*) FILTER (dirty), count(*) FILTER (changed) FROM frame_vectors"
+    ).fetchone() or (0, 0, 0)
+
+
+def _block_count(sizes: int, block_size: int) -> int:
+    return -(-sizes // block_size)
+
+
+def _compute_block(vectors_file: Path, k: int, block: tuple[int, bool]) -> Path:
+    block_file = vectors_file.with_name(f"block_{block[0]}_{'dirty' if block[1] else 'reused'}.parquet")
+    with duckdb.connect() as con:
+        con.execute(f"CREATE TEMP TABLE frame_vectors AS FROM '{vectors_file}'")
+        con.execute(f"COPY ({_nearest_frames_query(*block, k)}) TO '{block_file}' (FORMAT parquet)")
+    return block_file
+
+
+def _nearest_frames_query(block: int, dirty: bool, k: int) -> str:
+    """
+    Query (row_id, neighbor_id, distance) of the ``k`` nearest frames of other models for sizes of the block.
+
+    Blocks of recomputed (``dirty``) sizes are compared with all sizes, blocks of other sizes only with the changed
+    ones, as their distances to unchanged sizes are known. Ties are broken by neighbor id.
+    """
+    squares = " + ".join(f"coalesce((q.{column} - n.{column}) ** 2, 0)" for column in FRAME_COLUMNS)
+    common = " + ".join(f"(q.{column} IS NOT NULL AND n.{column} IS NOT NULL)::INTEGER" for column in FRAME_COLUMNS)
+    candidate_filter = "" if dirty else "AND n.changed"
+    return f"""
+SELECT row_id, neighbor_id, round(sqrt(squares / common), {_DISTANCE_DIGITS}) AS distance
+FROM (SELECT q.row_id, n.row_id AS neighbor_id, {squares} AS squares, {common} AS common
+      FROM frame_vectors q
+      JOIN frame_vectors n ON (q.brand <> n.brand OR q.model <> n.model) {candidate_filter}
+      WHERE q.block = {block} AND q.dirty = {dirty})
+WHERE common >= {MIN_COMMON_COLUMNS}
+QUALIFY row_number() OVER (PARTITION BY row_id ORDER BY distance, neighbor_id) <= {k}"""
+
+
+def _write_neighbor_table(con: DuckDBPyConnection, output_file: Path, k: int) -> int:
+    con.execute(f"""
+CREATE TEMP TABLE similar_frames AS
+SELECT {", ".join(f"q.{column}" for column in KEY_COLUMNS)}, q.vector_hash,
+       row_number() OVER (PARTITION BY q.row_id ORDER BY m.distance, m.neighbor_id) AS rank,
+       {", ".join(f"n.{column} AS neighbor_{column}" for column in KEY_COLUMNS)},
+       m.distance
+FROM (SELECT * FROM fresh_neighbors UNION ALL SELECT * FROM previous_neighbors) m
+JOIN frame_vectors q ON q.row_id = m.row_id
+JOIN frame_vectors n ON n.row_id = m.neighbor_id
+QUALIFY rank <= {k}""")
+    con.execute(f"""
+COPY (SELECT * FROM similar_frames ORDER BY {", ".join(KEY_COLUMNS)}, rank) TO '{output_file}' (HEADER)""")
+    (count,) = con.execute("SELECT count(*) FROM similar_frames").fetchone() or (0,)
+    return count
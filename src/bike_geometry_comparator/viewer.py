@@ -0,0 +1,180 @@
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+import duckdb
+from rich.console import Console
+from rich.markup import escape
+from rich.table import Table
+
+from bike_geometry_comparator.database.core import create_database_view
+from bike_geometry_comparator.db_utils import fetchall_strings
+
+PINNED_COLUMNS = ("brand", "model", "size")
+# stable order of rows with equal sort values, catalog order by default
+TIEBREAK_ORDER = ("brand", "model", "year", "size_rank")
+PAGE_SIZE = 25
+MAX_CELL_WIDTH = 40
+HELP = (
+    "n/p next/previous page, g PAGE go to page, s COLUMN [desc] sort, f [SQL] filter or clear it, "
+    "> and < scroll columns, q quit"
+)
+
+
+class ResultPager:
+    """
+    Pages of the rows of the database, sorted and filtered by DuckDB.
+
+    Only the rows of the requested page are fetched: every page is a ``LIMIT``/``OFFSET`` query of a view over
+    the database file, so memory doesn't depend on the number of rows. Sorting and filtering change the query
+    rather than the fetched rows, and the row count is queried once per filter.
+    """
+
+    def __init__(self, database_file: Path, page_size: int = PAGE_SIZE) -> None:
+        self._con = duckdb.connect()
+        create_database_view(self._con, database_file)
+        self.columns = fetchall_strings("SELECT column_name FROM (DESCRIBE bike_geometry)", self._con)
+        self.page_size = page_size
+        self.where: str | None = None
+        self.sort_column: str | None = None
+        self.descending = False
+        self.rows = self._count()
+
+    def close(self) -> None:
+        self._con.close()
+
+    @property
+    def pages(self) -> int:
+        return max(1, -(-self.rows // self.page_size))
+
+    def sort(self, column: str | None, descending: bool = False) -> None:
+        if column is not None and column not in self.columns:
+            raise ValueError(f"Unknown column {column}")
+        self.sort_column = column
+        self.descending = descending
+
+    def filter(self, where: str | None) -> None:
+        """Keep rows matching the ``where`` SQL expression, all rows if it's None. An invalid filter is not applied."""
+        previous = self.where
+        self.where = where
+        try:
+            self.rows = self._count()
+        except duckdb.Error as e:
+            self.where = previous
+            raise ValueError(f"Invalid filter {where}: {e}") from e
+
+    def page(self, number: int) -> list[tuple[Any, ...]]:
+        """Rows of the 0-based page ``number``."""
+        order = [f'"{column}"' for column in TIEBREAK_ORDER if column in self.columns]
+        if self.sort_column:
+            order.insert(0, f'"{self.sort_column}" {"DESC" if self.descending else "ASC"} NULLS LAST')
+        cursor = self._con.cursor()
+        try:
+            return cursor.execute(
+                f"SELECT * FROM bike_geometry WHERE {self.where or 'true'} ORDER BY {', '.join(order)} "
+                f"LIMIT {self.page_size} OFFSET {number * self.page_size}"
+            ).fetchall()
+        finally:
+            cursor.close()
+
+    def _count(self) -> int:
+        (rows,) = self._con.execute(f"SELECT count(*) FROM bike_geometry WHERE {self.where or 'true'}").fetchone() or (
+            0,
+        )
+        return rows
+
+
+def _cell(value: Any) -> str:
+    text = "" if value is None else str(value)
+    return text if len(text) <= MAX_CELL_WIDTH else text[: MAX_CELL_WIDTH - 1] + "…"
+
+
+def render_page(
+    columns: list[str],
+    rows: list[tuple[Any, ...]],
+    first_column: int,
+    width: int,
+    title: str | None = None,
+    pinned_columns: tuple[str, ...] = PINNED_COLUMNS,
+) -> tuple[Table, int]:
+    """
+    Table of the ``pinned_columns`` followed by the other columns from ``first_column`` which fit into ``width``.
+
+    Returns the table and the number of scrolled columns in it, at least one is shown however narrow the screen is.
+    """
+    cells = [[_cell(value) for value in row] for row in rows]
+
+    def column_width(index: int) -> int:
+        # cell padding and border
+        return max([len(columns[index]), *(len(row[index]) for row in cells)]) + 3
+
+    pinned = [index for index, column in enumerate(columns) if column in pinned_columns]
+    scrolled = [index for index, column in enumerate(columns) if column not in pinned_columns][first_column:]
+    used = sum(column_width(index) for index in pinned) + 1
+    visible = pinned.copy()
+    for index in scrolled:
+        used += column_width(index)
+        if used > width and len(visible) > len(pinned):
+            break
+        visible.append(index)
+
+    table = Table(show_header=True, title=escape(title) if title else None)
+    for index in visible:
+        table.add_column(columns[index], style="bold" if index in pinned else None, no_wrap=True)
+    for row in cells:
+        table.add_row(*(escape(row[index]) for index in visible))
+    return table, len(visible) - len(pinned)
+
+
+def browse(pager: ResultPager, console: Console, read_command: Callable[[str], str] = input) -> None:
+    """
+    Interactive browser of the pager rows, see :data:`HELP` for commands.
+
+    Only the current page is held in memory and only the columns fitting the console width are rendered.
+    The sort column is pinned next to :data:`PINNED_COLUMNS`.
+    """
+    page = first_column = 0
+    message = HELP
+    while True:
+        pinned = (*PINNED_COLUMNS, pager.sort_column) if pager.sort_column else PINNED_COLUMNS
+        scrollable = len([column for column in pager.columns if column not in pinned])
+        sort = f", sorted by {pager.sort_column}{' desc' if pager.descending else ''}" if pager.sort_column else ""
+        title = f"Page {page + 1} of {pager.pages}, {pager.rows} rows{sort}" + (
+            f", where {pager.where}" if pager.where else ""
+        )
+        table, shown = render_page(pager.columns, pager.page(page), first_column, console.width, title, pinned)
+        console.print(table)
+        console.print(message, markup=False)
+        message = HELP
+        try:
+            command, _, argument = read_command("> ").strip().partition(" ")
+        except EOFError:
+            return
+        arguments = argument.split()
+        match command:
+            case "q":
+                return
+            case "n" | "":
+                page = min(page + 1, pager.pages - 1)
+            case "p":
+                page = max(page - 1, 0)
+            case "g" if arguments and arguments[0].isdigit():
+                page = min(max(int(arguments[0]) - 1, 0), pager.pages - 1)
+            case ">":
+                first_column = min(first_column + max(shown, 1), max(scrollable - 1, 0))
+            case "<":
+                first_column = max(first_column - max(shown, 1), 0)
+            case "s":
+                try:
+                    pager.sort(arguments[0] if arguments else None, arguments[1:] == ["desc"])
+                    page = 0
+                except ValueError as e:
+                    message = str(e)
+            case "f":
+                try:
+                    pager.filter(argument.strip() or None)
+                    page = 0
+                except ValueError as e:
+                    message = str(e)
+            case _:
+                message = f"Unknown command {command!r}: {HELP}"
@@ -0,0 +1,155 @@
+import logging
+import os
+import shutil
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.assembly import assemble_datasources, datasource_query, find_datasources, read_ini
+
+logger = logging.getLogger(__name__)
+
+WATCHED_FILES = ("geometry.csv", "defaults.ini", "metric_mappings.ini")
+POLL_INTERVAL = 0.5
+DEBOUNCE = 0.3
+
+
+@dataclass(frozen=True)
+class RebuildStats:
+    sources: int
+    restaged: int
+    seconds: float
+
+    def __str__(self) -> str:
+        return f"{self.restaged} of {self.sources} sources reloaded, assembled in {self.seconds:.2f} s"
+
+
+class GeometryWatcher:
+    """
+    Warm assembly of the database which rebuilds it when files of the data directory change.
+
+    The DuckDB connection stays open with every ``geometry.csv`` staged in its own table, and parsed ini files are
+    cached by modification time. A rebuild walks the inheritance tree from the cache and reloads only the sources
+    whose file or inherited defaults and mappings changed, then reassembles the database from the staged tables.
+    Outputs are published like the ones of the build, swapped into place with ``os.replace`` only when their content
+    changed, so readers never see a partially written file. The database is copied into ``client_dir`` the same way.
+    """
+
+    def __init__(
+        self,
+        input_dir: Path,
+        output_file: Path,
+        client_dir: Path | None = None,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._input_dir = input_dir
+        self._output_file = output_file
+        self._client_dir = client_dir
+        self._clock = clock
+        self._con = duckdb.connect()
+        self._ini_cache: dict[Path, tuple[int, dict[str, str] | None]] = {}
+        # geometry.csv -> (staging table, fingerprint of the file and its inherited settings)
+        self._staged: dict[Path, tuple[str, tuple[object, ...]]] = {}
+        self._next_table = 0
+
+    def close(self) -> None:
+        self._con.close()
+
+    def snapshot(self) -> dict[Path, int]:
+        """Modification times of all watched files under the data directory."""
+        files = {}
+        for directory, _, names in os.walk(self._input_dir):
+            for name in names:
+                if name in WATCHED_FILES:
+                    file = Path(directory) / name
+                    try:
+                        files[file] = file.stat().st_mtime_ns
+                    except FileNotFoundError:
+                        # removed since the walk listed it, e.g. replaced by the atomic save of an editor
+                        continue
+        return files
+
+    def rebuild(self) -> RebuildStats:
+        started = time.perf_counter()
+        datasources = list(find_datasources(self._input_dir, {}, {}, self._read_ini))
+        restaged = 0
+        for geometry_data, metric_defaults, metric_mappings in datasources:
+            fingerprint = (
+                geometry_data.stat().st_mtime_ns,
+                tuple(sorted(metric_defaults.items())),
+                tuple(sorted(metric_mappings.items())),
+            )
+            staged = self._staged.get(geometry_data)
+            if staged and staged[1] == fingerprint:
+                continue
+            table = staged[0] if staged else self._new_table()
+            query = datasource_query(geometry_data, metric_defaults, metric_mappings)
+            self._con.execute(f"CREATE OR REPLACE TABLE {table} AS {query}")
+            self._staged[geometry_data] = (table, fingerprint)
+            restaged += 1
+        for removed in self._staged.keys() - {geometry_data for geometry_data, _, _ in datasources}:
+            self._con.execute(f"DROP TABLE {self._staged.pop(removed)[0]}")
+
+        tables = [self._staged[geometry_data][0] for geometry_data, _, _ in datasources]
+        self._assemble([f"(SELECT * FROM {table})" for table in tables])
+        return RebuildStats(len(datasources), restaged, time.perf_counter() - started)
+
+    def watch(self, interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE) -> None:
+        """
+        Poll the data directory every ``interval`` seconds and rebuild after changes.
+
+        Edits are batched: a rebuild starts once no file has changed for ``debounce`` seconds. The edit-to-available
+        latency is reported from the modification time of the latest edit to the moment the outputs are swapped in.
+        """
+        snapshot = self.snapshot()
+        logger.info(f"Built: {self.rebuild()}, watching {self._input_dir}")
+        while True:
+            time.sleep(interval)
+            current = self.snapshot()
+            if current == snapshot:
+                continue
+            while True:
+                time.sleep(debounce)
+                settled = self.snapshot()
+                if settled == current:
+                    break
+                current = settled
+            changed = {file for file in current.keys() | snapshot.keys() if current.get(file) != snapshot.get(file)}
+            snapshot = current
+            last_edit = max((current[file] for file in changed if file in current), default=0) / 1e9
+            try:
+                stats = self.rebuild()
+            except Exception:
+                logger.exception(f"Rebuild after changes of {', '.join(map(str, sorted(changed)))} failed")
+                continue
+            latency = self._clock() - last_edit if last_edit else stats.seconds
+            logger.info(f"Rebuilt {len(changed)} changed files: {stats}, available {latency:.2f} s after the edit")
+
+    def _read_ini(self, file: Path) -> dict[str, str] | None:
+        try:
+            modified = file.stat().st_mtime_ns
+        except FileNotFoundError:
+            return None
+        cached = self._ini_cache.get(file)
+        if cached is None or cached[0] != modified:
+            cached = (modified, read_ini(file))
+            self._ini_cache[file] = cached
+        return cached[1]
+
+    def _new_table(self) -> str:
+        self._next_table += 1
+        return f"staged_source_{self._next_table}"
+
+    def _assemble(self, datasource_queries: list[str]) -> None:
+        artifacts = assemble_datasources(self._con, datasource_queries, self._output_file)
+        if not self._client_dir:
+            return
+        client_copy = self._client_dir / self._output_file.name
+        if self._output_file.name in artifacts.changed or not client_copy.exists():
+            self._client_dir.mkdir(parents=True, exist_ok=True)
+            tmp_copy = self._client_dir / f".{self._output_file.name}.tmp"
+            shutil.copyfile(self._output_file, tmp_copy)
+            os.replace(tmp_copy, client_copy)
@@ -1,12 +1,24 @@
+from collections.abc import Iterator
 from pathlib import Path
 
 import pytest
+from _duckdb import DuckDBPyConnection
 
-from bike_geometry_comparator.assembly import assemble_geometry_database
+from tests.support import cached_geometry_database, connect_geometry_database
 
 
 @pytest.fixture(scope="session")
-def geometry_database(tmpdir_factory: pytest.TempPathFactory) -> Path:
-    database_file = tmpdir_factory.mktemp("test_database") / "database.csv"
-    assemble_geometry_database(Path("data"), database_file)
-    return database_file
+def geometry_database(pytestconfig: pytest.Config, tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Database assembled from ``data/``, shared by sessions and xdist workers until the data or sources change."""
+    if getattr(pytestconfig, "cache", None) is None:
+        # -p no:cacheprovider, the database is built for this session only
+        return cached_geometry_database(tmp_path_factory.mktemp("geometry_database"))
+    return cached_geometry_database(pytestconfig.cache.mkdir("geometry_database"))
+
+
+@pytest.fixture(scope="session")
+def geometry_connection(geometry_database: Path) -> Iterator[DuckDBPyConnection]:
+    """Connection with the typed ``bike_geometry`` table loaded once per worker."""
+    con = connect_geometry_database(geometry_database)
+    yield con
+    con.close()
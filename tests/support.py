@@ -0,0 +1,97 @@
+"""
+Test database shared by pytest sessions and xdist workers.
+
+The catalog is assembled once per hash of its inputs (the data tree and the package sources which build it) into
+the pytest cache directory. A worker which finds no build for the current hash takes an exclusive file lock and
+builds it into a temporary directory renamed into place, other workers wait on the lock and reuse the result.
+"""
+
+import fcntl
+import hashlib
+import os
+import shutil
+import tempfile
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+import duckdb
+from _duckdb import DuckDBPyConnection
+
+from bike_geometry_comparator.assembly import assemble_geometry_database
+from bike_geometry_comparator.database.core import create_database_view
+
+REPO_ROOT = Path(__file__).parents[1]
+DATA_DIR = REPO_ROOT / "data"
+PACKAGE_DIR = REPO_ROOT / "src" / "bike_geometry_comparator"
+PACKAGE_SOURCES = (".py", ".sql", ".ini")
+DATABASE_FILE = "database.csv"
+
+
+def _files(directory: Path, suffixes: tuple[str, ...] | None = None) -> list[Path]:
+    return sorted(
+        Path(root) / name
+        for root, _, names in os.walk(directory)
+        for name in names
+        if suffixes is None or name.endswith(suffixes)
+    )
+
+
+def build_inputs_hash(data_dir: Path = DATA_DIR) -> str:
+    """Hash of the paths and contents of every file of ``data_dir`` and of the package sources."""
+    digest = hashlib.sha256()
+    for root, files in ((data_dir, _files(data_dir)), (PACKAGE_DIR, _files(PACKAGE_DIR, PACKAGE_SOURCES))):
+        for file in files:
+            digest.update(str(file.relative_to(root)).encode())
+            digest.update(b"\0")
+            digest.update(file.read_bytes())
+            digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+@contextmanager
+def _locked(lock_file: Path) -> Iterator[None]:
+    with open(lock_file, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+def cached_geometry_database(cache_dir: Path, data_dir: Path = DATA_DIR) -> Path:
+    """
+    Database file assembled from ``data_dir`` under ``cache_dir``, built only if there's no build of the same inputs.
+
+    Builds of other inputs are removed, so the cache holds a single database.
+    """
+    inputs_hash = build_inputs_hash(data_dir)
+    build_dir = cache_dir / inputs_hash
+    if (build_dir / DATABASE_FILE).exists():
+        return build_dir / DATABASE_FILE
+
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    with _locked(cache_dir / "build.lock"):
+        # another worker may have built it while this one waited for the lock
+        if not (build_dir / DATABASE_FILE).exists():
+            with tempfile.TemporaryDirectory(dir=cache_dir, prefix=".build-") as tmp_dir:
+                assemble_geometry_database(data_dir, Path(tmp_dir) / DATABASE_FILE)
+                os.rename(tmp_dir, build_dir)
+                # TemporaryDirectory cleans up a directory which no longer exists
+                os.mkdir(tmp_dir)
+            for stale in cache_dir.iterdir():
+                if stale.is_dir() and stale != build_dir and not stale.name.startswith(".build-"):
+                    shutil.rmtree(stale)
+    return build_dir / DATABASE_FILE
+
+
+def connect_geometry_database(database_file: Path) -> DuckDBPyConnection:
+    """
+    In-memory connection with the database loaded into the ``bike_geometry`` table.
+
+    Columns declared in ``schema.sql`` get their schema types, the columns added by the build keep the detected ones.
+    """
+    con = duckdb.connect()
+    create_database_view(con, database_file, "database_file")
+    con.execute("CREATE TABLE bike_geometry AS FROM database_file")
+    return con
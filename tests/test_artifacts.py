@@ -0,0 +1,90 @@
+import csv
+import json
+from pathlib import Path
+
+from bike_geometry_comparator.artifacts import ARTIFACT_MANIFEST_FILE, CONTENT_DIR, publish_artifacts
+from bike_geometry_comparator.assembly import assemble_geometry_database
+from bike_geometry_comparator.database.carryover import GEOMETRY_BLOCKS_FILE
+from bike_geometry_comparator.similarity import SIMILAR_FRAMES_FILE, SimilarFramesOptions
+
+
+def _stage(staging_dir: Path, files: dict[str, str]) -> Path:
+    staging_dir.mkdir()
+    for name, content in files.items():
+        (staging_dir / name).write_text(content)
+    return staging_dir
+
+
+def test_unchanged_artifacts_are_not_rewritten(tmp_path: Path) -> None:
+    output_dir = tmp_path / "build"
+    first = publish_artifacts(_stage(tmp_path / "1", {"database.csv": "a\n1\n", "facets.csv": "f\n"}), output_dir)
+    assert first.changed == {"database.csv", "facets.csv"}
+    database_mtime = (output_dir / "database.csv").stat().st_mtime_ns
+
+    second = publish_artifacts(_stage(tmp_path / "2", {"database.csv": "a\n1\n", "facets.csv": "g\n"}), output_dir)
+    assert second.changed == {"facets.csv"}
+    assert (output_dir / "database.csv").stat().st_mtime_ns == database_mtime
+    assert (output_dir / "facets.csv").read_text() == "g\n"
+
+    manifest = json.loads((output_dir / ARTIFACT_MANIFEST_FILE).read_text())
+    assert manifest["facets.csv"]["sha256"] == second.hashes["facets.csv"]
+    assert (output_dir / manifest["facets.csv"]["path"]).read_text() == "g\n"
+    # the copy of the first facets.csv is no longer referenced
+    assert sorted(file.name for file in (output_dir / CONTENT_DIR).iterdir()) == sorted(
+        Path(entry["path"]).name for entry in manifest.values()
+    )
+
+
+def test_artifacts_no_longer_built_are_removed(tmp_path: Path) -> None:
+    output_dir = tmp_path / "build"
+    publish_artifacts(_stage(tmp_path / "1", {"database.csv": "a\n1\n", "blocks.csv": "b\n"}), output_dir)
+    second = publish_artifacts(_stage(tmp_path / "2", {"database.csv": "a\n1\n"}), output_dir)
+
+    assert second.hashes.keys() == {"database.csv"}
+    assert not (output_dir / "blocks.csv").exists()
+    manifest = json.loads((output_dir / ARTIFACT_MANIFEST_FILE).read_text())
+    assert manifest.keys() == {"database.csv"}
+    assert [file.name for file in (output_dir / CONTENT_DIR).iterdir()] == [Path(manifest["database.csv"]["path"]).name]
+
+
+def _write_data(data_dir: Path) -> None:
+    for model, years in {"strael": (2024, 2023), "secan": (2022,)}.items():
+        for year in years:
+            year_dir = data_dir / "fairlight" / model / str(year)
+            year_dir.mkdir(parents=True)
+            (year_dir / "defaults.ini").write_text(f"year : {year}\nmodel : {model.title()}")
+            (year_dir / "geometry.csv").write_text("size,stack,reach\nL,590,390\nS,550,370\nM,570,380\n")
+    (data_dir / "fairlight" / "defaults.ini").write_text("brand : Fairlight")
+
+
+def test_builds_are_byte_identical(tmp_path: Path) -> None:
+    data_dir = tmp_path / "data"
+    _write_data(data_dir)
+    first = assemble_geometry_database(data_dir, tmp_path / "first" / "database.csv")
+    second = assemble_geometry_database(data_dir, tmp_path / "second" / "database.csv")
+    assert first.hashes == second.hashes
+    # the frame blocks duplicate the database and are only written on request
+    assert GEOMETRY_BLOCKS_FILE not in first.hashes
+
+    with open(tmp_path / "first" / "database.csv", newline="") as f:
+        keys = [(row["model"], row["year"], row["size"]) for row in csv.DictReader(f)]
+    assert keys[:3] == [("Secan", "2022", "S"), ("Secan", "2022", "M"), ("Secan", "2022", "L")]
+    assert [key[:2] for key in keys] == sorted(key[:2] for key in keys)
+
+
+def test_optional_artifacts_are_published(tmp_path: Path) -> None:
+    data_dir, output_file = tmp_path / "data", tmp_path / "build" / "database.csv"
+    _write_data(data_dir)
+    artifacts = assemble_geometry_database(data_dir, output_file, True, SimilarFramesOptions(k=2))
+    manifest = json.loads((output_file.parent / ARTIFACT_MANIFEST_FILE).read_text())
+    assert manifest[SIMILAR_FRAMES_FILE]["sha256"] == artifacts.hashes[SIMILAR_FRAMES_FILE]
+    assert (output_file.parent / manifest[SIMILAR_FRAMES_FILE]["path"]).exists()
+
+    # an unchanged database reuses the published neighbors and leaves them untouched
+    rebuilt = assemble_geometry_database(data_dir, output_file, True, SimilarFramesOptions(k=2))
+    assert rebuilt.hashes == artifacts.hashes
+    assert SIMILAR_FRAMES_FILE not in rebuilt.changed
+
+    assemble_geometry_database(data_dir, output_file)
+    assert not (output_file.parent / SIMILAR_FRAMES_FILE).exists()
+    assert not (output_file.parent / GEOMETRY_BLOCKS_FILE).exists()
@@ -0,0 +1,46 @@
+import csv
+from pathlib import Path
+
+from bike_geometry_comparator.assembly import assemble_geometry_database
+from bike_geometry_comparator.database.carryover import GEOMETRY_BLOCKS_FILE, YEAR_REFERENCES_FILE
+
+_GEOMETRY = "size,stack,reach\nS,550,370\nM,570,380\n"
+
+
+def _write_year(data_dir: Path, year: int, geometry: str, stem_length: int) -> None:
+    year_dir = data_dir / "fairlight" / "strael" / str(year)
+    year_dir.mkdir(parents=True)
+    (year_dir / "defaults.ini").write_text(f"year : {year}\nstem_length : {stem_length}")
+    (year_dir / "geometry.csv").write_text(geometry)
+
+
+def test_carried_over_frames_share_geometry_blocks(tmp_path: Path) -> None:
+    data_dir, build_dir = tmp_path / "data", tmp_path / "build"
+    _write_year(data_dir, 2022, _GEOMETRY, 90)
+    _write_year(data_dir, 2023, _GEOMETRY, 100)
+    _write_year(data_dir, 2024, "size,stack,reach\nS,550,372\nM,570,380\n", 100)
+    (data_dir / "fairlight" / "defaults.ini").write_text("brand : Fairlight")
+    (data_dir / "fairlight" / "strael" / "defaults.ini").write_text("model : Strael")
+    build_dir.mkdir()
+
+    assemble_geometry_database(data_dir, build_dir / "database.csv", frame_blocks=True)
+
+    with open(build_dir / "database.csv", newline="") as f:
+        frame_hashes = {(row["year"], row["size"]): row["frame_hash"] for row in csv.DictReader(f)}
+    assert frame_hashes[("2022", "S")] == frame_hashes[("2023", "S")] == frame_hashes[("2023", "M")]
+    assert frame_hashes[("2022", "S")] != frame_hashes[("2024", "S")]
+
+    with open(build_dir / GEOMETRY_BLOCKS_FILE, newline="") as f:
+        blocks = list(csv.DictReader(f))
+    assert len(blocks) == 4
+    with open(build_dir / YEAR_REFERENCES_FILE, newline="") as f:
+        references = list(csv.DictReader(f))
+    assert [(row["year"], row["size"], row["stem_length"]) for row in references] == [
+        ("2022", "S", "90"),
+        ("2022", "M", "90"),
+        ("2023", "S", "100"),
+        ("2023", "M", "100"),
+        ("2024", "S", "100"),
+        ("2024", "M", "100"),
+    ]
+    assert "stack" not in references[0]
@@ -0,0 +1,40 @@
+from pathlib import Path
+
+from bike_geometry_comparator.ingest.chart_tokenizer import ChartSpec, parse_chart
+from bike_geometry_comparator.ingest.fairlight import _parse_file
+
+
+def test_fairlight_charts_are_reproduced(tmp_path: Path) -> None:
+    charts = sorted(Path("data/fairlight").rglob("original_geochart.txt"))
+    assert charts
+    for chart in charts:
+        _parse_file(chart, tmp_path / "geometry.csv")
+        assert (tmp_path / "geometry.csv").read_text() == (chart.parent / "geometry.csv").read_text(), chart
+
+
+def test_rows_layout_spec() -> None:
+    spec = ChartSpec(
+        layout="rows",
+        labels=((r"^Stack", "stack"), (r"^Reach", "reach"), (r"^Trail", "trail")),
+        preferred_rows=(("trail", r"700c"),),
+        header_skip=2,
+        value_pattern=r"\d+(?:,\d+)?",
+        value_substitutions=((",", "."),),
+        scales=(("stack", 10),),
+    )
+    chart = [
+        "Frame size S M",
+        "Stack (cm) 55,5 57,1",
+        "Reach 380 388",
+        "Reach 1 2",
+        "Trail 650b 70 71",
+        "Trail 700c 60 61",
+    ]
+
+    table = parse_chart(chart, spec)
+
+    assert table.metrics == ["stack", "reach", "trail"]
+    assert table.sizes == {
+        "S": {"stack": 555, "reach": "380", "trail": "60"},
+        "M": {"stack": 571, "reach": "388", "trail": "61"},
+    }
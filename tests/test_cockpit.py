@@ -0,0 +1,43 @@
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.cockpit import CockpitOptions, HandlebarTarget, handlebar_position_sql, solve_cockpit
+from bike_geometry_comparator.query_cache import QueryCache
+
+
+def test_handlebar_position() -> None:
+    (stack, reach) = handlebar_position_sql("100", "-17", "10")
+    position = duckdb.execute(
+        f"SELECT {stack}, {reach} FROM (SELECT 73 AS head_tube_angle, 560 AS stack, 380 AS reach)"
+    )
+    (handlebar_stack, handlebar_reach) = position.fetchone() or (0, 0)
+    assert round(handlebar_stack, 1) == round(560 + 38 * 0.9563 - 0, 1)
+    assert round(handlebar_reach, 1) == round(380 - 38 * 0.2924 + 100, 1)
+
+
+def test_solve_cockpit(geometry_database: Path) -> None:
+    database_file = Path(geometry_database)
+    options = CockpitOptions(stem_lengths=(100,), stem_angles=(-6,), spacers=(10,))
+    solutions = solve_cockpit(database_file, HandlebarTarget(620, 470), options, cache=QueryCache())
+    assert solutions
+    assert [solution.distance for solution in solutions] == sorted(solution.distance for solution in solutions)
+    assert len({(solution.brand, solution.model, solution.year) for solution in solutions}) == len(solutions)
+    for solution in solutions:
+        assert solution.distance <= 10
+        assert (solution.stem_length, solution.stem_angle, solution.spacers) == (100, -6, 10)
+        assert solution.min_handlebar_stack == solution.handlebar_stack == solution.max_handlebar_stack
+
+    wider = solve_cockpit(database_file, HandlebarTarget(620, 470), cache=QueryCache())
+    assert len(wider) > len(solutions)
+    assert all(s.min_handlebar_reach <= s.handlebar_reach <= s.max_handlebar_reach for s in wider)
+
+
+def test_stock_cockpit_from_custom_metrics(geometry_database: Path) -> None:
+    options = CockpitOptions(spacers=(0, 40))
+    solutions = solve_cockpit(Path(geometry_database), HandlebarTarget(620, 470, 30), options, cache=QueryCache())
+    stock_spacers = [(solution.stock_spacers, solution.spacers) for solution in solutions if solution.stock_spacers]
+    assert stock_spacers
+    # a steerer cut to the stock spacer stack takes no more spacers
+    assert all(spacers == 0 for stock, spacers in stock_spacers if stock < 40)
+    assert any(solution.stock_stem_angle is not None for solution in solutions)
@@ -1,49 +1,111 @@
 # type: ignore
 from pathlib import Path
 
-import duckdb
+from _duckdb import DuckDBPyConnection
 
+from bike_geometry_comparator.database.custom_metrics import custom_metric_query
+from bike_geometry_comparator.database.derivations import DERIVATIONS
+from bike_geometry_comparator.database.families import FAMILY_PROTOTYPES
 from bike_geometry_comparator.db_utils import fetchall_strings
 
 
-def test_canyon_endurace_exists(geometry_database: Path) -> None:
-    sizes = fetchall_strings(f"SELECT size FROM '{geometry_database}' WHERE brand = 'Canyon' and model = 'Endurace'")
+def test_canyon_endurace_exists(geometry_connection: DuckDBPyConnection) -> None:
+    sizes = fetchall_strings(
+        "SELECT size FROM bike_geometry WHERE brand = 'Canyon' and model = 'Endurace'", geometry_connection
+    )
     assert all(expected in sizes for expected in ["2XS", "XS", "M", "XL"])
 
 
-def test_canyon_aeroad_exists(geometry_database: Path) -> None:
-    sizes = fetchall_strings(f"SELECT size FROM '{geometry_database}' WHERE brand = 'Canyon' and model = 'Aeroad'")
+def test_canyon_aeroad_exists(geometry_connection: DuckDBPyConnection) -> None:
+    sizes = fetchall_strings(
+        "SELECT size FROM bike_geometry WHERE brand = 'Canyon' and model = 'Aeroad'", geometry_connection
+    )
     assert all(expected in sizes for expected in ["2XS", "XS", "M", "XL"])
 
 
-def test_stack_validity(geometry_database: Path) -> None:
-    (min_stack, max_stack) = duckdb.execute(f"SELECT min(stack), max(stack) FROM '{geometry_database}'").fetchone()
+def test_stack_validity(geometry_connection: DuckDBPyConnection) -> None:
+    (min_stack, max_stack) = geometry_connection.execute("SELECT min(stack), max(stack) FROM bike_geometry").fetchone()
     assert min_stack > 300
     assert max_stack < 800
 
 
-def test_reach_validity(geometry_database: Path) -> None:
-    (min_reach, max_reach) = duckdb.execute(f"SELECT min(reach), max(reach) FROM '{geometry_database}'").fetchone()
+def test_reach_validity(geometry_connection: DuckDBPyConnection) -> None:
+    (min_reach, max_reach) = geometry_connection.execute("SELECT min(reach), max(reach) FROM bike_geometry").fetchone()
     assert min_reach > 300
     assert max_reach < 550
 
 
-def test_head_tube_angle_validity(geometry_database: Path) -> None:
-    (min_head_tube_angle, max_head_tube_angle) = duckdb.execute(
-        f"SELECT min(head_tube_angle), max(head_tube_angle) FROM '{geometry_database}'"
+def test_head_tube_angle_validity(geometry_connection: DuckDBPyConnection) -> None:
+    (min_head_tube_angle, max_head_tube_angle) = geometry_connection.execute(
+        "SELECT min(head_tube_angle), max(head_tube_angle) FROM bike_geometry"
     ).fetchone()
     assert min_head_tube_angle > 60.0
     assert max_head_tube_angle < 90.0
 
 
-def test_seat_tube_angle_validity(geometry_database: Path) -> None:
-    (min_seat_tube_angle, max_seat_tube_angle) = duckdb.execute(
-        f"SELECT min(seat_tube_angle), max(seat_tube_angle) FROM '{geometry_database}'"
+def test_seat_tube_angle_validity(geometry_connection: DuckDBPyConnection) -> None:
+    (min_seat_tube_angle, max_seat_tube_angle) = geometry_connection.execute(
+        "SELECT min(seat_tube_angle), max(seat_tube_angle) FROM bike_geometry"
     ).fetchone()
     assert min_seat_tube_angle > 65.0
     assert max_seat_tube_angle < 90.0
 
 
-def test_no_mock_data(geometry_database: Path) -> None:
-    year_mock_values = duckdb.execute(f"SELECT year FROM '{geometry_database}' where year < 0").fetchall()
+def test_no_mock_data(geometry_connection: DuckDBPyConnection) -> None:
+    year_mock_values = geometry_connection.execute("SELECT year FROM bike_geometry where year < 0").fetchall()
     assert year_mock_values == []
+
+
+def test_size_rank_validity(geometry_connection: DuckDBPyConnection) -> None:
+    broken_runs = geometry_connection.execute("""SELECT brand, model, year
+FROM bike_geometry
+GROUP BY ALL
+HAVING min(size_rank) != 1 OR max(size_rank) != count(*) OR count(DISTINCT size_rank) != count(*)""").fetchall()
+    assert broken_runs == []
+
+
+def test_text_ranges_are_parsed(geometry_connection: DuckDBPyConnection) -> None:
+    unparsed_rows = geometry_connection.execute("""SELECT brand, model, year, size
+FROM bike_geometry
+WHERE (body_height_range IS NOT NULL AND coalesce(body_height_min, body_height_max) IS NULL)
+   OR (seat_height_range IS NOT NULL AND (seat_height_min IS NULL OR seat_height_max IS NULL))
+   OR body_height_min >= body_height_max
+   OR seat_height_min >= seat_height_max""").fetchall()
+    assert unparsed_rows == []
+
+
+def test_derived_metrics(geometry_connection: DuckDBPyConnection) -> None:
+    derived_rows = geometry_connection.execute("""
+SELECT derived_metrics, wheelbase, front_center_distance, chainstay, bb_drop
+FROM bike_geometry
+WHERE derived_metrics IS NOT NULL""").fetchall()
+    assert derived_rows
+    for derived_metrics, wheelbase, front_center, chainstay, bb_drop in derived_rows:
+        assert set(derived_metrics.split(",")) <= set(DERIVATIONS)
+        if "front_center_distance" in derived_metrics:
+            assert abs(wheelbase - front_center - (chainstay**2 - bb_drop**2) ** 0.5) < 1
+
+
+def test_geometry_families(geometry_connection: DuckDBPyConnection) -> None:
+    family_names = dict(enumerate(FAMILY_PROTOTYPES, start=1))
+    families = {
+        model: family_names[family_id]
+        for model, family_id in geometry_connection.execute(
+            "SELECT model, mode(family_id) FROM bike_geometry GROUP BY model"
+        ).fetchall()
+    }
+    assert families["Speed Concept"] == "time trial"
+    assert families["Tarmac SL8"] == "race"
+    assert families["Grail"] == "gravel"
+    assert families["Reign"] == "trail"
+
+
+def test_custom_metrics_are_kept(geometry_database: Path, geometry_connection: DuckDBPyConnection) -> None:
+    disc_sizes = geometry_connection.execute(
+        f"SELECT value FROM ({custom_metric_query(geometry_database.parent, 'disc_size_in_mm')}) "
+        "WHERE model = 'Grail' AND size = 'M'"
+    ).fetchall()
+    assert len(disc_sizes) == 1
+    database_columns = fetchall_strings("SELECT column_name FROM (DESCRIBE bike_geometry)", geometry_connection)
+    assert "disc_size_in_mm" not in database_columns
+    assert "custom_metrics" not in database_columns
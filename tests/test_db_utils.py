@@ -0,0 +1,26 @@
+import pickle
+
+import duckdb
+
+from bike_geometry_comparator.db_utils import fetch_columns, fetch_rows, fetchall_strings, iter_rows
+
+SQL = "SELECT i AS id, CASE WHEN i % 2 = 0 THEN 'even' END AS parity FROM range(5) t(i) ORDER BY i DESC"
+
+
+def test_rows() -> None:
+    rows = fetch_rows(SQL)
+    assert [row.id for row in rows] == [4, 3, 2, 1, 0]
+    assert dict(rows[0]) == {"id": 4, "parity": "even"}
+    assert rows[1]["parity"] is None
+    assert rows[1].astuple() == (3, None)
+    assert pickle.loads(pickle.dumps(rows)) == rows
+
+
+def test_streamed_rows_and_columns() -> None:
+    con = duckdb.connect()
+    assert [dict(row) for row in iter_rows(SQL, con, batch_size=2)] == [dict(row) for row in fetch_rows(SQL)]
+    assert fetch_columns(SQL, con, batch_size=2) == {
+        "id": [4, 3, 2, 1, 0],
+        "parity": ["even", None, "even", None, "even"],
+    }
+    assert fetchall_strings(f"SELECT parity FROM ({SQL}) WHERE parity IS NOT NULL", con) == ["even"] * 3
@@ -0,0 +1,30 @@
+import csv
+import logging
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.assembly import assemble_geometry_database
+
+
+def test_implausible_wheelbase_is_reported_and_not_derived_from(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    data_dir, build_dir = tmp_path / "data", tmp_path / "build"
+    year_dir = data_dir / "fairlight" / "strael" / "2024"
+    year_dir.mkdir(parents=True)
+    (year_dir / "defaults.ini").write_text("brand : Fairlight\nmodel : Strael\nyear : 2024")
+    # a wheelbase of "1.006" with a thousands separator reads as 1 mm
+    (year_dir / "geometry.csv").write_text(
+        "size,stack,reach,chainstay,bb_drop,wheelbase\nS,550,370,415,70,990\nM,570,380,415,70,1.006\n"
+    )
+    build_dir.mkdir()
+
+    with caplog.at_level(logging.WARNING):
+        assemble_geometry_database(data_dir, build_dir / "database.csv")
+
+    assert "Measured wheelbase of Fairlight Strael 2024 is implausible in 1 sizes" in caplog.text
+    with open(build_dir / "database.csv", newline="") as f:
+        front_centers = {row["size"]: row["front_center_distance"] for row in csv.DictReader(f)}
+    assert front_centers["S"] != ""
+    assert front_centers["M"] == ""
@@ -0,0 +1,50 @@
+import json
+from pathlib import Path
+
+from bike_geometry_comparator.diff import diff_builds
+
+
+def test_change_feed(tmp_path: Path) -> None:
+    old_file, new_file, feed_file = tmp_path / "old.csv", tmp_path / "new.csv", tmp_path / "changes.jsonl"
+    old_file.write_text(
+        "brand,model,year,size,stack,reach\nCanyon,Endurace,2022,M,590,383\nCanyon,Endurace,2022,L,609,396\n"
+    )
+    new_file.write_text(
+        "brand,model,year,size,stack,reach,trail\n"
+        "Canyon,Endurace,2022,M,594,383,58\nFairlight,Strael,,54R,570,385,60\nCanyon,Endurace,2022,S,570,375,60\n"
+    )
+
+    diff = diff_builds(old_file, new_file, feed_file)
+
+    assert (diff.added, diff.removed, diff.changed, diff.unchanged) == (2, 1, 1, 0)
+    assert diff.added_columns == ["trail"]
+    assert diff.changed_columns == {"stack": 1}
+    feed = [json.loads(line) for line in feed_file.read_text().splitlines()]
+    assert [(change["op"], change["size"]) for change in feed] == [
+        ("removed", "L"),
+        ("changed", "M"),
+        ("added", "S"),
+        ("added", "54R"),
+    ]
+    assert feed[1]["changes"] == {"stack": {"old": 590, "new": 594, "delta": 4}}
+    assert feed[3]["row"]["trail"] == 60
+    assert feed[3]["year"] is None
+
+
+def test_changed_column_type(tmp_path: Path) -> None:
+    old_file, new_file, feed_file = tmp_path / "old.csv", tmp_path / "new.csv", tmp_path / "changes.jsonl"
+    old_file.write_text(
+        "brand,model,year,size,stack,reach\nCanyon,Endurace,2022,M,n/a,383\nCanyon,Endurace,2022,L,609,396\n"
+    )
+    new_file.write_text(
+        "brand,model,year,size,stack,reach\nCanyon,Endurace,2022,M,594,383.5\nCanyon,Endurace,2022,L,609,396\n"
+    )
+
+    diff = diff_builds(old_file, new_file, feed_file)
+
+    assert (diff.changed, diff.unchanged) == (1, 1)
+    (change,) = [json.loads(line) for line in feed_file.read_text().splitlines()]
+    assert change["changes"] == {
+        "stack": {"old": "n/a", "new": 594},
+        "reach": {"old": 383, "new": 383.5, "delta": 0.5},
+    }
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from collections.abc import Iterator
+from dataclasses import replace
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.ingest.webscraper.discovery import BRAND_SITES, CrawlState, DiscoveryCrawler
+from bike_geometry_comparator.ingest.webscraper.fetching import FetchError, fetch_url
+
+SITEMAP_INDEX = """<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{root}/sitemap-products.xml</loc></sitemap>
+  <sitemap><loc>{root}/sitemap-missing.xml</loc></sitemap>
+  <sitemap><loc>{root}/private/sitemap.xml</loc></sitemap>
+</sitemapindex>"""
+PRODUCTS_SITEMAP = """<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"
+        xmlns:image="http://www.google.com/schemas/sitemap-image/1.1">
+  <url><loc>{root}/us/tcr-advanced-pro-1-2025</loc></url>
+  <url>
+    <loc>{root}/us/tcr-advanced-pro-0-disc-2025</loc>
+    <image:image>
+      <image:loc>{root}/images/tcr.jpg</image:loc>
+      <image:title>TCR Advanced Pro 0 Disc</image:title>
+    </image:image>
+  </url>
+  <url><loc>{root}/us/tcr-advanced-pro-0-2024</loc></url>
+  <url><loc>{root}/us/bikes-road</loc></url>
+  <url><loc>https://elsewhere.com/us/tcr-advanced-2-2025</loc></url>
+</urlset>"""
+LISTING = """<html><body>
+  <a href="/us/defy-advanced-2-2025">Defy Advanced 2</a>
+  <a href="../defy-advanced-1-2025">Defy Advanced 1</a>
+  <a href="/us/revolt-1-2025">Revolt 1</a>
+</body></html>"""
+
+
+@pytest.fixture
+def mock_site() -> Iterator[str]:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            pages = {
+                "/robots.txt": "User-agent: *\nDisallow: /private/\n",
+                "/sitemap.xml": SITEMAP_INDEX.format(root=root),
+                "/sitemap-products.xml": PRODUCTS_SITEMAP.format(root=root),
+                "/us/road-bikes/": LISTING,
+            }
+            if self.path not in pages:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.end_headers()
+            self.wfile.write(pages[self.path].encode("utf-8"))
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    root = f"http://127.0.0.1:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield root
+    server.shutdown()
+
+
+def test_discovery_crawl_resumes_from_checkpoint(mock_site: str, tmp_path: Path) -> None:
+    site = replace(BRAND_SITES["Giant"], root=mock_site, listings=("/us/road-bikes/",))
+    checkpoint = tmp_path / "checkpoint.json"
+    fetched: list[str] = []
+
+    def interrupted_fetch(url: str) -> bytes:
+        if url.endswith("/sitemap-products.xml"):
+            raise RuntimeError("interrupted")
+        fetched.append(url)
+        return fetch_url(url)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(DiscoveryCrawler([site], checkpoint, delay=0, concurrency=1, fetch=interrupted_fetch).run())
+
+    def fetch(url: str) -> bytes:
+        fetched.append(url)
+        return fetch_url(url)
+
+    fetched_before_resume = set(fetched)
+    crawler = DiscoveryCrawler([site], checkpoint, delay=0, fetch=fetch)
+    manifest = asyncio.run(crawler.run())
+
+    assert [(entry.model, entry.year, entry.url.removeprefix(mock_site)) for entry in manifest] == [
+        ("Defy Advanced", 2025, "/us/defy-advanced-1-2025"),
+        ("Revolt", 2025, "/us/revolt-1-2025"),
+        ("TCR Advanced Pro", 2025, "/us/tcr-advanced-pro-0-disc-2025"),
+        # the sitemap publishes no name of this kit, its URL slug is kept
+        ("tcr advanced pro", 2024, "/us/tcr-advanced-pro-0-2024"),
+    ]
+    resumed_pages = [url for url in fetched[len(fetched_before_resume) :] if not url.endswith("robots.txt")]
+    assert not fetched_before_resume & set(resumed_pages)
+    assert list(crawler.state.failed) == [f"{mock_site}/sitemap-missing.xml"]
+    assert f"{mock_site}/private/sitemap.xml" not in fetched
+    # the checkpoint is kept for the next crawl to fetch the failed page again
+    assert list(CrawlState.load(checkpoint).failed) == [f"{mock_site}/sitemap-missing.xml"]
+
+
+def test_discovery_retries_failed_pages(mock_site: str, tmp_path: Path) -> None:
+    site = replace(BRAND_SITES["Giant"], root=mock_site, sitemaps=(), listings=("/us/road-bikes/",))
+    checkpoint = tmp_path / "checkpoint.json"
+
+    def unavailable(url: str) -> bytes:
+        if url.endswith("/road-bikes/"):
+            raise FetchError(f"{url} failed after 3 attempts: HTTP Error 503")
+        return fetch_url(url)
+
+    assert asyncio.run(DiscoveryCrawler([site], checkpoint, delay=0, fetch=unavailable).run()) == []
+    assert checkpoint.exists()
+
+    crawler = DiscoveryCrawler([site], checkpoint, delay=0, fetch=fetch_url)
+    assert len(asyncio.run(crawler.run())) == 2
+    assert not crawler.state.failed
+    assert not checkpoint.exists()
+
+
+def test_discovery_resumes_with_other_sites(mock_site: str, tmp_path: Path) -> None:
+    giant = replace(BRAND_SITES["Giant"], root=mock_site, listings=("/us/road-bikes/",))
+    checkpoint = tmp_path / "checkpoint.json"
+
+    def interrupted_fetch(url: str) -> bytes:
+        if url.endswith("/sitemap-products.xml"):
+            raise RuntimeError("interrupted")
+        return fetch_url(url)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(DiscoveryCrawler([giant], checkpoint, delay=0, concurrency=1, fetch=interrupted_fetch).run())
+
+    # another host name of the mock site, so none of its pages were visited by the interrupted crawl
+    liv = replace(giant, brand="Liv", root=mock_site.replace("127.0.0.1", "localhost"), sitemaps=())
+    manifest = asyncio.run(DiscoveryCrawler([liv], checkpoint, delay=0, fetch=fetch_url).run())
+
+    assert [(entry.brand, entry.model, entry.year) for entry in manifest] == [
+        ("Liv", "Defy Advanced", 2025),
+        ("Liv", "Revolt", 2025),
+    ]
+    assert not checkpoint.exists()
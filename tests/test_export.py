@@ -0,0 +1,32 @@
+import json
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.export import export_database
+
+
+def test_export_keeps_schema_types(geometry_database: Path, tmp_path: Path) -> None:
+    output = tmp_path / "gravel.parquet"
+    export_database(
+        Path(geometry_database),
+        output,
+        "parquet",
+        "model = 'Grail' AND year = 2023",
+        ["model", "size", "head_tube_angle", "stack"],
+    )
+    types = duckdb.execute(f"SELECT column_name, column_type FROM (DESCRIBE FROM '{output}')").fetchall()
+    assert types == [("model", "VARCHAR"), ("size", "VARCHAR"), ("head_tube_angle", "FLOAT"), ("stack", "INTEGER")]
+    assert duckdb.execute(f"SELECT DISTINCT model FROM '{output}'").fetchall() == [("Grail",)]
+
+
+def test_export_jsonl(geometry_database: Path, tmp_path: Path) -> None:
+    output = tmp_path / "canyon.jsonl"
+    facets_output = tmp_path / "canyon_facets.csv"
+    export_database(Path(geometry_database), output, "jsonl", "brand = 'Canyon'", facets_output=facets_output)
+    rows = [json.loads(line) for line in output.read_text().splitlines()]
+    (count,) = duckdb.execute(f"SELECT count(*) FROM '{geometry_database}' WHERE brand = 'Canyon'").fetchone() or (0,)
+    assert len(rows) == count
+    assert {row["brand"] for row in rows} == {"Canyon"}
+    (cube_sizes,) = duckdb.execute(f"SELECT sizes FROM '{facets_output}' WHERE grouping_id = 127").fetchone() or (0,)
+    assert cube_sizes == count
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.database.facets import FACET_CUBE_FILE, FACET_DIMENSIONS, facet_counts
+
+
+def test_facet_counts_match_rows(geometry_database: Path) -> None:
+    con = duckdb.connect()
+    con.execute(f"CREATE TABLE facet_cube AS FROM '{Path(geometry_database).parent / FACET_CUBE_FILE}'")
+    dimensions = ", ".join(f"{expression} AS {facet}" for facet, expression in FACET_DIMENSIONS.items())
+    con.execute(f"CREATE TABLE facet_rows AS SELECT {dimensions} FROM '{geometry_database}'")
+
+    filters = {"brand": ["Canyon", "Trek"], "discipline": ["race"]}
+    counts = facet_counts(con, "facet_cube", filters)
+    for facet in FACET_DIMENSIONS:
+        conditions = [
+            f"{other} IN ({', '.join(repr(value) for value in values)})"
+            for other, values in filters.items()
+            if other != facet
+        ]
+        expected = con.execute(f"""
+SELECT {facet}::VARCHAR AS value, count(*)::INTEGER AS sizes
+FROM facet_rows
+WHERE {" AND ".join(conditions)}
+GROUP BY value
+ORDER BY sizes DESC, value""").fetchall()
+        assert counts[facet] == expected, facet
+    assert dict(counts["brand"]).keys() >= {"Canyon", "Trek", "Cannondale"}
+
+
+def test_facet_cube_has_no_default_year(geometry_database: Path) -> None:
+    cube_file = Path(geometry_database).parent / FACET_CUBE_FILE
+    (default_years,) = duckdb.execute(f"SELECT count(*) FROM '{cube_file}' WHERE year = -1").fetchone() or (0,)
+    (missing_years,) = duckdb.execute(f"SELECT count(*) FROM '{geometry_database}' WHERE year IS NULL").fetchone() or (
+        0,
+    )
+    assert default_years == 0
+    assert missing_years > 0
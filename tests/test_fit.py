@@ -0,0 +1,37 @@
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.fit import REACH_TOLERANCE, STACK_TOLERANCE, RiderProfile, recommend_sizes, target_window
+from bike_geometry_comparator.query_cache import QueryCache
+
+_DATABASE = """brand,model,year,size,size_rank,stack,reach,body_height_min,body_height_max
+Fairlight,Strael,2024,S,1,560,372,1650,1750
+Fairlight,Strael,2024,M,2,592,386,1750,1850
+Fairlight,Strael,2024,L,3,615,398,1850,1950
+Fairlight,Secan,2024,M,1,594,388,1600,1700
+Fairlight,Faran,2024,XL,1,660,430,,
+"""
+
+
+def test_target_window() -> None:
+    window = target_window(RiderProfile(height=182, inseam=86))
+    # 1820 mm tall, 86 cm inseam is 22.8 mm longer than the average 0.46 of the height
+    assert window.stack == pytest.approx(1820 * 0.32 + 22.8 * 0.5)
+    assert window.reach == pytest.approx(1820 * 0.175 + 76 - 22.8 * 0.3)
+    assert (window.stack_tolerance, window.reach_tolerance) == (STACK_TOLERANCE, REACH_TOLERANCE)
+    # longer legs at the same height need more stack and less reach
+    long_legs = target_window(RiderProfile(height=182, inseam=92))
+    assert long_legs.stack > window.stack
+    assert long_legs.reach < window.reach
+
+
+def test_best_size_of_every_model(tmp_path: Path) -> None:
+    database_file = tmp_path / "database.csv"
+    database_file.write_text(_DATABASE)
+
+    recommendations = recommend_sizes(database_file, RiderProfile(height=182, inseam=86), cache=QueryCache())
+
+    # Secan fits by stack and reach but not by its recommended body heights, Faran is out of the window
+    assert [(r.model, r.size) for r in recommendations] == [("Strael", "M")]
+    assert recommendations[0].fit_distance < 0.5
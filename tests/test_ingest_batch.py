@@ -0,0 +1,55 @@
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.ingest import batch
+from bike_geometry_comparator.ingest.trek import parse_raw_geometry
+
+TREK_CHART = """Frame size letter
+\tA — Seat tube
+\tB — Seat tube angle
+\tFrame stack
+\tFrame reach
+S
+\t50.0
+\t74,0°
+\t55.0
+\t38.0
+M
+\t52.0
+\t73,7°
+\t57.0
+\t38.8
+"""
+
+
+def test_batch_ingest_into_data_tree(tmp_path: Path) -> None:
+    charts_dir = tmp_path / "charts"
+    charts_dir.mkdir()
+    (charts_dir / "Domane SL 2025.txt").write_text(TREK_CHART, encoding="utf-8")
+    (charts_dir / "Emonda_2024.txt").write_text(TREK_CHART, encoding="utf-8")
+    (charts_dir / "Broken 2023.txt").write_text("Frame size letter\n", encoding="utf-8")
+    data_dir = tmp_path / "data"
+
+    sources = [batch.chart_source(file) for file in batch.find_chart_files([str(charts_dir)])]
+    summary = batch.ingest_batch(parse_raw_geometry, "Trek", sources, data_dir, jobs=2)
+
+    assert (summary.rows, [result.source.name for result in summary.failures]) == (4, ["Broken 2023.txt"])
+    model_dir = data_dir / "trek" / "domane_sl"
+    assert (model_dir / "2025" / "geometry.csv").read_text().splitlines() == [
+        "size,seat_tube,seat_tube_angle,frame_stack,frame_reach",
+        "S,500,74.0,550,380",
+        "M,520,73.7,570,388",
+    ]
+    assert (model_dir / "defaults.ini").read_text() == "model : Domane SL"
+    assert (model_dir / "2025" / "defaults.ini").read_text() == "year : 2025"
+    assert (data_dir / "trek" / "emonda" / "2024" / batch.ORIGINAL_CHART_FILE).exists()
+
+
+def test_chart_source_name(tmp_path: Path) -> None:
+    assert batch.chart_source(tmp_path / "Domane SLR 2025.txt") == batch.ChartSource(
+        tmp_path / "Domane SLR 2025.txt", "Domane SLR", 2025
+    )
+    assert batch.chart_source(tmp_path / "Faran 3.0.txt", "Faran").year is None
+    with pytest.raises(ValueError, match="doesn't match"):
+        batch.chart_source(tmp_path / "Domane\nSLR.txt")
@@ -0,0 +1,46 @@
+import pytest
+
+from bike_geometry_comparator.database.metrics import (
+    MetricResolution,
+    canonical_metric_index,
+    generate_metric_projection,
+)
+
+
+def test_unit_suffix_resolves_alias() -> None:
+    index = canonical_metric_index()
+    assert index.resolve("wheel_base_in_mm") == MetricResolution("wheelbase")
+    assert index.resolve("spacer_in_mm") == MetricResolution(None)
+    assert index.resolve("stack_in_cm") == MetricResolution("stack", 10)
+
+
+@pytest.mark.parametrize("column", ["stack_in_mmm", "reach_in_inch", "head_tube_angle_in_mm"])
+def test_unconvertible_unit_is_rejected(column: str) -> None:
+    with pytest.raises(ValueError, match=column):
+        canonical_metric_index().resolve(column)
+
+
+def test_explicit_mappings_take_precedence() -> None:
+    projection = generate_metric_projection(
+        ("size", "seat_tube_angle", "effective_seat_tube_angle", "chainstay_length_in_mm"),
+        "Trek",
+        frozenset({("seat_tube_angle", "-"), ("effective_seat_tube_angle", "seat_tube_angle")}),
+    )
+    assert projection.select_list.startswith(
+        "* EXCLUDE (seat_tube_angle) "
+        "RENAME (effective_seat_tube_angle as seat_tube_angle, chainstay_length_in_mm as chainstay), "
+    )
+    assert projection.custom_metrics == ("seat_tube_angle",)
+    assert projection.unknown == ()
+
+
+def test_unknown_metric_is_kept_as_custom_metric() -> None:
+    projection = generate_metric_projection(("size", "mystery_metric", "spacer_in_mm"), None, frozenset())
+    assert projection.select_list.startswith("* EXCLUDE (spacer_in_mm, mystery_metric), map_from_entries(")
+    assert projection.custom_metrics == ("spacer_in_mm", "mystery_metric")
+    assert projection.unknown == ("mystery_metric",)
+
+
+def test_metrics_resolving_into_the_same_column_are_rejected() -> None:
+    with pytest.raises(ValueError, match="stack"):
+        generate_metric_projection(("size", "stack", "frame_stack"), None, frozenset())
@@ -0,0 +1,55 @@
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from bike_geometry_comparator.query_cache import QueryCache, database_build_hash
+
+
+def test_results_are_cached_per_build(tmp_path: Path) -> None:
+    database_file = tmp_path / "database.csv"
+    database_file.write_text("brand,stack\nCanyon,590\n")
+    cache = QueryCache(disk_dir=tmp_path / "cache")
+
+    assert cache.query(database_file, "SELECT max(stack) FROM {database}") == (["max(stack)"], [(590,)])
+    assert cache.query(database_file, "SELECT max(stack)\n  FROM {database}") == (["max(stack)"], [(590,)])
+    assert (cache.stats.memory_hits, cache.stats.misses) == (1, 1)
+
+    # a rewrite of the same size, possibly within the same timestamp tick
+    database_file.write_text("brand,stack\nCanyon,610\n")
+    assert cache.query(database_file, "SELECT max(stack) FROM {database}") == (["max(stack)"], [(610,)])
+    assert cache.stats.misses == 2
+    assert len(list((tmp_path / "cache").iterdir())) == 1
+
+    restarted_cache = QueryCache(disk_dir=tmp_path / "cache")
+    assert restarted_cache.query(database_file, "SELECT max(stack) FROM {database}") == (["max(stack)"], [(610,)])
+    assert restarted_cache.stats.disk_hits == 1
+
+
+def test_build_hash_of_replaced_file(tmp_path: Path) -> None:
+    database_file, staged_file = tmp_path / "database.csv", tmp_path / "staged.csv"
+    database_file.write_text("brand,stack\nCanyon,590\n")
+    # old enough not to be rehashed on every call, the replacement keeps size and modification time
+    published = time.time_ns() - 60_000_000_000
+    os.utime(database_file, ns=(published, published))
+    old_hash = database_build_hash(database_file)
+
+    staged_file.write_text("brand,stack\nCanyon,610\n")
+    os.utime(staged_file, ns=(published, published))
+    os.replace(staged_file, database_file)
+    assert database_build_hash(database_file) != old_hash
+
+
+def test_concurrent_lookups(tmp_path: Path) -> None:
+    database_file = tmp_path / "database.csv"
+    database_file.write_text("brand,stack\nCanyon,590\n")
+    cache = QueryCache(max_entries=4)
+
+    def lookup(request: int) -> int:
+        slot = request % 8
+        return cache.get_or_compute(database_file, ("slot", slot), lambda: slot * 10)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(lookup, range(2000)))
+    assert results == [request % 8 * 10 for request in range(2000)]
+    assert cache.stats.requests == 2000
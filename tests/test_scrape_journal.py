@@ -0,0 +1,76 @@
+import threading
+from collections.abc import Iterator
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.ingest.webscraper.fetching import CircuitBreaker, CircuitOpenError, FetchError, HttpClient
+from bike_geometry_comparator.ingest.webscraper.journal import DONE, FAILED, PENDING, CrawlJournal, ScrapeJob
+
+
+@pytest.fixture
+def flaky_site() -> Iterator[str]:
+    requests: dict[str, int] = {}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self) -> None:
+            requests[self.path] = requests.get(self.path, 0) + 1
+            if self.path == "/flaky" and requests[self.path] < 3:
+                self.send_response(503)
+                self.send_header("Retry-After", "2")
+                self.end_headers()
+            elif self.path == "/down":
+                self.send_error(500)
+            elif self.path == "/missing":
+                self.send_error(404)
+            else:
+                self.send_response(200)
+                self.end_headers()
+                self.wfile.write(b"geometry")
+
+        def log_message(self, format: str, *args: object) -> None:
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+
+
+def test_retries_and_circuit_breaker(flaky_site: str) -> None:
+    sleeps: list[float] = []
+    client = HttpClient(max_attempts=3, breaker=CircuitBreaker(failure_threshold=4), sleep=sleeps.append)
+
+    assert client.fetch(f"{flaky_site}/flaky") == b"geometry"
+    assert sleeps == [2, 2]
+
+    with pytest.raises(FetchError, match="HTTP 404"):
+        client.fetch(f"{flaky_site}/missing")
+    with pytest.raises(FetchError, match="after 3 attempts"):
+        client.fetch(f"{flaky_site}/down")
+    with pytest.raises(CircuitOpenError):
+        client.fetch(f"{flaky_site}/down")
+    with pytest.raises(CircuitOpenError):
+        client.fetch(f"{flaky_site}/flaky")
+
+
+def test_journal_resumes_unfinished_jobs(tmp_path: Path) -> None:
+    journal_file = tmp_path / "journal.sqlite"
+    journal = CrawlJournal(journal_file)
+    jobs = [ScrapeJob(f"https://www.cube.eu/{n}", "Cube", f"Model {n}", 2025) for n in range(3)]
+    assert journal.add_jobs(jobs) == 3
+    journal.mark_done(jobs[0].url, tmp_path / "geometry.csv")
+    journal.mark_failed(jobs[1].url, "HTTP 503", max_attempts=2)
+    journal.close()
+
+    journal = CrawlJournal(journal_file)
+    assert journal.add_jobs(jobs) == 0
+    assert [(job.url, job.attempts) for job in journal.pending_jobs(max_attempts=2)] == [
+        (jobs[1].url, 1),
+        (jobs[2].url, 0),
+    ]
+    journal.mark_failed(jobs[1].url, "HTTP 503", max_attempts=2)
+    assert journal.counts() == {DONE: 1, FAILED: 1, PENDING: 1}
+    assert journal.retry_failed() == 1
+    assert len(journal.pending_jobs(max_attempts=2)) == 2
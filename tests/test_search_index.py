@@ -0,0 +1,31 @@
+import time
+from pathlib import Path
+
+from bike_geometry_comparator.database.search_index import SEARCH_INDEX_FILE, SearchIndex, normalize
+
+
+def test_normalize() -> None:
+    assert normalize("Domane SL[R] Gen 4") == ["domane", "sl", "r", "gen", "4"]
+    assert normalize("Crosstrail Hybrid Équipe") == ["crosstrail", "hybrid", "equipe"]
+
+
+def test_fuzzy_search(geometry_database: Path) -> None:
+    index = SearchIndex.load(Path(geometry_database).parent / SEARCH_INDEX_FILE)
+
+    def top(query: str) -> tuple[str, str]:
+        match = index.search(query, 1)[0]
+        return match.brand, match.model
+
+    assert top("canyn endurace") == ("Canyon", "Endurace")
+    assert top("grand canyon") == ("Canyon", "Grand Canyon")
+    assert top("speciallized tarmac sl8") == ("Specialized", "Tarmac SL8")
+    assert top("supersix evo himod") == ("Cannondale", "SuperSix EVO Hi-MOD")
+    # the last token is completed as a prefix while it's typed, but not after a space
+    assert {match.model for match in index.search("trek doma")} >= {"Domane AL Gen 4", "Domane SL[R] Gen 4"}
+    assert index.search("trek doma ")[0].score < index.search("trek doma")[0].score
+    assert index.search("") == []
+
+    started = time.perf_counter()
+    for _ in range(100):
+        index.search("endurace cf")
+    assert (time.perf_counter() - started) / 100 < 0.001
@@ -0,0 +1,92 @@
+import asyncio
+import json
+from collections.abc import AsyncGenerator
+from pathlib import Path
+from typing import Any
+
+import duckdb
+
+from bike_geometry_comparator.server import GeometryHttpServer, GeometryQueryService
+
+
+async def _get(port: int, target: str, headers: str = "") -> tuple[str, str]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(f"GET {target} HTTP/1.1\r\nConnection: close\r\n{headers}\r\n".encode("latin-1"))
+    response = (await reader.read()).decode("utf-8")
+    writer.close()
+    head, _, body = response.partition("\r\n\r\n")
+    if "Transfer-Encoding: chunked" in head:
+        chunks = []
+        while True:
+            size, _, body = body.partition("\r\n")
+            if not int(size, 16):
+                break
+            chunks.append(body[: int(size, 16)])
+            body = body[int(size, 16) + 2 :]
+        body = "".join(chunks)
+    return head, body
+
+
+def test_http_queries(geometry_database: Path) -> None:
+    async def run() -> None:
+        service = GeometryQueryService(Path(geometry_database), pool_size=2)
+        server = await asyncio.start_server(GeometryHttpServer(service).handle_connection, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            head, body = await _get(port, "/search?brand=canyon&model=endurace&year=2022")
+            sizes = [row["size"] for row in json.loads(body)]
+            assert sizes[:3] == ["3XS", "2XS", "XS"]
+            etag = next(line for line in head.split("\r\n") if line.startswith("ETag:"))
+            assert etag == f'ETag: "{service.build_hash}"'
+
+            head, _ = await _get(port, "/search?brand=canyon", f"If-None-Match: {etag.split(' ')[1]}\r\n")
+            assert head.startswith("HTTP/1.1 304")
+
+            _, body = await _get(port, "/compare?bike=Canyon|Endurace|2022|M&bike=Canyon|Endurace|2022|S&format=ndjson")
+            assert [json.loads(line)["size"] for line in body.splitlines()] == ["M", "S"]
+
+            head, body = await _get(port, "/fit?height=182")
+            assert head.startswith("HTTP/1.1 400")
+            assert "inseam" in json.loads(body)["error"]
+
+            _, body = await _get(port, "/suggest?q=canyn%20endurace&limit=1")
+            assert [(row["brand"], row["model"]) for row in json.loads(body)] == [("Canyon", "Endurace")]
+
+            _, body = await _get(port, "/facets?brand=Canyon&year=2022")
+            facets = {row["facet"]: row["values"] for row in json.loads(body)}
+            assert "Canyon" in [value["value"] for value in facets["brand"]]
+            assert sum(value["sizes"] for value in facets["size"]) == sum(
+                value["sizes"] for value in facets["discipline"]
+            )
+
+            _, body = await _get(port, "/cockpit?stack=640&reach=470&limit=3")
+            assert [row["distance"] <= 10 for row in json.loads(body)] == [True, True, True]
+
+            _, body = await _get(port, "/fit?height=182&inseam=86&limit=2")
+            assert len(json.loads(body)) == 2
+
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET\r\n\r\n")
+            response = (await reader.read()).decode("utf-8")
+            writer.close()
+            assert response.startswith("HTTP/1.1 400")
+            assert "Malformed request line" in response
+
+    asyncio.run(run())
+
+
+def test_stream_error_marker(geometry_database: Path) -> None:
+    async def failing_rows(_: Any) -> AsyncGenerator[dict[str, Any]]:
+        yield {"size": "S"}
+        raise duckdb.InvalidInputException("Lost the table")
+
+    async def run() -> None:
+        http_server = GeometryHttpServer(GeometryQueryService(Path(geometry_database), pool_size=1))
+        http_server._routes["/search"] = failing_rows
+        server = await asyncio.start_server(http_server.handle_connection, "127.0.0.1", 0)
+        async with server:
+            head, body = await _get(server.sockets[0].getsockname()[1], "/search?format=ndjson")
+            assert head.startswith("HTTP/1.1 200")
+            assert [json.loads(line) for line in body.splitlines()] == [{"size": "S"}, {"error": "Lost the table"}]
+
+    asyncio.run(run())
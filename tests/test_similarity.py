@@ -0,0 +1,27 @@
+import csv
+from pathlib import Path
+
+import duckdb
+
+from bike_geometry_comparator.similarity import build_similar_frames
+
+
+def test_incremental_update_matches_full_computation(geometry_database: Path, tmp_path: Path) -> None:
+    neighbors_file, full_neighbors_file = tmp_path / "similar_frames.csv", tmp_path / "full_similar_frames.csv"
+    build_similar_frames(geometry_database, neighbors_file, k=5)
+    with open(neighbors_file, newline="") as f:
+        neighbors = list(csv.DictReader(f))
+    assert all(row["model"] != row["neighbor_model"] for row in neighbors)
+    assert {row["rank"] for row in neighbors} == {"1", "2", "3", "4", "5"}
+
+    changed_database = tmp_path / "database.csv"
+    duckdb.execute(f"""
+COPY (SELECT * REPLACE (CASE WHEN model = 'Endurace' THEN stack + 15 ELSE stack END AS stack)
+      FROM '{geometry_database}'
+      WHERE model <> 'Aeroad')
+TO '{changed_database}' (HEADER)""")
+    stats = build_similar_frames(changed_database, neighbors_file, k=5, jobs=2, block_size=64)
+    build_similar_frames(changed_database, full_neighbors_file, k=5)
+
+    assert 0 < stats.recomputed < stats.sizes
+    assert neighbors_file.read_text() == full_neighbors_file.read_text()
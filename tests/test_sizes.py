@@ -0,0 +1,51 @@
+import duckdb
+import pytest
+
+from bike_geometry_comparator.database.core import init_geometry_database
+from bike_geometry_comparator.database.sizes import build_size_index, find_size_anomalies, size_label_rank
+
+
+def test_letter_sizes_are_ordered() -> None:
+    ranks = [size_label_rank(label) for label in ["3XS", "2XS", "XS", "S", "M", "L", "XL", "XXL"]]
+    assert None not in ranks
+    assert ranks == sorted(ranks)  # type: ignore[type-var]
+    assert len(set(ranks)) == len(ranks)
+    assert size_label_rank("XXL") == size_label_rank("2XL")
+    assert size_label_rank("XXS") == size_label_rank("2XS")
+    assert size_label_rank("SM") == size_label_rank("S")
+    assert size_label_rank("S") < size_label_rank("S/M") < size_label_rank("M")  # type: ignore[operator]
+    assert size_label_rank("M") < size_label_rank("ML") < size_label_rank("L")  # type: ignore[operator]
+
+
+@pytest.mark.parametrize(
+    ("label", "rank"),
+    [("54", 54.0), ("51R", 51.0), ("58T", 58.0), ("54 cm", 54.0), ("27.5", 27.5), ("XXS/47", -3.0)],
+)
+def test_numeric_and_combined_sizes(label: str, rank: float) -> None:
+    assert size_label_rank(label) == rank
+
+
+@pytest.mark.parametrize("label", ["One Size", "", "Kids"])
+def test_unknown_labels_have_no_rank(label: str) -> None:
+    assert size_label_rank(label) is None
+
+
+def test_size_anomalies() -> None:
+    con = duckdb.connect()
+    init_geometry_database(con)
+    # M has a lower stack than S, XL jumps far beyond the regular 20 mm steps
+    con.execute("""
+INSERT INTO bike_geometry (brand, model, year, size, stack, reach)
+VALUES ('Fairlight', 'Strael', 2024, 'S', 550, 370),
+       ('Fairlight', 'Strael', 2024, 'M', 540, 380),
+       ('Fairlight', 'Strael', 2024, 'L', 570, 390),
+       ('Fairlight', 'Strael', 2024, 'XL', 640, 400),
+       ('Fairlight', 'Strael', 2024, 'XS', 530, 360)""")
+    build_size_index(con)
+
+    sizes = con.execute("SELECT size FROM bike_geometry ORDER BY size_rank").fetchall()
+    assert [size for (size,) in sizes] == ["XS", "S", "M", "L", "XL"]
+    anomalies = {(size, metric, kind) for _, _, _, size, metric, kind, _ in find_size_anomalies(con)}
+    assert ("M", "stack", "non-monotonic") in anomalies
+    assert ("XL", "stack", "outlier") in anomalies
+    assert not {anomaly for anomaly in anomalies if anomaly[1] == "reach"}
@@ -0,0 +1,22 @@
+from pathlib import Path
+
+from tests.support import cached_geometry_database
+
+
+def test_database_is_rebuilt_only_when_data_changes(tmp_path: Path) -> None:
+    data_dir, cache_dir = tmp_path / "data", tmp_path / "cache"
+    year_dir = data_dir / "fairlight" / "strael" / "2024"
+    year_dir.mkdir(parents=True)
+    (year_dir / "defaults.ini").write_text("brand : Fairlight\nmodel : Strael\nyear : 2024")
+    (year_dir / "geometry.csv").write_text("size,stack,reach\nS,550,370\nM,570,380\n")
+
+    database_file = cached_geometry_database(cache_dir, data_dir)
+    built = database_file.stat().st_mtime_ns
+    assert cached_geometry_database(cache_dir, data_dir) == database_file
+    assert database_file.stat().st_mtime_ns == built
+
+    (year_dir / "geometry.csv").write_text("size,stack,reach\nS,552,370\nM,570,380\n")
+    rebuilt_file = cached_geometry_database(cache_dir, data_dir)
+    assert rebuilt_file != database_file
+    assert "552" in rebuilt_file.read_text()
+    assert [path.name for path in cache_dir.iterdir() if path.is_dir()] == [rebuilt_file.parent.name]
@@ -0,0 +1,62 @@
+import io
+from pathlib import Path
+
+import pytest
+from rich.console import Console
+
+from bike_geometry_comparator.viewer import ResultPager, browse, render_page
+
+
+def test_pages_are_sorted_and_filtered_by_queries(geometry_database: Path) -> None:
+    pager = ResultPager(geometry_database, page_size=10)
+    try:
+        total = pager.rows
+        assert pager.pages == -(-total // 10)
+        assert len(pager.page(0)) == 10
+        assert pager.page(pager.pages) == []
+
+        stack = pager.columns.index("stack")
+        pager.sort("stack", descending=True)
+        stacks = [row[stack] for number in range(pager.pages) for row in pager.page(number)]
+        assert len(stacks) == total
+        known = [value for value in stacks if value is not None]
+        assert known == sorted(known, reverse=True)
+        assert stacks[: len(known)] == known
+
+        pager.filter("brand = 'Canyon'")
+        assert 0 < pager.rows < total
+        assert {row[pager.columns.index("brand")] for row in pager.page(0)} == {"Canyon"}
+        with pytest.raises(ValueError):
+            pager.filter("no_such_column > 1")
+        assert pager.where == "brand = 'Canyon'"
+        with pytest.raises(ValueError):
+            pager.sort("no_such_column")
+    finally:
+        pager.close()
+
+
+def test_render_page_pins_columns() -> None:
+    columns = ["brand", "model", "year", "size", "stack", "reach", "head_tube_angle"]
+    rows = [("Canyon", "Endurace", 2022, "M", 590, 378, 73.0)]
+    table, shown = render_page(columns, rows, first_column=1, width=60)
+    headers = [str(column.header) for column in table.columns]
+    assert headers[:3] == ["brand", "model", "size"]
+    assert "year" not in headers
+    assert headers[3] == "stack"
+    assert shown == len(headers) - 3 < 4
+
+
+def test_browse_commands(geometry_database: Path) -> None:
+    pager = ResultPager(geometry_database, page_size=5)
+    pages = pager.pages
+    commands = iter(["n", "s reach desc", "f model = 'Grail'", "g 99", "bogus", "q"])
+    output = io.StringIO()
+    try:
+        browse(pager, Console(file=output, width=200), lambda _: next(commands))
+    finally:
+        pager.close()
+    text = output.getvalue()
+    assert f"Page 2 of {pages}" in text
+    assert "sorted by reach desc, where model = 'Grail'" in text
+    assert f"Page {pager.pages} of {pager.pages}" in text
+    assert "Unknown command 'bogus'" in text
@@ -0,0 +1,72 @@
+import csv
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+from bike_geometry_comparator.watch import GeometryWatcher
+
+
+def _write_year(data_dir: Path, year: int, geometry: str) -> Path:
+    year_dir = data_dir / "fairlight" / "strael" / str(year)
+    year_dir.mkdir(parents=True)
+    (year_dir / "defaults.ini").write_text(f"year : {year}")
+    (year_dir / "geometry.csv").write_text(geometry)
+    return year_dir / "geometry.csv"
+
+
+def _stacks(database_file: Path) -> dict[tuple[str, str], str]:
+    with open(database_file, newline="") as f:
+        return {(row["year"], row["size"]): row["stack"] for row in csv.DictReader(f)}
+
+
+def test_rebuild_reloads_only_changed_sources(tmp_path: Path) -> None:
+    data_dir, build_dir, client_dir = tmp_path / "data", tmp_path / "build", tmp_path / "client"
+    _write_year(data_dir, 2023, "size,stack,reach\nS,550,370\nM,570,380\n")
+    geometry_2024 = _write_year(data_dir, 2024, "size,stack,reach\nS,552,372\nM,572,382\n")
+    (data_dir / "fairlight" / "defaults.ini").write_text("brand : Fairlight")
+    (data_dir / "fairlight" / "strael" / "defaults.ini").write_text("model : Strael")
+
+    watcher = GeometryWatcher(data_dir, build_dir / "database.csv", client_dir)
+    try:
+        stats = watcher.rebuild()
+        assert (stats.sources, stats.restaged) == (2, 2)
+        assert _stacks(build_dir / "database.csv")[("2024", "S")] == "552"
+
+        assert watcher.rebuild().restaged == 0
+
+        geometry_2024.write_text("size,stack,reach\nS,554,372\nM,572,382\n")
+        modified = geometry_2024.stat().st_mtime_ns + 1_000_000_000
+        os.utime(geometry_2024, ns=(modified, modified))
+        assert watcher.rebuild().restaged == 1
+        assert _stacks(build_dir / "database.csv")[("2024", "S")] == "554"
+        assert _stacks(client_dir / "database.csv") == _stacks(build_dir / "database.csv")
+
+        # inherited defaults are part of every source below them
+        (data_dir / "fairlight" / "strael" / "defaults.ini").write_text("model : Strael AL")
+        os.utime(data_dir / "fairlight" / "strael" / "defaults.ini", ns=(modified, modified))
+        assert watcher.rebuild().restaged == 2
+        assert not [file for file in build_dir.iterdir() if file.name.startswith(".assembly-")]
+    finally:
+        watcher.close()
+
+
+def test_snapshot_skips_vanished_files(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    data_dir = tmp_path / "data"
+    geometry = _write_year(data_dir, 2024, "size,stack,reach\nS,552,372\n")
+    walk = os.walk
+
+    def walk_then_save(top: Path) -> Iterator[tuple[str, list[str], list[str]]]:
+        for directory, directories, names in walk(top):
+            if "geometry.csv" in names:
+                # the file is gone between listing the directory and reading its modification time
+                geometry.unlink()
+            yield directory, directories, names
+
+    watcher = GeometryWatcher(data_dir, tmp_path / "build" / "database.csv")
+    try:
+        monkeypatch.setattr(os, "walk", walk_then_save)
+        assert list(watcher.snapshot()) == [geometry.parent / "defaults.ini"]
+    finally:
+        watcher.close()